@@ -0,0 +1,246 @@
+"""Cross-replica agent config change broadcast over a pluggable pub/sub transport."""
+
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+try:
+    import redis.asyncio as redis_asyncio
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+Handler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class BroadcastTransport(ABC):
+    """Delivers JSON-serializable messages to every subscribed replica."""
+
+    @abstractmethod
+    async def publish(self, message: Dict[str, Any]) -> None:
+        """Send a message to all replicas (including this one)."""
+
+    @abstractmethod
+    async def start(self, handler: Handler) -> None:
+        """Start delivering received messages to handler."""
+
+    async def stop(self) -> None:
+        """Stop receiving messages."""
+
+
+class InProcessHub:
+    """A channel shared by in-process transports, e.g. replicas in a test."""
+
+    def __init__(self) -> None:
+        self.handlers: List[Handler] = []
+
+    async def publish(self, data: str) -> None:
+        for handler in list(self.handlers):
+            try:
+                await handler(json.loads(data))
+            except Exception as e:
+                logging.warning(f"Config broadcast handler failed: {e}")
+
+
+class InProcessTransport(BroadcastTransport):
+    """Transport over an InProcessHub; messages go through JSON like on the wire."""
+
+    def __init__(self, hub: Optional[InProcessHub] = None) -> None:
+        self.hub = hub or InProcessHub()
+        self._handler: Optional[Handler] = None
+
+    async def publish(self, message: Dict[str, Any]) -> None:
+        await self.hub.publish(json.dumps(message))
+
+    async def start(self, handler: Handler) -> None:
+        self._handler = handler
+        self.hub.handlers.append(handler)
+
+    async def stop(self) -> None:
+        if self._handler in self.hub.handlers:
+            self.hub.handlers.remove(self._handler)
+        self._handler = None
+
+
+class RedisTransport(BroadcastTransport):
+    """Redis pub/sub transport.
+
+    Works with any client exposing redis.asyncio's publish() and pubsub()
+    (subscribe, get_message, unsubscribe), so a local stand-in can replace Redis.
+    """
+
+    def __init__(self, client: Any = None, url: Optional[str] = None, channel: Optional[str] = None) -> None:
+        """Initialize the transport.
+
+        Args:
+            client: A redis.asyncio-compatible client (created from url when None)
+            url: Redis URL, e.g. redis://localhost:6379/0
+            channel: Pub/sub channel name
+
+        Raises:
+            RuntimeError: If no client is given and the redis package is missing
+        """
+        if client is None:
+            if not REDIS_AVAILABLE:
+                raise RuntimeError("The redis package is required for CONFIG_BROADCAST=redis")
+            client = redis_asyncio.from_url(url or os.getenv("CONFIG_BROADCAST_REDIS_URL", "redis://localhost:6379/0"))
+        self.client = client
+        self.channel = channel or os.getenv("CONFIG_BROADCAST_CHANNEL", "agent-config-changes")
+        self._pubsub = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def publish(self, message: Dict[str, Any]) -> None:
+        await self.client.publish(self.channel, json.dumps(message))
+
+    async def start(self, handler: Handler) -> None:
+        self._pubsub = self.client.pubsub()
+        await self._pubsub.subscribe(self.channel)
+        self._task = asyncio.create_task(self._listen(handler))
+
+    async def _listen(self, handler: Handler) -> None:
+        while True:
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.warning(f"Config broadcast receive failed, retrying: {e}")
+                await asyncio.sleep(1.0)
+                continue
+            if message is None or message.get("type") != "message":
+                continue
+            data = message["data"]
+            try:
+                await handler(json.loads(data.decode("utf-8") if isinstance(data, bytes) else data))
+            except Exception as e:
+                logging.warning(f"Config broadcast handler failed: {e}")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._pubsub is not None:
+            await self._pubsub.unsubscribe(self.channel)
+            self._pubsub = None
+
+
+def create_broadcast_transport(backend: Optional[str] = None) -> Optional[BroadcastTransport]:
+    """Create the transport selected by CONFIG_BROADCAST ("none", "memory" or "redis").
+
+    Args:
+        backend: Backend name (defaults to CONFIG_BROADCAST, then "none")
+
+    Returns:
+        The transport, or None when broadcasting is disabled
+    """
+    backend = (backend or os.getenv("CONFIG_BROADCAST", "none")).lower()
+    if backend == "redis":
+        if not REDIS_AVAILABLE:
+            logging.warning("CONFIG_BROADCAST=redis but the redis package is not installed, broadcast disabled")
+            return None
+        return RedisTransport()
+    if backend == "memory":
+        return InProcessTransport()
+    if backend != "none":
+        logging.warning(f"Unknown CONFIG_BROADCAST '{backend}', broadcast disabled")
+    return None
+
+
+class ConfigBroadcaster:
+    """Publishes agent config changes and applies the ones of other replicas.
+
+    A message carries the agent type, optionally its full new config and content
+    hash, the sending replica and the send time. Replicas ignore their own
+    messages; the apply handler decides how to bring the local state up to date.
+    """
+
+    def __init__(self, transport: Optional[BroadcastTransport], replica_id: Optional[str] = None) -> None:
+        """Initialize the broadcaster.
+
+        Args:
+            transport: The pub/sub transport (None disables broadcasting)
+            replica_id: Identifier of this replica (random when None)
+        """
+        self.transport = transport
+        self.replica_id = replica_id or os.getenv("REPLICA_ID") or uuid.uuid4().hex[:12]
+        self._apply: Optional[Handler] = None
+        self._counters = {"published": 0, "received": 0, "applied": 0, "own_ignored": 0, "errors": 0}
+        self._last_delay: Optional[float] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.transport is not None
+
+    async def start(self, apply: Handler) -> None:
+        """Subscribe and pass other replicas' changes to apply."""
+        self._apply = apply
+        if self.transport is not None:
+            await self.transport.start(self._receive)
+
+    async def stop(self) -> None:
+        if self.transport is not None:
+            await self.transport.stop()
+
+    async def publish_change(
+        self,
+        agent_type: Optional[str],
+        config: Optional[Dict[str, Any]] = None,
+        content_hash: Optional[str] = None,
+        reason: str = "update",
+    ) -> None:
+        """Tell the other replicas that an agent config (or all, when None) changed.
+
+        Never raises: a failed broadcast is logged and counted, the local change stands.
+        """
+        if self.transport is None:
+            return
+        message = {
+            "origin": self.replica_id,
+            "agent_type": agent_type,
+            "config": config,
+            "content_hash": content_hash,
+            "reason": reason,
+            "sent_at": time.time(),
+        }
+        try:
+            await self.transport.publish(message)
+            self._counters["published"] += 1
+        except Exception as e:
+            self._counters["errors"] += 1
+            logging.warning(f"Config broadcast publish failed: {e}")
+
+    async def _receive(self, message: Dict[str, Any]) -> None:
+        if message.get("origin") == self.replica_id:
+            self._counters["own_ignored"] += 1
+            return
+        self._counters["received"] += 1
+        sent_at = message.get("sent_at")
+        if isinstance(sent_at, (int, float)):
+            self._last_delay = max(0.0, time.time() - sent_at)
+        if self._apply is None:
+            return
+        try:
+            await self._apply(message)
+            self._counters["applied"] += 1
+        except Exception as e:
+            self._counters["errors"] += 1
+            logging.warning(f"Applying config change from {message.get('origin')} failed: {e}")
+
+    def stats(self) -> dict:
+        """Return publish/receive counts and the last propagation delay."""
+        return {
+            "enabled": self.enabled,
+            "transport": type(self.transport).__name__ if self.transport is not None else None,
+            "replica_id": self.replica_id,
+            **self._counters,
+            "last_propagation_seconds": round(self._last_delay, 4) if self._last_delay is not None else None,
+        }
@@ -0,0 +1,233 @@
+"""Async Directus agent config cache with background conditional refresh."""
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from agent_config.snapshot import content_hash
+
+# Directus system fields that are not part of an agent config
+DIRECTUS_META_FIELDS = ("id", "status", "sort", "user_created", "date_created", "user_updated", "date_updated")
+
+
+@dataclass
+class DirectusFetchResult:
+    """Outcome of a conditional fetch: configs is None when not modified."""
+
+    configs: Optional[Dict[str, dict]]
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def not_modified(self) -> bool:
+        return self.configs is None
+
+
+Fetcher = Callable[[Optional[str], Optional[str]], Awaitable[DirectusFetchResult]]
+
+
+def items_to_configs(items: List[dict]) -> Dict[str, dict]:
+    """Turn Directus collection items into agent configs keyed by agent type.
+
+    Items need an agent_type (or key) plus name and prompt; archived and
+    incomplete items are skipped.
+    """
+    configs: Dict[str, dict] = {}
+    for item in items:
+        agent_type = item.get("agent_type") or item.get("key")
+        if not agent_type or item.get("status") == "archived":
+            continue
+        if not item.get("name") or not item.get("prompt"):
+            logging.warning(f"Directus agent '{agent_type}' has no name or prompt, skipping")
+            continue
+        configs[agent_type] = {
+            key: value
+            for key, value in item.items()
+            if key not in DIRECTUS_META_FIELDS and key not in ("agent_type", "key") and value is not None
+        }
+    return configs
+
+
+class DirectusHttpFetcher:
+    """Fetches the agent collection with If-None-Match / If-Modified-Since."""
+
+    def __init__(self, base_url: str, collection: str, token: Optional[str] = None, timeout: float = 10.0) -> None:
+        """Initialize the fetcher.
+
+        Args:
+            base_url: Directus base URL
+            collection: Collection holding the agent configs
+            token: Optional static access token
+            timeout: Request timeout in seconds
+        """
+        self.url = f"{base_url.rstrip('/')}/items/{collection}"
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        self._client = httpx.AsyncClient(timeout=timeout, headers=headers)
+
+    async def __call__(self, etag: Optional[str], last_modified: Optional[str]) -> DirectusFetchResult:
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        response = await self._client.get(self.url, params={"limit": -1}, headers=headers)
+        if response.status_code == 304:
+            return DirectusFetchResult(None, etag, last_modified)
+        response.raise_for_status()
+        return DirectusFetchResult(
+            items_to_configs(response.json().get("data", [])),
+            response.headers.get("etag"),
+            response.headers.get("last-modified"),
+        )
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+class DirectusConfigCache:
+    """Serves agent configs from memory and revalidates them in the background.
+
+    The first load happens at startup; after that a background task refreshes
+    every refresh_seconds with a conditional request, so request handlers never
+    wait on the CMS. When the CMS is down the last good configs keep being
+    served (stale-while-revalidate) and the refresh backs off; age and failure
+    counts are exposed through stats().
+    """
+
+    def __init__(
+        self,
+        fetch: Fetcher,
+        on_update: Optional[Callable[[Dict[str, dict]], None]] = None,
+        refresh_seconds: Optional[float] = None,
+        max_backoff_seconds: Optional[float] = None,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            fetch: Conditional fetch (etag, last_modified) -> DirectusFetchResult
+            on_update: Called with the configs whenever their content changes
+            refresh_seconds: Interval between background refreshes
+            max_backoff_seconds: Longest wait between refreshes while the CMS fails
+        """
+        self.fetch = fetch
+        self.on_update = on_update
+        self.refresh_seconds = refresh_seconds or float(os.getenv("DIRECTUS_REFRESH_SECONDS", "30"))
+        self.max_backoff_seconds = max_backoff_seconds or float(os.getenv("DIRECTUS_MAX_BACKOFF_SECONDS", "300"))
+        self._configs: Optional[Dict[str, dict]] = None
+        self._hash: Optional[str] = None
+        self._etag: Optional[str] = None
+        self._last_modified: Optional[str] = None
+        self._validated_at: Optional[float] = None
+        self._changed_at: Optional[float] = None
+        self._consecutive_failures = 0
+        self._last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._refresh_lock = asyncio.Lock()
+        self._counters = {"refreshes": 0, "not_modified": 0, "updates": 0, "failures": 0}
+
+    def configs(self) -> Optional[Dict[str, dict]]:
+        """The cached configs (possibly stale), or None before the first successful load."""
+        return self._configs
+
+    async def refresh(self) -> bool:
+        """Revalidate the configs now. Returns True on success; never raises."""
+        async with self._refresh_lock:
+            self._counters["refreshes"] += 1
+            try:
+                result = await self.fetch(self._etag, self._last_modified)
+            except Exception as e:
+                self._counters["failures"] += 1
+                self._consecutive_failures += 1
+                self._last_error = f"{type(e).__name__}: {e}"
+                logging.warning(
+                    f"Directus config refresh failed ({self._consecutive_failures}x), serving cached configs: {e}"
+                )
+                return False
+
+            if result.not_modified:
+                self._counters["not_modified"] += 1
+                self._mark_validated(result)
+                return True
+            new_hash = content_hash(result.configs)
+            if new_hash == self._hash:
+                # The CMS sent no validators but nothing changed
+                self._counters["not_modified"] += 1
+                self._mark_validated(result)
+                return True
+            if self.on_update is not None:
+                try:
+                    self.on_update(result.configs)
+                except Exception as e:
+                    # Nothing is committed, so the next refresh fetches and applies again
+                    self._counters["failures"] += 1
+                    self._consecutive_failures += 1
+                    self._last_error = f"{type(e).__name__}: {e}"
+                    logging.error(f"Applying Directus configs failed: {e}")
+                    return False
+            self._mark_validated(result)
+            self._configs, self._hash, self._changed_at = result.configs, new_hash, self._validated_at
+            self._counters["updates"] += 1
+            return True
+
+    def _mark_validated(self, result: DirectusFetchResult) -> None:
+        self._consecutive_failures = 0
+        self._validated_at = time.time()
+        self._etag = result.etag or self._etag
+        self._last_modified = result.last_modified or self._last_modified
+
+    def _next_delay(self) -> float:
+        if not self._consecutive_failures:
+            return self.refresh_seconds
+        return min(self.max_backoff_seconds, self.refresh_seconds * (2 ** self._consecutive_failures))
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._next_delay())
+            await self.refresh()
+
+    async def start(self, initial_timeout: float = 10.0) -> None:
+        """Load the configs once and start the background refresh."""
+        try:
+            await asyncio.wait_for(self.refresh(), timeout=initial_timeout)
+        except asyncio.TimeoutError:
+            self._counters["failures"] += 1
+            self._consecutive_failures += 1
+            self._last_error = "initial load timed out"
+            logging.warning("Directus initial config load timed out, using local configs until it succeeds")
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background refresh and close the fetcher."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        close = getattr(self.fetch, "close", None)
+        if close is not None:
+            await close()
+
+    def stats(self) -> dict:
+        """Return age, staleness and refresh/failure counts."""
+        now = time.time()
+        return {
+            **self._counters,
+            "loaded": self._configs is not None,
+            "agents": len(self._configs or {}),
+            "age_seconds": round(now - self._validated_at, 3) if self._validated_at else None,
+            "content_age_seconds": round(now - self._changed_at, 3) if self._changed_at else None,
+            "stale": self._consecutive_failures > 0,
+            "consecutive_failures": self._consecutive_failures,
+            "last_error": self._last_error,
+            "refresh_seconds": self.refresh_seconds,
+            "etag": self._etag,
+            "last_modified": self._last_modified,
+        }
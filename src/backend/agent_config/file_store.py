@@ -0,0 +1,218 @@
+"""File-backed agent configs shared by worker processes, reloaded through mtime polling."""
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, Mapping, Optional, Tuple
+
+from agent_config.snapshot import AgentConfigStore, content_hash
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+# (inode, size, mtime_ns): every atomic rename gives a new inode, so coarse mtimes are fine
+FileSignature = Tuple[int, int, int]
+
+
+class AgentConfigFile:
+    """Agent config overrides in a JSON file written with an atomic rename.
+
+    The file holds {"version": n, "updated_at": ts, "agents": {agent_type: config}}.
+    Writers take an exclusive lock on a sidecar .lock file for the
+    read-modify-write, so edits from different workers are not lost; readers
+    never see a partial file because it is replaced with os.replace.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initialize the file store.
+
+        Args:
+            path: Path of the JSON file (created on the first write)
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+
+    def signature(self) -> Optional[FileSignature]:
+        """A cheap change marker of the file, or None when it does not exist."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def load(self) -> Dict[str, Any]:
+        """Read the file; a missing file is an empty store.
+
+        Raises:
+            ValueError: If the file is not valid JSON or not shaped like the store
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {"version": 0, "agents": {}}
+        if not isinstance(data, dict):
+            raise ValueError("agent config file must hold a JSON object")
+        data.setdefault("version", 0)
+        data.setdefault("agents", {})
+        if not isinstance(data["agents"], dict):
+            raise ValueError('"agents" must map agent types to configs')
+        for agent_type, config in data["agents"].items():
+            if not isinstance(config, dict):
+                raise ValueError(f"config of agent {agent_type} must be a JSON object")
+        return data
+
+    def agents(self) -> Dict[str, dict]:
+        """The agent configs in the file."""
+        return self.load()["agents"]
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        with self._lock, open(f"{self.path}.lock", "a") as lock_file:
+            if FCNTL_AVAILABLE:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if FCNTL_AVAILABLE:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def save_agent(self, agent_type: str, config: Mapping[str, Any]) -> int:
+        """Write one agent's config, keeping the others. Returns the new file version."""
+        with self._exclusive():
+            data = self.load()
+            if content_hash(data["agents"].get(agent_type)) == content_hash(config):
+                return data["version"]
+            data["agents"][agent_type] = dict(config)
+            data["version"] += 1
+            data["updated_at"] = time.time()
+            self._write(data)
+            return data["version"]
+
+    def _write(self, data: Dict[str, Any]) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".agent-configs-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+class AgentConfigFileWatcher:
+    """Polls an AgentConfigFile's mtime and swaps changed agents into the store.
+
+    A poll is one os.stat; the file is only parsed when its signature changed,
+    and only agents whose content hash differs from the current snapshot are
+    swapped in (so unchanged agents keep their compiled templates and caches).
+    Agents configured by a higher-precedence source (Directus) are left alone.
+    """
+
+    def __init__(
+        self,
+        config_file: AgentConfigFile,
+        store: AgentConfigStore,
+        poll_seconds: Optional[float] = None,
+        overridden: Optional[Callable[[], Iterable[str]]] = None,
+    ) -> None:
+        """Initialize the watcher.
+
+        Args:
+            config_file: The file to watch
+            store: The store that receives changed agents
+            poll_seconds: Interval between mtime checks
+            overridden: Returns the agent types whose file config must not be applied
+        """
+        self.config_file = config_file
+        self.store = store
+        self.overridden = overridden
+        self.poll_seconds = poll_seconds or float(os.getenv("AGENT_CONFIG_POLL_SECONDS", "2"))
+        self._signature: Optional[FileSignature] = None
+        self._task: Optional[asyncio.Task] = None
+        self._file_version = 0
+        self._last_error: Optional[str] = None
+        self._counters = {"polls": 0, "reloads": 0, "agents_reloaded": 0, "failures": 0}
+
+    def poll(self) -> int:
+        """Reload the file if it changed. Returns the number of agents swapped in; never raises."""
+        self._counters["polls"] += 1
+        try:
+            signature = self.config_file.signature()
+            if signature is None or signature == self._signature:
+                return 0
+            # A broken file is retried only after it changes again
+            self._signature = signature
+            data = self.config_file.load()
+            current = self.store.snapshot()
+            overridden = set(self.overridden()) if self.overridden is not None else set()
+            changed = {
+                agent_type: config
+                for agent_type, config in data["agents"].items()
+                if agent_type not in overridden
+                and getattr(current.agents.get(agent_type), "content_hash", None) != content_hash(config)
+            }
+            # Compiling the configs can fail too; the current snapshot then stays in place
+            if changed:
+                self.store.set_agents(changed)
+        except Exception as e:
+            self._counters["failures"] += 1
+            self._last_error = f"{type(e).__name__}: {e}"
+            logging.warning(f"Reloading agent config file {self.config_file.path} failed: {e}")
+            return 0
+
+        self._file_version = data["version"]
+        self._last_error = None
+        self._counters["reloads"] += 1
+        if changed:
+            self._counters["agents_reloaded"] += len(changed)
+            logging.info(f"Reloaded agent configs from {self.config_file.path}: {sorted(changed)}")
+        return len(changed)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            try:
+                self.poll()
+            except Exception as e:
+                # Hot reload must outlive any single bad poll
+                logging.warning(f"Polling agent config file {self.config_file.path} failed: {e}")
+
+    def start(self) -> None:
+        """Apply the file now and start polling it."""
+        self.poll()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        """Return the file path and version plus poll/reload counts."""
+        return {
+            **self._counters,
+            "path": self.config_file.path,
+            "file_version": self._file_version,
+            "poll_seconds": self.poll_seconds,
+            "last_error": self._last_error,
+        }
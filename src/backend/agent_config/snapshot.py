@@ -0,0 +1,218 @@
+"""Immutable, versioned agent configuration snapshots swapped atomically by writers."""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional
+
+from agent_config.templates import AgentPromptParts, PromptTemplate
+
+
+def content_hash(value: Any) -> str:
+    """Stable short hash of a JSON-serializable value (same as ResponseCache.config_hash)."""
+    serialized = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()[:16]
+
+
+class FrozenDict(dict):
+    """A dict that cannot be changed after construction.
+
+    It stays a real dict so json.dumps, FastAPI responses and .get() work as
+    before; nested dicts and lists are frozen as FrozenDict and tuples.
+    """
+
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError(f"{type(self).__name__} is immutable; update it through the config store")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __copy__(self) -> "FrozenDict":
+        return self
+
+    def __deepcopy__(self, memo) -> "FrozenDict":
+        return self
+
+
+def freeze(value: Any) -> Any:
+    """Recursively convert dicts to FrozenDict and lists to tuples."""
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Recursively convert a frozen value back to plain dicts and lists."""
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    return value
+
+
+class AgentConfig(FrozenDict):
+    """One agent's frozen configuration with its content hash and compiled prompt template."""
+
+    __slots__ = ("content_hash", "template")
+
+    def __init__(self, config: Mapping[str, Any]) -> None:
+        super().__init__((key, freeze(value)) for key, value in config.items())
+        self.content_hash = content_hash(self)
+        self.template = PromptTemplate.compile(self)
+
+    @property
+    def prompt_parts(self) -> AgentPromptParts:
+        return self.template.parts
+
+
+@dataclass(frozen=True)
+class AgentConfigSnapshot:
+    """A consistent, immutable view of every agent configuration."""
+
+    version: int
+    agents: Mapping[str, AgentConfig]
+    content_hash: str
+    source: str
+    created_at: float
+
+    @classmethod
+    def build(cls, configs: Mapping[str, Mapping[str, Any]], version: int, source: str) -> "AgentConfigSnapshot":
+        agents = FrozenDict(
+            (agent_type, config if isinstance(config, AgentConfig) else AgentConfig(config))
+            for agent_type, config in configs.items()
+        )
+        snapshot_hash = content_hash({agent_type: config.content_hash for agent_type, config in agents.items()})
+        return cls(version, agents, snapshot_hash, source, time.time())
+
+    def __contains__(self, agent_type: str) -> bool:
+        return agent_type in self.agents
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.agents)
+
+    def __len__(self) -> int:
+        return len(self.agents)
+
+    def get(self, agent_type: str, default: Optional[str] = "generic") -> Optional[AgentConfig]:
+        """Return an agent's config, or the default agent's config when unknown."""
+        config = self.agents.get(agent_type)
+        if config is None and default is not None:
+            return self.agents.get(default)
+        return config
+
+    def changed_agents(self, other: "AgentConfigSnapshot") -> List[str]:
+        """Agent types whose config differs between this snapshot and other."""
+        agent_types = set(self.agents) | set(other.agents)
+        return sorted(
+            agent_type
+            for agent_type in agent_types
+            if getattr(self.agents.get(agent_type), "content_hash", None)
+            != getattr(other.agents.get(agent_type), "content_hash", None)
+        )
+
+    def to_dict(self) -> Dict[str, dict]:
+        """Plain (mutable) copy of the configs."""
+        return thaw(self.agents)
+
+
+Listener = Callable[[AgentConfigSnapshot, AgentConfigSnapshot], None]
+
+
+class AgentConfigStore:
+    """Holds the current AgentConfigSnapshot.
+
+    Readers call snapshot() (or get()) and use the returned object for as long as
+    they need a consistent view; reading the reference needs no lock. Writers
+    build a new snapshot from the current one and swap the reference, serialized
+    by a lock so concurrent updates are not lost. Listeners are told about every
+    swap, e.g. to drop caches of the agents that changed.
+    """
+
+    def __init__(self, configs: Mapping[str, Mapping[str, Any]], source: str = "local_config") -> None:
+        """Initialize the store with the first snapshot.
+
+        Args:
+            configs: Agent configs by agent type
+            source: Where the configs came from
+        """
+        self._snapshot = AgentConfigSnapshot.build(configs, version=1, source=source)
+        self._write_lock = threading.Lock()
+        self._listeners: List[Listener] = []
+        self._swaps = 0
+
+    def snapshot(self) -> AgentConfigSnapshot:
+        """Return the current snapshot."""
+        return self._snapshot
+
+    def get(self, agent_type: str) -> AgentConfig:
+        """Return an agent's config from the current snapshot (generic when unknown)."""
+        return self._snapshot.get(agent_type)
+
+    def add_listener(self, listener: Listener) -> None:
+        """Call listener(old, new) after every snapshot swap."""
+        self._listeners.append(listener)
+
+    def replace(self, configs: Mapping[str, Mapping[str, Any]], source: Optional[str] = None) -> AgentConfigSnapshot:
+        """Swap in a snapshot with the given configs (no-op when nothing changed)."""
+        return self._swap(lambda current: dict(configs), source)
+
+    def update_agent(self, agent_type: str, changes: Mapping[str, Any]) -> AgentConfig:
+        """Swap in a snapshot where one agent's config is merged with changes.
+
+        Raises:
+            KeyError: If the agent type is unknown
+        """
+        def apply(current: AgentConfigSnapshot) -> Dict[str, Mapping[str, Any]]:
+            if agent_type not in current:
+                raise KeyError(agent_type)
+            configs: Dict[str, Mapping[str, Any]] = dict(current.agents)
+            configs[agent_type] = {**current.agents[agent_type], **changes}
+            return configs
+
+        return self._swap(apply).agents[agent_type]
+
+    def set_agent(self, agent_type: str, config: Mapping[str, Any]) -> AgentConfig:
+        """Swap in a snapshot where one agent's config is replaced (or added)."""
+        return self.set_agents({agent_type: config}).agents[agent_type]
+
+    def set_agents(self, configs: Mapping[str, Mapping[str, Any]], source: Optional[str] = None) -> AgentConfigSnapshot:
+        """Swap in a snapshot where the given agents' configs are replaced (or added)."""
+        return self._swap(lambda current: {**current.agents, **configs}, source)
+
+    def _swap(
+        self,
+        apply: Callable[[AgentConfigSnapshot], Mapping[str, Mapping[str, Any]]],
+        source: Optional[str] = None,
+    ) -> AgentConfigSnapshot:
+        with self._write_lock:
+            old = self._snapshot
+            candidate = AgentConfigSnapshot.build(apply(old), old.version + 1, source or old.source)
+            if candidate.content_hash == old.content_hash and candidate.source == old.source:
+                return old
+            self._snapshot = candidate
+            self._swaps += 1
+        for listener in self._listeners:
+            try:
+                listener(old, candidate)
+            except Exception as e:
+                logging.warning(f"Agent config listener failed: {e}")
+        return candidate
+
+    def stats(self) -> dict:
+        """Return the current version, hash, source and number of swaps."""
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version,
+            "content_hash": snapshot.content_hash,
+            "source": snapshot.source,
+            "agents": len(snapshot),
+            "swaps": self._swaps,
+            "age_seconds": round(time.time() - snapshot.created_at, 3),
+        }
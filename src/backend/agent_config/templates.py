@@ -0,0 +1,110 @@
+"""Agent prompt templates compiled once per agent config version."""
+
+import string
+from dataclasses import dataclass
+from typing import Any, Mapping, NamedTuple, Optional, Tuple
+
+# Guidance appended to every agent prompt, by response format and language
+FORMAT_GUIDANCE = {
+    "markdown": "\n\nFormatteer je antwoord in duidelijke Markdown met headers en bullet points.",
+    "json": "\n\nGeef je antwoord terug als gestructureerd JSON object.",
+}
+LANGUAGE_NAMES = {"en": "English", "fr": "French", "de": "German"}
+
+# Stands in for the query in the agent prompt when the scenario is sent separately
+SCENARIO_REFERENCE = "het Scenario in het gebruikersbericht"
+
+
+class AgentPromptParts(NamedTuple):
+    """The static pieces of an agent prompt around the query."""
+
+    system_part: str
+    prompt: str
+    suffix: str
+
+
+def build_prompt_parts(config: Mapping[str, Any]) -> AgentPromptParts:
+    """Precompute the system prompt, the main prompt template and the guidance suffix."""
+    system_part = config.get("system_prompt", "")
+    if system_part:
+        system_part += "\n\n"
+
+    suffix = ""
+    instructions = config.get("instructions", "")
+    if instructions:
+        suffix += f"\n\nSpecifieke instructies: {instructions}"
+    capabilities = config.get("capabilities", [])
+    if capabilities:
+        suffix += f"\n\nJe hebt toegang tot deze capabilities: {', '.join(capabilities)}"
+    suffix += FORMAT_GUIDANCE.get(config.get("response_format", "markdown"), "")
+    language = config.get("language", "nl")
+    if language != "nl":
+        suffix += f"\n\nAntwoord in het {LANGUAGE_NAMES.get(language, language)}."
+    return AgentPromptParts(system_part, config["prompt"], suffix)
+
+
+def _split_on_query(prompt: str) -> Optional[Tuple[str, ...]]:
+    """Literal text between the {query} fields of a str.format template.
+
+    Returns None when the template uses other fields, a format spec or a
+    conversion; those keep going through str.format.
+    """
+    segments = [""]
+    try:
+        for literal, field_name, format_spec, conversion in string.Formatter().parse(prompt):
+            segments[-1] += literal
+            if field_name is None:
+                continue
+            if field_name != "query" or format_spec or conversion:
+                return None
+            segments.append("")
+    except ValueError:
+        return None
+    return tuple(segments)
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """A fully assembled agent prompt, split around its {query} fields.
+
+    Rendering joins the literal segments with the query, which gives the same
+    text as format_agent_prompt's str.format plus concatenations. The prefix
+    (the prompt with SCENARIO_REFERENCE) is rendered once at compile time.
+    """
+
+    segments: Optional[Tuple[str, ...]]
+    parts: AgentPromptParts
+    prefix: str
+
+    @classmethod
+    def compile(cls, config: Mapping[str, Any]) -> "PromptTemplate":
+        """Compile an agent config into a template."""
+        parts = build_prompt_parts(config)
+        segments = _split_on_query(parts.prompt)
+        if segments is not None:
+            segments = list(segments)
+            segments[0] = parts.system_part + segments[0]
+            segments[-1] += parts.suffix
+            segments = tuple(segments)
+        try:
+            prefix = _render(segments, parts, SCENARIO_REFERENCE)
+        except (KeyError, IndexError, ValueError):
+            # Unsupported fields fail when rendered, as str.format did
+            prefix = ""
+        return cls(segments, parts, prefix)
+
+    def render(self, query: str) -> str:
+        """Return the agent prompt for a query."""
+        return _render(self.segments, self.parts, query)
+
+
+def _render(segments: Optional[Tuple[str, ...]], parts: AgentPromptParts, query: str) -> str:
+    if segments is None:
+        return parts.system_part + parts.prompt.format(query=query) + parts.suffix
+    return query.join(segments)
+
+
+def template_for(config: Mapping[str, Any]) -> PromptTemplate:
+    """The compiled template of a snapshot config, or a freshly compiled one."""
+    template = getattr(config, "template", None)
+    return template if template is not None else PromptTemplate.compile(config)
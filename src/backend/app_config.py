@@ -42,6 +42,8 @@ class AppConfig:
         self.AZURE_OPENAI_SCOPES = [
             f"{self._get_optional('AZURE_OPENAI_SCOPE', 'https://cognitiveservices.azure.com/.default')}"
         ]
+        # Optional JSON list of endpoint/deployment/key entries to load balance over
+        self.AZURE_OPENAI_DEPLOYMENTS = self._get_optional("AZURE_OPENAI_DEPLOYMENTS")
 
         # Frontend settings
         self.FRONTEND_SITE_NAME = self._get_optional(
@@ -223,10 +225,15 @@ class AppConfig:
         kernel = Kernel()
         return kernel
 
-    def get_azure_openai_client(self):
-        """Create and return a direct AsyncAzureOpenAI client.
+    def get_azure_openai_client(self, deployment: Optional[str] = None):
+        """Return the pooled AsyncAzureOpenAI client for a deployment.
         
         This bypasses AIProjectClient and uses direct Azure OpenAI authentication.
+        Clients come from the process-wide registry, so repeated calls share one
+        keep-alive connection pool. Do not close the returned client.
+
+        Args:
+            deployment: Optional deployment name (defaults to AZURE_OPENAI_DEPLOYMENT_NAME)
 
         Returns:
             AsyncAzureOpenAI client instance
@@ -235,21 +242,32 @@ class AppConfig:
             if not self.AZURE_OPENAI_API_KEY:
                 raise ValueError("AZURE_OPENAI_API_KEY is required for Azure OpenAI client")
                 
-            from openai import AsyncAzureOpenAI
+            from llm.client_registry import client_registry
             
-            client = AsyncAzureOpenAI(
+            return client_registry.get_client(
+                endpoint=self.AZURE_OPENAI_ENDPOINT,
+                deployment=deployment or self.AZURE_OPENAI_DEPLOYMENT_NAME,
                 api_key=self.AZURE_OPENAI_API_KEY,
                 api_version=self.AZURE_OPENAI_API_VERSION,
-                azure_endpoint=self.AZURE_OPENAI_ENDPOINT
             )
             
-            logging.info("Created direct AsyncAzureOpenAI client with API key")
-            return client
-            
         except Exception as exc:
             logging.error("Failed to create AsyncAzureOpenAI client: %s", exc)
             raise
 
+    def get_deployment_router(self):
+        """Return the router that balances calls over the configured deployments.
+
+        Targets come from AZURE_OPENAI_DEPLOYMENTS, or the single
+        AZURE_OPENAI_ENDPOINT / AZURE_OPENAI_DEPLOYMENT_NAME when it is not set.
+
+        Returns:
+            The process-wide DeploymentRouter
+        """
+        from llm.deployment_router import deployment_router
+
+        return deployment_router
+
     def get_ai_project_client(self):
         """Create and return an AIProjectClient for Azure AI Foundry.
         
@@ -1,10 +1,15 @@
 import sys
 import os
 import asyncio
+import json
+import hmac
 import logging
+import time
 import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager, nullcontext
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
 
 # Add current directory to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -12,13 +17,16 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 # FastAPI imports
 from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, ValidationError
 
 # Create minimal fallback classes
 class InputTask(BaseModel):
     session_id: str
     description: str
     selected_agents: Optional[List[str]] = None  # List of selected agent expertise types
+    mode: Optional[str] = None  # "fanout" (one call per agent) or "consolidated" (one call for all)
+    auto_select_agents: Optional[bool] = None  # Route to the relevant agents when none are selected
 
 class HumanFeedback(BaseModel):
     session_id: str
@@ -39,13 +47,59 @@ except ImportError:
     HEALTH_CHECK_AVAILABLE = False
     print("Warning: HealthCheckMiddleware not available, skipping")
 
-# Try Azure OpenAI import
+# Try Azure OpenAI import - all LLM calls go through the pooled client registry
 try:
-    from openai import AzureOpenAI
+    from llm.client_registry import client_registry
     AZURE_OPENAI_AVAILABLE = True
 except ImportError:
     AZURE_OPENAI_AVAILABLE = False
 
+from agent_config.broadcast import ConfigBroadcaster, create_broadcast_transport
+from agent_config.directus_cache import DirectusConfigCache, DirectusHttpFetcher
+from agent_config.file_store import AgentConfigFile, AgentConfigFileWatcher
+from agent_config.snapshot import AgentConfigStore, thaw
+from agent_config.templates import SCENARIO_REFERENCE, template_for
+from context.identity_map import identity_map_stats, identity_scope
+from llm.deployment_router import DeploymentTarget, deployment_router
+from llm.hedging import hedged_requests
+from llm.model_cascade import (
+    add_confidence_instruction,
+    estimate_complexity,
+    model_cascade,
+    split_confidence,
+)
+from llm.prompt_cache_stats import prompt_cache_stats
+from llm.rate_limiter import completion_usage_tokens, estimate_tokens, rate_limiter
+from llm.response_cache import response_cache
+from llm.semantic_cache import semantic_cache
+from llm.single_flight import SingleFlight, completion_flights
+from middleware.identity_map import IdentityMapMiddleware
+from task_processing.agent_router import AgentRouter, AgentSelection
+from task_processing.batch import (
+    BatchParseError,
+    DuplexStreamingResponse,
+    iter_json_items,
+    run_bounded,
+)
+from task_processing.job_queue import JobManager, create_job_store
+
+# Hedge slow specialist calls to a second deployment of the same model
+HEDGING_ENABLED = os.getenv("HEDGING_ENABLED", "false").lower() in ["true", "1"]
+
+# Prompt layout: "inline" puts the scenario inside the system prompt, "prefix"
+# keeps the system prompt static per agent so the service can cache it
+PROMPT_LAYOUT = os.getenv("PROMPT_LAYOUT", "inline")
+
+# Exact-match response cache in front of generate_ai_response
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() in ["true", "1"]
+
+# Semantic response cache - needs an embedding deployment
+EMBEDDING_DEPLOYMENT = os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT", "")
+SEMANTIC_CACHE_ENABLED = (
+    bool(EMBEDDING_DEPLOYMENT)
+    and os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() in ["true", "1"]
+)
+
 # Try Directus integration import
 try:
     from directus_integration import directus_manager
@@ -157,6 +211,16 @@ except Exception as e:
     print(f"Error during imports: {e}")
     DEPENDENCIES_AVAILABLE = False
 
+# Process-wide Cosmos DB client and container handles shared by all memory contexts
+try:
+    from context.cosmos_registry import cosmos_registry
+    from context.read_cache import memory_read_caches
+    from context.request_charges import request_charges
+    COSMOS_REGISTRY_AVAILABLE = True
+except Exception as e:
+    logging.warning(f"Cosmos DB registry not available: {e}")
+    COSMOS_REGISTRY_AVAILABLE = False
+
 # Try to import optional dependencies - these might fail in Azure
 def get_authenticated_user_details(request_headers):
     return {"user_principal_id": "anonymous_user"}
@@ -164,6 +228,293 @@ def get_authenticated_user_details(request_headers):
 def track_event_if_configured(event_name, properties=None):
     pass
 
+def agent_model_settings(agent_type: str) -> Tuple[str, float]:
+    """Model (deployment) and temperature an agent's calls use"""
+    agent_config = get_agent_config(agent_type)
+    deployment_name = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4o")
+    return agent_config.get("model_override") or deployment_name, agent_config.get("temperature", 0.7)
+
+def prepare_agent_completion(agent_type: str, user_query: str) -> Dict[str, Any]:
+    """Build the chat completion arguments for an agent call"""
+    # Check environment variables
+    openai_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
+    openai_api_key = os.getenv("AZURE_OPENAI_API_KEY") 
+    deployment_name = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4o")
+    
+    logger.info(f"Environment Check:")
+    logger.info(f"- Endpoint: {openai_endpoint}")
+    logger.info(f"- API Key: {'***' + openai_api_key[-10:] if openai_api_key else 'MISSING'}")
+    logger.info(f"- Deployment: {deployment_name}")
+    
+    # Get agent configuration for advanced settings
+    agent_config = get_agent_config(agent_type)
+    
+    # Use model override if specified
+    model_name, temperature = agent_model_settings(agent_type)
+    max_tokens = agent_config.get("max_tokens", 800)
+    
+    # Routed models carry their own endpoints and keys
+    if not deployment_router.candidates(model_name) and (not openai_endpoint or not openai_api_key):
+        logger.error("Missing OpenAI credentials - using fallback")
+        raise Exception("Missing OpenAI credentials")
+    
+    logger.info(f"Using model: {model_name}, temp: {temperature}, max_tokens: {max_tokens}")
+    
+    return {
+        "model": model_name,
+        "messages": agent_prompt_messages(agent_type, user_query),
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+    }
+
+def completion_token_estimate(request_args: Dict[str, Any]) -> int:
+    """Estimated TPM cost of a chat completion request"""
+    prompt_text = "".join(message["content"] for message in request_args["messages"])
+    return estimate_tokens(prompt_text, request_args.get("max_tokens", 0))
+
+async def create_chat_completion(
+    request_args: Dict[str, Any],
+    stream: bool = False,
+    avoid: Optional[List[DeploymentTarget]] = None,
+    on_target: Optional[Callable[[DeploymentTarget], None]] = None,
+    usage_key: Optional[str] = None,
+):
+    """Send a chat completion through the deployment router.
+
+    The request goes to the least loaded healthy deployment serving its model and
+    fails over on 429/5xx. Models without routed deployments (e.g. a model_override
+    that is not in AZURE_OPENAI_DEPLOYMENTS) use the default endpoint. Either way
+    the call waits for rate limit budget; for streams only the start is retried.
+    avoid and on_target are passed to the router (used for hedging). The prompt
+    token usage of non-streamed calls is recorded under usage_key; streams end
+    with a usage chunk that their consumer records.
+    """
+    estimated_tokens = completion_token_estimate(request_args)
+    usage_tokens = None if stream else completion_usage_tokens
+    
+    def send(endpoint: str, deployment: str, api_key: Optional[str], api_version: str):
+        # Pooled async client per endpoint/deployment - no per-call TLS setup
+        client = client_registry.get_client(
+            endpoint=endpoint,
+            deployment=deployment,
+            api_key=api_key,
+            api_version=api_version,
+        )
+        args = {**request_args, "model": deployment}
+        if stream:
+            # Ask for a final usage chunk so streamed calls report (cached) prompt tokens
+            return client.chat.completions.create(**args, stream=True, stream_options={"include_usage": True})
+        return client.chat.completions.create(**args)
+    
+    if deployment_router.candidates(request_args["model"]):
+        response = await deployment_router.call(
+            request_args["model"],
+            estimated_tokens,
+            lambda target: send(target.endpoint, target.deployment, target.api_key, target.api_version),
+            usage_tokens=usage_tokens,
+            avoid=avoid,
+            on_target=on_target,
+        )
+    else:
+        response = await rate_limiter.call(
+            request_args["model"],
+            estimated_tokens,
+            lambda: send(
+                os.getenv("AZURE_OPENAI_ENDPOINT"),
+                request_args["model"],
+                os.getenv("AZURE_OPENAI_API_KEY"),
+                os.getenv("AZURE_OPENAI_API_VERSION", "2024-08-01-preview"),
+            ),
+            usage_tokens=usage_tokens,
+        )
+    if not stream:
+        prompt_cache_stats.record(usage_key or request_args["model"], getattr(response, "usage", None))
+    return response
+
+async def complete_agent_request(
+    agent_type: str,
+    request_args: Dict[str, Any],
+    on_usage: Optional[Callable[[Any], None]] = None,
+) -> str:
+    """Run a chat completion and return its text, hedged when HEDGING_ENABLED.
+
+    A hedged call streams so the time to first token is visible. If the primary
+    has no first token within the adaptive delay, a duplicate goes to another
+    deployment of the same model; the first to finish wins. on_usage receives
+    the usage of the call when the service reports it.
+    """
+    model = request_args["model"]
+    usage_key = f"{agent_type}:{agent_prompt_layout(agent_type)}"
+    if not HEDGING_ENABLED:
+        response = await create_chat_completion(request_args, usage_key=usage_key)
+        if on_usage is not None and getattr(response, "usage", None) is not None:
+            on_usage(response.usage)
+        return response.choices[0].message.content.strip()
+
+    used_targets: List[DeploymentTarget] = []
+
+    async def attempt(index: int, on_first_token) -> str:
+        stream = await create_chat_completion(
+            request_args,
+            stream=True,
+            avoid=used_targets if index > 0 else None,
+            on_target=used_targets.append,
+        )
+        parts: List[str] = []
+        try:
+            async for chunk in stream:
+                # Only reported in streams when the service includes usage
+                if getattr(chunk, "usage", None) is not None:
+                    prompt_cache_stats.record(usage_key, chunk.usage)
+                    if on_usage is not None:
+                        on_usage(chunk.usage)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    on_first_token()
+                    parts.append(delta)
+        finally:
+            # Release the connection when this attempt loses the race
+            await stream.close()
+        return "".join(parts).strip()
+
+    return await hedged_requests.run(
+        f"{agent_type}:{model}",
+        attempt,
+        can_hedge=len(deployment_router.candidates(model)) > 1,
+    )
+
+async def complete_cascade_tier(agent_type: str, tier: str, request_args: Dict[str, Any]) -> str:
+    """Run one tier of the model cascade and record its latency, tokens and cost"""
+    usages: List[Any] = []
+    started = time.monotonic()
+    try:
+        text = await complete_agent_request(agent_type, request_args, on_usage=usages.append)
+    except Exception:
+        model_cascade.record_failure(tier)
+        raise
+    record_cascade_call(tier, request_args, time.monotonic() - started, usages[-1] if usages else None, text)
+    return text
+
+def record_cascade_call(tier: str, request_args: Dict[str, Any], seconds: float, usage: Any, text: str) -> None:
+    """Record a cascade tier call with the reported usage, or estimates when there is none"""
+    prompt_tokens = getattr(usage, "prompt_tokens", None)
+    completion_tokens = getattr(usage, "completion_tokens", None)
+    model_cascade.record(
+        tier,
+        request_args["model"],
+        seconds,
+        prompt_tokens if isinstance(prompt_tokens, int) else completion_token_estimate({**request_args, "max_tokens": 0}),
+        completion_tokens if isinstance(completion_tokens, int) else estimate_tokens(text),
+    )
+
+async def complete_with_cascade(agent_type: str, user_query: str, request_args: Dict[str, Any]) -> str:
+    """Answer with the agent's small deployment first when it has a cascade policy.
+
+    Scenarios whose complexity estimate reaches the policy threshold go straight
+    to the large model. A small-tier answer escalates to the large model when it
+    fails or, with a confidence threshold, reports a confidence below it.
+    """
+    policy = model_cascade.policy_for(get_agent_config(agent_type), request_args["model"])
+    if policy is None:
+        return await complete_agent_request(agent_type, request_args)
+    
+    if model_cascade.choose(policy, estimate_complexity(user_query)) == "small":
+        small_args = {**request_args, "model": policy.small_model}
+        if policy.uses_confidence:
+            small_args["messages"] = add_confidence_instruction(request_args["messages"])
+        try:
+            answer, confidence = split_confidence(await complete_cascade_tier(agent_type, "small", small_args))
+            if model_cascade.accepts(policy, confidence):
+                return answer
+            logger.info(f"Cascade: {agent_type} confidence {confidence} too low, escalating to {policy.large_model}")
+        except Exception as e:
+            logger.warning(f"Cascade: small model {policy.small_model} failed for {agent_type}, escalating: {e!r}")
+    return await complete_cascade_tier(agent_type, "large", request_args)
+
+def ai_unavailable_response(agent_type: str, user_query: str, error: Exception) -> str:
+    """Clear fallback text that shows the AI service could not be reached"""
+    return f"""🤖 **{agent_type.upper()} AI Analyse**
+
+**Scenario:** {user_query}
+
+⚠️ **AI Service Tijdelijk Niet Beschikbaar**
+
+Voor dit scenario '{user_query}' zou normaal een gedetailleerde {agent_type} analyse verschijnen met:
+- Specifieke aanbevelingen voor jouw situatie
+- Concrete implementatie stappen  
+- Meetbare KPIs en success criteria
+
+**Tijdelijke fallback actief** - herstart de analyse voor volledige AI-powered inzichten.
+
+**Debug info:** {str(error)[:100]}"""
+
+def response_cache_key(agent_type: str, user_query: str) -> str:
+    """Cache key from agent type, effective agent config, model and normalized query"""
+    agent_config = get_agent_config(agent_type)
+    model_name = agent_config.get("model_override") or os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4o")
+    return response_cache.make_key(agent_type, agent_config, user_query, model=model_name)
+
+# Recent scenario embeddings, shared by all agents of a fan-out
+_query_embeddings: "OrderedDict[str, asyncio.Future]" = OrderedDict()
+_QUERY_EMBEDDINGS_MAX = 256
+
+async def get_query_embedding(user_query: str) -> List[float]:
+    """Embed a normalized scenario once, even when several agents ask concurrently"""
+    normalized = response_cache.normalize_query(user_query)
+    future = _query_embeddings.get(normalized)
+    if future is None:
+        async def embed() -> List[float]:
+            client = client_registry.get_client(
+                endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+                deployment=EMBEDDING_DEPLOYMENT,
+                api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+                api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-08-01-preview"),
+            )
+            # Embeddings share the deployment budget and 429 retries of the chat calls
+            response = await rate_limiter.call(
+                EMBEDDING_DEPLOYMENT,
+                estimate_tokens(normalized),
+                lambda: client.embeddings.create(model=EMBEDDING_DEPLOYMENT, input=normalized),
+                usage_tokens=completion_usage_tokens,
+            )
+            return response.data[0].embedding
+
+        future = asyncio.ensure_future(embed())
+        _query_embeddings[normalized] = future
+        while len(_query_embeddings) > _QUERY_EMBEDDINGS_MAX:
+            _query_embeddings.popitem(last=False)
+    else:
+        _query_embeddings.move_to_end(normalized)
+    try:
+        return await asyncio.shield(future)
+    except Exception:
+        # Do not keep failed embeddings around
+        if _query_embeddings.get(normalized) is future:
+            del _query_embeddings[normalized]
+        raise
+
+async def semantic_cache_lookup(agent_type: str, user_query: str):
+    """Return (answer, embedding) from the semantic cache; answer is None on a miss"""
+    try:
+        embedding = await get_query_embedding(user_query)
+    except Exception as e:
+        logger.warning(f"Semantic cache embedding failed, skipping: {e}")
+        return None, None
+    agent_config = get_agent_config(agent_type)
+    match = semantic_cache.lookup(
+        agent_type,
+        response_cache.config_hash(agent_config),
+        embedding,
+        threshold=agent_config.get("semantic_cache_threshold"),
+    )
+    if match is None:
+        return None, embedding
+    answer, similarity = match
+    logger.info(f"Semantic cache HIT for {agent_type} (similarity {similarity:.3f})")
+    return answer, embedding
+
 async def generate_ai_response(agent_type: str, user_query: str) -> str:
     """Generate AI response for specific agent type"""
     
@@ -173,57 +524,47 @@ async def generate_ai_response(agent_type: str, user_query: str) -> str:
     logger.info(f"User Query: {user_query}")
     logger.info(f"AZURE_OPENAI_AVAILABLE: {AZURE_OPENAI_AVAILABLE}")
     
-    # Check environment variables
-    openai_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-    openai_api_key = os.getenv("AZURE_OPENAI_API_KEY") 
-    deployment_name = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4o")
+    # Serve repeated scenarios from the response cache
+    cache_key = response_cache_key(agent_type, user_query) if RESPONSE_CACHE_ENABLED else None
+    if cache_key:
+        cached_result = response_cache.get(cache_key)
+        if cached_result is not None:
+            logger.info(f"Response cache HIT for {agent_type}")
+            return cached_result
     
-    logger.info(f"Environment Check:")
-    logger.info(f"- Endpoint: {openai_endpoint}")
-    logger.info(f"- API Key: {'***' + openai_api_key[-10:] if openai_api_key else 'MISSING'}")
-    logger.info(f"- Deployment: {deployment_name}")
+    # Near-duplicate scenarios are answered from the semantic cache
+    query_embedding = None
+    if SEMANTIC_CACHE_ENABLED:
+        semantic_result, query_embedding = await semantic_cache_lookup(agent_type, user_query)
+        if semantic_result is not None:
+            if cache_key:
+                response_cache.set(cache_key, agent_type, semantic_result)
+            return semantic_result
     
     # Force try Azure OpenAI even if flag is False
     try:
-        if not openai_endpoint or not openai_api_key:
-            logger.error("Missing OpenAI credentials - using fallback")
-            raise Exception("Missing OpenAI credentials")
-            
-        logger.info("Creating Azure OpenAI client...")
-        client = AzureOpenAI(
-            azure_endpoint=openai_endpoint,
-            api_key=openai_api_key,
-            api_version="2024-08-01-preview"
-        )
-        logger.info("Azure OpenAI client created successfully")
-        
-        # Use configurable agent prompts
-        agent_prompt = format_agent_prompt(agent_type, user_query)
-        
-        # Get agent configuration for advanced settings
-        agent_config = get_agent_config(agent_type)
-        
-        # Use model override if specified
-        model_name = agent_config.get("model_override") or deployment_name
-        temperature = agent_config.get("temperature", 0.7)
-        max_tokens = agent_config.get("max_tokens", 800)
-        
-        logger.info(f"Using model: {model_name}, temp: {temperature}, max_tokens: {max_tokens}")
+        request_args = prepare_agent_completion(agent_type, user_query)
         
         logger.info("Calling Azure OpenAI API...")
-        response = client.chat.completions.create(
-            model=model_name,
-            messages=[
-                {"role": "system", "content": agent_prompt},
-                {"role": "user", "content": f"Scenario: {user_query}"}
-            ],
-            max_tokens=max_tokens,
-            temperature=temperature
+        # Identical concurrent requests (retries, parallel users) share one call,
+        # which is routed, waits for deployment budget and is retried on 429s
+        ai_result = await completion_flights.do(
+            SingleFlight.make_key(agent_type, request_args),
+            lambda: complete_with_cascade(agent_type, user_query, request_args),
         )
         
-        ai_result = response.choices[0].message.content.strip()
         logger.info(f"Azure OpenAI SUCCESS! Response length: {len(ai_result)}")
         logger.info(f"Response preview: {ai_result[:100]}...")
+        # Only real AI answers are cached, never the fallback text
+        if cache_key:
+            response_cache.set(cache_key, agent_type, ai_result)
+        if query_embedding is not None:
+            semantic_cache.add(
+                agent_type,
+                response_cache.config_hash(get_agent_config(agent_type)),
+                query_embedding,
+                ai_result,
+            )
         return ai_result
         
     except Exception as e:
@@ -232,20 +573,60 @@ async def generate_ai_response(agent_type: str, user_query: str) -> str:
         logger.error(f"Full error: {str(e)}")
         
         # Return a clear fallback that shows we're using fallback
-        return f"""🤖 **{agent_type.upper()} AI Analyse**
-
-**Scenario:** {user_query}
-
-⚠️ **AI Service Tijdelijk Niet Beschikbaar**
-
-Voor dit scenario '{user_query}' zou normaal een gedetailleerde {agent_type} analyse verschijnen met:
-- Specifieke aanbevelingen voor jouw situatie
-- Concrete implementatie stappen  
-- Meetbare KPIs en success criteria
+        return ai_unavailable_response(agent_type, user_query, e)
 
-**Tijdelijke fallback actief** - herstart de analyse voor volledige AI-powered inzichten.
+async def stream_ai_response(agent_type: str, user_query: str) -> AsyncIterator[str]:
+    """Stream the AI response for an agent type as text deltas.
 
-**Debug info:** {str(e)[:100]}"""
+    Uses stream=True completions so the first tokens reach the caller while the
+    model is still writing. Raises if the call cannot be started.
+    """
+    logger.info(f"=== AI Response Streaming Start === Agent Type: {agent_type}")
+    cache_key = response_cache_key(agent_type, user_query) if RESPONSE_CACHE_ENABLED else None
+    if cache_key:
+        cached_result = response_cache.get(cache_key)
+        if cached_result is not None:
+            logger.info(f"Response cache HIT for {agent_type} (stream)")
+            yield cached_result
+            return
+    
+    request_args = prepare_agent_completion(agent_type, user_query)
+    # Streamed tokens cannot be taken back, so only the complexity estimate picks the tier
+    cascade_tier = None
+    policy = model_cascade.policy_for(get_agent_config(agent_type), request_args["model"])
+    if policy is not None:
+        cascade_tier = model_cascade.choose(policy, estimate_complexity(user_query))
+        if cascade_tier == "small":
+            request_args = {**request_args, "model": policy.small_model}
+    started = time.monotonic()
+    
+    parts: List[str] = []
+    usage = None
+    # A stream that breaks off after its first tokens is not replayed
+    stream = await create_chat_completion(request_args, stream=True)
+    try:
+        async for chunk in stream:
+            # The last chunk carries the usage (include_usage) and no choices
+            if getattr(chunk, "usage", None) is not None:
+                usage = chunk.usage
+            # Azure sends a leading chunk with content filter results and no choices
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                yield delta
+    finally:
+        # Release the pooled connection when the consumer disconnects or is cancelled
+        await stream.close()
+    
+    prompt_cache_stats.record(f"{agent_type}:{agent_prompt_layout(agent_type)}", usage)
+    if cascade_tier is not None:
+        record_cascade_call(cascade_tier, request_args, time.monotonic() - started, usage, "".join(parts))
+    
+    # Cache only complete streams
+    if cache_key and parts:
+        response_cache.set(cache_key, agent_type, "".join(parts).strip())
 
 class Config:
     FRONTEND_SITE_NAME = ""
@@ -262,6 +643,7 @@ AGENT_CONFIGS = {
         "instructions": "Focus op praktische implementatie en menselijke aspecten",
         "system_prompt": "Je bent een expert HR adviseur met 15+ jaar ervaring",
         "capabilities": ["talent_analysis", "org_design", "change_management"],
+        "routing_keywords": ["personeel", "medewerkers", "werving", "recruitment", "aannemen", "onboarding", "training", "cultuur", "verloop", "salaris"],
         "response_format": "markdown",
         "language": "nl",
         "temperature": 0.7,
@@ -274,6 +656,7 @@ AGENT_CONFIGS = {
         "instructions": "Richt je op meetbare resultaten en data-driven aanpak",
         "system_prompt": "Je bent een ervaren marketing strategist met focus op ROI",
         "capabilities": ["market_analysis", "campaign_planning", "roi_optimization"],
+        "routing_keywords": ["marketing", "klanten", "merk", "branding", "campagne", "social", "lancering", "markt", "positionering", "sales"],
         "response_format": "markdown",
         "language": "nl",
         "temperature": 0.7,
@@ -286,6 +669,7 @@ AGENT_CONFIGS = {
         "instructions": "Balanceer gebruikersbehoeften met technische realiteit",
         "system_prompt": "Je bent een product manager met sterke UX en tech achtergrond",
         "capabilities": ["user_research", "feature_planning", "roadmap_development"],
+        "routing_keywords": ["product", "features", "gebruikers", "app", "dienst", "ontwerp", "ux", "prototype", "saas", "lancering"],
         "response_format": "markdown",
         "language": "nl",
         "temperature": 0.6,
@@ -298,6 +682,7 @@ AGENT_CONFIGS = {
         "instructions": "Focus op kostenbesparingen en risicominimalisatie",
         "system_prompt": "Je bent een senior inkoop specialist met sterke onderhandelingsvaardigheden",
         "capabilities": ["vendor_analysis", "cost_optimization", "risk_assessment"],
+        "routing_keywords": ["inkoop", "leverancier", "vendor", "kosten", "budget", "contract", "aanbesteding", "sourcing", "prijs", "licenties"],
         "response_format": "markdown",
         "language": "nl",
         "temperature": 0.5,
@@ -310,6 +695,7 @@ AGENT_CONFIGS = {
         "instructions": "Prioriteer security en schaalbaarheid in alle oplossingen",
         "system_prompt": "Je bent een senior IT architect met security expertise",
         "capabilities": ["infrastructure_design", "security_analysis", "scalability_planning"],
+        "routing_keywords": ["it", "systemen", "software", "cloud", "migratie", "beveiliging", "data", "storing", "crm", "integratie", "tickets"],
         "response_format": "markdown",
         "language": "nl",
         "temperature": 0.4,
@@ -322,6 +708,7 @@ AGENT_CONFIGS = {
         "instructions": "Koppel alle adviezen aan concrete business outcomes",
         "system_prompt": "Je bent een ervaren business consultant met brede expertise",
         "capabilities": ["strategy_development", "business_analysis", "implementation_planning"],
+        "routing_keywords": ["strategie", "groei", "omzet", "winst", "bedrijf", "uitbreiding", "investering", "overname", "roi"],
         "response_format": "markdown",
         "language": "nl",
         "temperature": 0.7,
@@ -334,6 +721,7 @@ AGENT_CONFIGS = {
         "instructions": "Maak realistische planningen met buffer voor onverwachte zaken",
         "system_prompt": "Je bent een ervaren project manager met strategische focus",
         "capabilities": ["project_planning", "resource_management", "risk_planning"],
+        "routing_keywords": ["planning", "tijdlijn", "deadline", "maanden", "weken", "fasen", "project", "mijlpalen", "uitrol"],
         "response_format": "markdown", 
         "language": "nl",
         "temperature": 0.6,
@@ -341,54 +729,137 @@ AGENT_CONFIGS = {
     }
 }
 
+# Agent configs are read from immutable, versioned snapshots; writers swap in a new
+# snapshot through the store instead of mutating AGENT_CONFIGS. Every source merges
+# onto the current snapshot with one precedence order: built-ins < config file and
+# runtime edits < Directus. An agent Directus configures is never overwritten by the
+# file; agents Directus does not know keep whatever was set locally.
+agent_config_store = AgentConfigStore(AGENT_CONFIGS)
+
+# With AGENT_CONFIG_FILE set, config edits are persisted to a JSON file that every
+# worker process polls (one stat per AGENT_CONFIG_POLL_SECONDS) and reloads on change
+AGENT_CONFIG_FILE = os.getenv("AGENT_CONFIG_FILE", "")
+agent_config_file = AgentConfigFile(AGENT_CONFIG_FILE) if AGENT_CONFIG_FILE else None
+
+def persist_agent_config(agent_type: str, config) -> None:
+    """Write an edited agent config to the config file so it survives restarts"""
+    if agent_config_file is None:
+        return
+    try:
+        agent_config_file.save_agent(agent_type, thaw(config))
+    except Exception as e:
+        logger.warning(f"Persisting agent {agent_type} config failed: {e}")
+
+def apply_directus_configs(directus_configs: Dict[str, dict]) -> None:
+    """Merge the Directus configs onto the current snapshot; other agents keep their config"""
+    agent_config_store.set_agents(directus_configs, source="directus_cms")
+
+# Directus configs are cached in memory and revalidated in the background, so
+# request handlers never wait on the CMS
+DIRECTUS_ENABLED = DIRECTUS_AVAILABLE and directus_manager.is_enabled()
+directus_config_cache = (
+    DirectusConfigCache(
+        DirectusHttpFetcher(
+            directus_manager.base_url,
+            directus_manager.collection,
+            token=os.getenv("DIRECTUS_TOKEN") or getattr(directus_manager, "token", None),
+        ),
+        on_update=apply_directus_configs,
+    )
+    if DIRECTUS_ENABLED
+    else None
+)
+
+def directus_agent_types() -> List[str]:
+    """Agent types configured in Directus, which take precedence over the config file"""
+    if directus_config_cache is None:
+        return []
+    return list(directus_config_cache.configs() or {})
+
+agent_config_watcher = (
+    AgentConfigFileWatcher(agent_config_file, agent_config_store, overridden=directus_agent_types)
+    if agent_config_file is not None
+    else None
+)
+if agent_config_watcher is not None:
+    agent_config_watcher.poll()
+
 def get_agent_config(agent_type: str) -> dict:
-    """Get agent configuration - loads from Directus CMS if available, falls back to local configs"""
-    if DIRECTUS_AVAILABLE and directus_manager.is_enabled():
-        try:
-            directus_configs = directus_manager.get_agent_configs_sync()
-            if directus_configs and agent_type in directus_configs:
-                return directus_configs[agent_type]
-        except Exception as e:
-            logger.warning(f"Failed to load from Directus: {e}")
-    
-    return AGENT_CONFIGS.get(agent_type, AGENT_CONFIGS["generic"])
+    """Get agent configuration from the current snapshot (Directus CMS configs when loaded, else local)"""
+    return agent_config_store.get(agent_type)
+
+def invalidate_agent_caches(agent_type: str) -> None:
+    """Drop cached answers of an agent after its configuration changed"""
+    response_cache.invalidate_agent(agent_type)
+    if SEMANTIC_CACHE_ENABLED:
+        semantic_cache.invalidate_agent(agent_type)
+
+def on_agent_config_swap(old, new) -> None:
+    """Cached answers of changed agents were produced with the old config"""
+    for agent_type in new.changed_agents(old):
+        invalidate_agent_caches(agent_type)
+    logger.info(f"Agent configs now at version {new.version} ({new.content_hash})")
+
+agent_config_store.add_listener(on_agent_config_swap)
+
+# Config changes are broadcast to the other replicas (CONFIG_BROADCAST), so they
+# recompile prompts and drop cached answers within seconds instead of after a TTL
+config_broadcaster = ConfigBroadcaster(create_broadcast_transport())
+# The Directus webhook is disabled (404) until a shared secret is configured
+DIRECTUS_WEBHOOK_SECRET = os.getenv("DIRECTUS_WEBHOOK_SECRET", "")
+
+async def publish_agent_config_change(agent_type: str, config, reason: str) -> None:
+    """Send an updated agent config to the other replicas"""
+    await config_broadcaster.publish_change(agent_type, thaw(config), config.content_hash, reason=reason)
+
+async def apply_remote_config_change(message: dict) -> None:
+    """Bring this replica up to date with a change made on another replica"""
+    agent_type = message.get("agent_type")
+    config = message.get("config")
+    if agent_type and config is not None:
+        current = agent_config_store.snapshot().agents.get(agent_type)
+        if current is None or current.content_hash != message.get("content_hash"):
+            # The swap compiles the new template and the listener drops cached answers
+            agent_config_store.set_agent(agent_type, config)
+        return
+    # Only a notification (e.g. a Directus webhook): revalidate against the CMS
+    if directus_config_cache is not None:
+        await directus_config_cache.refresh()
+    else:
+        for changed in [agent_type] if agent_type else list(agent_config_store.snapshot()):
+            invalidate_agent_caches(changed)
+
+def agent_prompt_layout(agent_type: str) -> str:
+    """Prompt layout of an agent: its prompt_layout setting or PROMPT_LAYOUT"""
+    layout = get_agent_config(agent_type).get("prompt_layout") or PROMPT_LAYOUT
+    return "prefix" if layout == "prefix" else "inline"
+
+def agent_prompt_messages(agent_type: str, user_query: str) -> List[Dict[str, str]]:
+    """Chat messages for an agent call in the agent's prompt layout.
+
+    In the prefix layout the system message depends only on the agent config, so
+    every call of an agent starts with the same tokens and the service can serve
+    them from its prompt cache; the scenario only appears in the user message.
+    """
+    if agent_prompt_layout(agent_type) == "prefix":
+        system_prompt = format_agent_prefix(agent_type)
+    else:
+        system_prompt = format_agent_prompt(agent_type, user_query)
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": f"Scenario: {user_query}"}
+    ]
+
+def format_agent_prefix(agent_type: str) -> str:
+    """Static agent prompt that refers to the scenario in the user message"""
+    template = template_for(get_agent_config(agent_type))
+    return template.prefix or template.render(SCENARIO_REFERENCE)
 
 def format_agent_prompt(agent_type: str, user_query: str) -> str:
     """Format agent prompt with query - customizable per agent with enhanced features"""
-    config = get_agent_config(agent_type)
-    
-    # Start with system prompt if available
-    system_part = config.get("system_prompt", "")
-    if system_part:
-        system_part += "\n\n"
-    
-    # Add main prompt
-    main_prompt = config["prompt"].format(query=user_query)
-    
-    # Add instructions if available
-    instructions = config.get("instructions", "")
-    if instructions:
-        main_prompt += f"\n\nSpecifieke instructies: {instructions}"
-    
-    # Add capabilities context
-    capabilities = config.get("capabilities", [])
-    if capabilities:
-        main_prompt += f"\n\nJe hebt toegang tot deze capabilities: {', '.join(capabilities)}"
-    
-    # Add response format guidance
-    response_format = config.get("response_format", "markdown")
-    if response_format == "markdown":
-        main_prompt += "\n\nFormatteer je antwoord in duidelijke Markdown met headers en bullet points."
-    elif response_format == "json":
-        main_prompt += "\n\nGeef je antwoord terug als gestructureerd JSON object."
-    
-    # Add language preference
-    language = config.get("language", "nl")
-    if language != "nl":
-        lang_names = {"en": "English", "fr": "French", "de": "German"}
-        main_prompt += f"\n\nAntwoord in het {lang_names.get(language, language)}."
-    
-    return system_part + main_prompt
+    # System prompt, instructions, capabilities, format and language guidance are
+    # compiled into the template once per config version; rendering is one join
+    return template_for(get_agent_config(agent_type)).render(user_query)
 
 # Check if the Application Insights Instrumentation Key is set in the environment variables
 connection_string = os.getenv("APPLICATIONINSIGHTS_CONNECTION_STRING")
@@ -422,9 +893,36 @@ logging.getLogger("azure.monitor.opentelemetry.exporter.export._base").setLevel(
     logging.WARNING
 )
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Manage process-wide resources for the lifetime of the app"""
+    if COSMOS_REGISTRY_AVAILABLE:
+        # Create the Cosmos client and check the container once, not per request
+        await cosmos_registry.start()
+    if directus_config_cache is not None:
+        await directus_config_cache.start()
+    await config_broadcaster.start(apply_remote_config_change)
+    if agent_config_watcher is not None:
+        agent_config_watcher.start()
+    await job_manager.start()
+    yield
+    await job_manager.stop()
+    if agent_config_watcher is not None:
+        await agent_config_watcher.stop()
+    await config_broadcaster.stop()
+    if directus_config_cache is not None:
+        await directus_config_cache.stop()
+    # Close the shared Azure OpenAI connection pool on shutdown
+    if AZURE_OPENAI_AVAILABLE:
+        await client_registry.aclose()
+    if COSMOS_REGISTRY_AVAILABLE:
+        await cosmos_registry.close()
+
+
 # Initialize the FastAPI app with proper configuration
 app = FastAPI(
     title="SoMC Agents",
+    lifespan=lifespan,
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json"
@@ -441,6 +939,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# One memory store identity map per request: repeated reads within a request share objects
+app.add_middleware(IdentityMapMiddleware)
+
 # Configure health check - only if available
 if HEALTH_CHECK_AVAILABLE:
     app.add_middleware(HealthCheckMiddleware, password="", checks={})
@@ -461,6 +962,9 @@ async def root():
             "health": "/health", 
             "specialists": "/api/agent-tools",
             "input_task": "/api/input_task",
+            "input_task_stream": "/api/input_task/stream",
+            "input_task_batch": "/api/input_task/batch",
+            "jobs": "/api/jobs/{job_id}",
             "plans": "/api/plans",
             "messages": "/api/messages"
         },
@@ -471,22 +975,25 @@ async def root():
 @app.get("/api/agent-configs")
 async def get_agent_configs():
     """Get all agent configurations - integrates with Directus CMS when available"""
-    if DIRECTUS_AVAILABLE and directus_manager.is_enabled():
-        try:
-            directus_configs = directus_manager.get_agent_configs_sync()  # Use sync version
-            if directus_configs:
-                return {
-                    "agents": directus_configs,
-                    "source": "directus_cms", 
-                    "count": len(directus_configs)
-                }
-        except Exception as e:
-            logger.warning(f"Failed to load from Directus, using local configs: {e}")
+    # Directus configs come from the background-refreshed cache (possibly stale)
+    if directus_config_cache is not None:
+        directus_configs = directus_config_cache.configs()
+        if directus_configs:
+            return {
+                "agents": directus_configs,
+                "source": "directus_cms", 
+                "count": len(directus_configs),
+                "version": agent_config_store.snapshot().version,
+                "cache": directus_config_cache.stats()
+            }
     
+    snapshot = agent_config_store.snapshot()
     return {
-        "agents": AGENT_CONFIGS,
-        "source": "local_config",
-        "count": len(AGENT_CONFIGS)
+        "agents": snapshot.agents,
+        "source": snapshot.source,
+        "count": len(snapshot),
+        "version": snapshot.version,
+        "content_hash": snapshot.content_hash
     }
 
 @app.put("/api/agent-configs/{agent_type}")
@@ -497,8 +1004,11 @@ async def update_agent_config(agent_type: str, config: dict):
         raise HTTPException(status_code=400, detail="Missing required fields: name, prompt")
     
     # Update local config first
-    if agent_type in AGENT_CONFIGS:
-        AGENT_CONFIGS[agent_type].update(config)
+    if agent_type in agent_config_store.snapshot():
+        # Swaps in a new config version; the listener drops the agent's cached answers
+        updated = agent_config_store.update_agent(agent_type, config)
+        persist_agent_config(agent_type, updated)
+        await publish_agent_config_change(agent_type, updated, reason="agent_config_update")
         
         # Try to sync with Directus
         if DIRECTUS_AVAILABLE and directus_manager.is_enabled():
@@ -507,26 +1017,26 @@ async def update_agent_config(agent_type: str, config: dict):
                 if success:
                     return {
                         "message": f"Agent {agent_type} configuration updated in both local and Directus",
-                        "agent": AGENT_CONFIGS[agent_type],
+                        "agent": updated,
                         "synced_to_directus": True
                     }
                 else:
                     return {
                         "message": f"Agent {agent_type} configuration updated locally (Directus sync failed)",
-                        "agent": AGENT_CONFIGS[agent_type],
+                        "agent": updated,
                         "synced_to_directus": False
                     }
             except Exception as e:
                 logger.warning(f"Failed to sync to Directus: {e}")
                 return {
                     "message": f"Agent {agent_type} configuration updated locally only",
-                    "agent": AGENT_CONFIGS[agent_type],
+                    "agent": updated,
                     "synced_to_directus": False
                 }
         
         return {
             "message": f"Agent {agent_type} configuration updated",
-            "agent": AGENT_CONFIGS[agent_type],
+            "agent": updated,
             "directus_available": DIRECTUS_AVAILABLE
         }
     else:
@@ -540,7 +1050,9 @@ async def get_directus_status():
             "directus_available": True,
             "directus_enabled": directus_manager.is_enabled(),
             "directus_url": directus_manager.base_url if directus_manager.is_enabled() else None,
-            "collection": directus_manager.collection
+            "collection": directus_manager.collection,
+            "cache": directus_config_cache.stats() if directus_config_cache is not None else None,
+            "broadcast": config_broadcaster.stats()
         }
     else:
         return {
@@ -548,6 +1060,44 @@ async def get_directus_status():
             "message": "Directus integration module not available"
         }
 
+@app.post("/api/directus/webhook")
+async def directus_webhook(request: Request):
+    """Receive Directus change events (Flow webhook) and refresh the agent configs on every replica"""
+    if not DIRECTUS_WEBHOOK_SECRET:
+        raise HTTPException(status_code=404, detail="Directus webhook is not configured")
+    if not hmac.compare_digest(
+        request.headers.get("X-Webhook-Secret", ""), DIRECTUS_WEBHOOK_SECRET
+    ):
+        raise HTTPException(status_code=401, detail="Invalid webhook secret")
+    try:
+        event = await request.json()
+    except ValueError:
+        event = {}
+    if not isinstance(event, dict):
+        event = {}
+    collection = event.get("collection")
+    if DIRECTUS_ENABLED and collection and collection != directus_manager.collection:
+        return {"status": "ignored", "collection": collection}
+
+    payload = event.get("payload")
+    agent_type = payload.get("agent_type") if isinstance(payload, dict) else None
+    if directus_config_cache is not None:
+        refreshed = await directus_config_cache.refresh()
+    else:
+        refreshed = False
+        for changed in [agent_type] if agent_type else list(agent_config_store.snapshot()):
+            invalidate_agent_caches(changed)
+    # The webhook reaches one replica; the others revalidate when they hear about it
+    await config_broadcaster.publish_change(agent_type, reason="directus_webhook")
+    return {
+        "status": "accepted",
+        "event": event.get("event"),
+        "agent_type": agent_type,
+        "refreshed": refreshed,
+        "version": agent_config_store.snapshot().version,
+        "broadcast": config_broadcaster.enabled
+    }
+
 @app.get("/api/directus/schema")
 async def get_directus_schema():
     """Get recommended Directus collection schema for AI agents"""
@@ -565,32 +1115,36 @@ async def test_agent_prompt(request: dict):
     
     # Get config from Directus or fallback to local
     config = get_agent_config(agent_type)
-    if not config or config == AGENT_CONFIGS.get("generic"):
+    if not config or config == agent_config_store.get("generic"):
         # Check if this is a valid Directus agent type
-        if DIRECTUS_AVAILABLE and directus_manager.is_enabled():
-            directus_configs = directus_manager.get_agent_configs_sync()
+        if directus_config_cache is not None:
+            directus_configs = directus_config_cache.configs()
             if directus_configs and agent_type not in directus_configs:
                 available_agents = list(directus_configs.keys())
                 raise HTTPException(status_code=404, detail=f"Agent {agent_type} not found. Available: {available_agents}")
         else:
-            if agent_type not in AGENT_CONFIGS:
+            if agent_type not in agent_config_store.snapshot():
                 raise HTTPException(status_code=404, detail=f"Agent {agent_type} not found")
     
-    formatted_prompt = format_agent_prompt(agent_type, query)
+    messages = agent_prompt_messages(agent_type, query)
     config = get_agent_config(agent_type)
     
     return {
         "agent_type": agent_type,
         "agent_name": config["name"],
         "query": query,
-        "formatted_prompt": formatted_prompt,
+        "prompt_layout": agent_prompt_layout(agent_type),
+        "config_hash": response_cache.config_hash(config),
+        "formatted_prompt": messages[0]["content"],
+        "user_message": messages[1]["content"],
         "focus_areas": config["focus"],
         "capabilities": config.get("capabilities", []),
         "instructions": config.get("instructions", ""),
         "response_format": config.get("response_format", "markdown"),
         "language": config.get("language", "nl"),
         "temperature": config.get("temperature", 0.7),
-        "max_tokens": config.get("max_tokens", 1500)
+        "max_tokens": config.get("max_tokens", 1500),
+        "cascade": config.get("cascade")
     }
 
 @app.post("/api/agent-features")
@@ -599,31 +1153,36 @@ async def manage_agent_features(request: dict):
     agent_type = request.get("agent_type")
     action = request.get("action")  # "add_capability", "set_instruction", "update_format"
     
-    if not agent_type or agent_type not in AGENT_CONFIGS:
+    if not agent_type or agent_type not in agent_config_store.snapshot():
         raise HTTPException(status_code=404, detail="Agent not found")
     
-    config = AGENT_CONFIGS[agent_type]
+    config = agent_config_store.get(agent_type)
+    changes = {}
     
     if action == "add_capability":
         capability = request.get("capability")
         if capability and capability not in config.get("capabilities", []):
-            if "capabilities" not in config:
-                config["capabilities"] = []
-            config["capabilities"].append(capability)
+            changes["capabilities"] = [*config.get("capabilities", []), capability]
             
     elif action == "set_instruction":
         instruction = request.get("instruction", "")
-        config["instructions"] = instruction
+        changes["instructions"] = instruction
         
     elif action == "update_format":
         format_type = request.get("format", "markdown")
         if format_type in ["markdown", "html", "text", "json"]:
-            config["response_format"] = format_type
+            changes["response_format"] = format_type
             
     elif action == "set_language":
         language = request.get("language", "nl")
         if language in ["nl", "en", "fr", "de"]:
-            config["language"] = language
+            changes["language"] = language
+    
+    # A new config version; cached answers of the agent are dropped by the store listener
+    if changes:
+        config = agent_config_store.update_agent(agent_type, changes)
+        persist_agent_config(agent_type, config)
+        await publish_agent_config_change(agent_type, config, reason=f"agent_features:{action}")
     
     # Try to sync with Directus if available
     if DIRECTUS_AVAILABLE and directus_manager.is_enabled():
@@ -643,82 +1202,343 @@ async def health_check():
     return {
         "status": "healthy",
         "azure_openai_available": AZURE_OPENAI_AVAILABLE,
+        "openai_client_pool": client_registry.stats() if AZURE_OPENAI_AVAILABLE else None,
         "timestamp": datetime.now().isoformat(),
-        "agents_configured": len(AGENT_CONFIGS)
+        "agents_configured": len(agent_config_store.snapshot())
     }
 
 
-@app.post("/api/input_task")
-@app.post("/input_task")  # Legacy support for frontend compatibility
-async def input_task_endpoint(input_task: InputTask, request: Request):
+# Agents that can take part in an input task, in response order
+AVAILABLE_AGENTS = [
+    {"agent": "hr", "name": "HR Specialist", "expertise": "hr"},
+    {"agent": "marketing", "name": "Marketing Expert", "expertise": "marketing"},
+    {"agent": "product", "name": "Product Specialist", "expertise": "product"},
+    {"agent": "procurement", "name": "Procurement Agent", "expertise": "procurement"},
+    {"agent": "tech_support", "name": "Tech Support Agent", "expertise": "tech_support"},
+    {"agent": "generic", "name": "Generic Agent", "expertise": "generic"},
+    {"agent": "planner", "name": "Planner Agent", "expertise": "planner"}
+]
+
+# Fan-out tuning: max concurrent specialist calls per request and per-agent timeout
+AGENT_FANOUT_CONCURRENCY = max(1, int(os.getenv("AGENT_FANOUT_CONCURRENCY", "7")))
+AGENT_RESPONSE_TIMEOUT_SECONDS = float(os.getenv("AGENT_RESPONSE_TIMEOUT_SECONDS", "90"))
+
+# Default response mode when a request does not set one: "fanout" or "consolidated"
+AGENT_RESPONSE_MODE = os.getenv("AGENT_RESPONSE_MODE", "fanout")
+# Completion budget of a consolidated call (the sum of the agents' max_tokens, capped)
+CONSOLIDATED_MAX_TOKENS = int(os.getenv("CONSOLIDATED_MAX_TOKENS", "8000"))
+
+# Agent routing when no agents are selected: only call the relevant ones
+AGENT_ROUTER_ENABLED = os.getenv("AGENT_ROUTER_ENABLED", "false").lower() in ["true", "1"]
+# Optional small deployment that classifies agent relevance (local scoring when empty)
+AGENT_ROUTER_MODEL = os.getenv("AGENT_ROUTER_MODEL", "")
+# Blend keyword scores with embedding similarity (needs AZURE_OPENAI_EMBEDDING_DEPLOYMENT)
+AGENT_ROUTER_EMBEDDINGS = (
+    bool(EMBEDDING_DEPLOYMENT)
+    and os.getenv("AGENT_ROUTER_EMBEDDINGS", "false").lower() in ["true", "1"]
+)
+
+
+def agent_fallback_response(expertise: str, description: str) -> str:
+    """Context-aware fallback text for an agent whose AI response failed"""
+    # Enhanced fallback for individual agent failures with context
+    expertise_context = {
+        "hr": f"📊 Voor '{description}' - kritieke HR overwegingen: talent behoeften, organisatie impact, change management. Specifieke skills gap analyse nodig.",
+        "marketing": f"📢 Voor '{description}' - kern marketing vragen: doelgroep identificatie, positioning strategie, kanaal effectiviteit. Markt research aanbevolen.",
+        "product": f"🚀 Voor '{description}' - product focus punten: user needs analysis, technical feasibility, market fit assessment. User research starten.",
+        "procurement": f"🛒 Voor '{description}' - sourcing prioriteiten: vendor landscape, cost analysis, risk assessment. Supplier evaluation nodig.",
+        "tech_support": f"⚙️ Voor '{description}' - technische aspecten: infrastructure requirements, security overwegingen, scalability planning. Technical assessment starten.",
+        "generic": f"💼 Voor '{description}' - strategische focus: business alignment, resource planning, ROI assessment. Strategic review aanbevolen.",
+        "planner": f"📋 Voor '{description}' - planning prioriteiten: milestone definitie, resource allocatie, risk management. Project planning opstarten."
+    }
+
+    context_response = expertise_context.get(expertise,
+        f"Analyse voor '{description}' - context-specifieke inzichten worden voorbereid.")
+    return f"{context_response}\n\n⚠️ AI analyse tijdelijk niet beschikbaar - herstart voor volledige strategische inzichten."
+
+
+def select_agents(selected_agents: Optional[List[str]]) -> List[dict]:
+    """Return the agent entries for a task, filtered on selected_agents if provided"""
+    if selected_agents:
+        return [
+            agent for agent in AVAILABLE_AGENTS
+            if agent["expertise"] in selected_agents
+        ]
+    return list(AVAILABLE_AGENTS)
+
+
+async def classify_agents(description: str, profiles: Dict[str, str]) -> Dict[str, float]:
+    """Score agent relevance (0..1) with the small AGENT_ROUTER_MODEL deployment"""
+    expertises = list(profiles)
+    request_args = {
+        "model": AGENT_ROUTER_MODEL,
+        "messages": [
+            {
+                "role": "system",
+                "content": (
+                    "Beoordeel per specialist hoe relevant die is voor het scenario, "
+                    "met een score van 0 (niet relevant) tot 1 (zeer relevant).\n\n"
+                    + "\n".join(f"- {expertise}: {profile}" for expertise, profile in profiles.items())
+                ),
+            },
+            {"role": "user", "content": f"Scenario: {description}"},
+        ],
+        "max_tokens": 200,
+        "temperature": 0,
+        "response_format": {
+            "type": "json_schema",
+            "json_schema": {
+                "name": "agent_relevance",
+                "strict": True,
+                "schema": {
+                    "type": "object",
+                    "properties": {expertise: {"type": "number"} for expertise in expertises},
+                    "required": expertises,
+                    "additionalProperties": False,
+                },
+            },
+        },
+    }
+    response = await create_chat_completion(request_args, usage_key="agent_router")
+    return json.loads(response.choices[0].message.content)
+
+
+agent_router = AgentRouter(
+    embed=get_query_embedding if AGENT_ROUTER_EMBEDDINGS else None,
+    classifier=classify_agents if AGENT_ROUTER_MODEL else None,
+)
+
+
+async def select_task_agents(input_task: InputTask) -> AgentSelection:
+    """Agents for a task: the selected ones, the routed relevant ones, or all"""
+    if input_task.selected_agents:
+        return AgentSelection(select_agents(input_task.selected_agents), method="selected")
+    auto_select = AGENT_ROUTER_ENABLED if input_task.auto_select_agents is None else input_task.auto_select_agents
+    if not auto_select:
+        return AgentSelection(list(AVAILABLE_AGENTS), method="all")
+    configs = {agent["expertise"]: get_agent_config(agent["expertise"]) for agent in AVAILABLE_AGENTS}
+    selection = await agent_router.select(input_task.description, AVAILABLE_AGENTS, configs)
+    logger.info(
+        f"Agent routing ({selection.method}): calling {[a['expertise'] for a in selection.selected]}, "
+        f"skipped {len(selection.skipped)}"
+    )
+    return selection
+
+
+async def run_agent_fanout(
+    agents_data: List[dict], description: str, semaphore: Optional[asyncio.Semaphore] = None
+) -> List[dict]:
+    """Run the selected agents concurrently and return their responses in input order.
+
+    Concurrency is capped by AGENT_FANOUT_CONCURRENCY (or by a shared semaphore, e.g.
+    the batch budget) and every agent gets its own AGENT_RESPONSE_TIMEOUT_SECONDS
+    budget, so one slow or failing specialist only degrades its own entry to the
+    fallback text.
     """
-    Receive the initial input task from the user.
-    Returns a proper response structure that the frontend expects.
+    semaphore = semaphore or asyncio.Semaphore(AGENT_FANOUT_CONCURRENCY)
+
+    async def run_agent(agent_data: dict) -> dict:
+        try:
+            async with semaphore:
+                ai_response = await asyncio.wait_for(
+                    generate_ai_response(agent_data["expertise"], description),
+                    timeout=AGENT_RESPONSE_TIMEOUT_SECONDS,
+                )
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Agent {agent_data['name']} timed out after {AGENT_RESPONSE_TIMEOUT_SECONDS}s"
+            )
+            ai_response = agent_fallback_response(agent_data["expertise"], description)
+        except Exception as agent_error:
+            logger.warning(f"Agent {agent_data['name']} response failed: {agent_error}")
+            ai_response = agent_fallback_response(agent_data["expertise"], description)
+
+        return {
+            "agent_name": agent_data["name"],
+            "agent_expertise": agent_data["expertise"],
+            "response": ai_response
+        }
+
+    # gather keeps the result order aligned with agents_data
+    return list(await asyncio.gather(*(run_agent(agent_data) for agent_data in agents_data)))
+
+
+def consolidated_model_settings(agents_data: List[dict]) -> Optional[Tuple[str, float]]:
+    """The (model, temperature) shared by all agents, or None when they differ.
+
+    One consolidated call can only honour one model_override and temperature,
+    so agents with different settings are answered by the fan-out instead.
+    """
+    settings = {agent_model_settings(agent_data["expertise"]) for agent_data in agents_data}
+    return settings.pop() if len(settings) == 1 else None
+
+
+def build_consolidated_request(
+    agents_data: List[dict], description: str, settings: Tuple[str, float]
+) -> Dict[str, Any]:
+    """Build one structured-output request that answers for every selected agent.
+
+    Each agent's persona and instructions become a section of the system prompt;
+    the scenario is sent once. The JSON schema has one required string property
+    per expertise so the answer can be split back into agent_responses. settings
+    is the (model, temperature) the agents share.
     """
+    model_name, temperature = settings
+    sections = []
+    max_tokens = 0
+    for agent_data in agents_data:
+        expertise = agent_data["expertise"]
+        agent_config = get_agent_config(expertise)
+        max_tokens += agent_config.get("max_tokens", 800)
+        # The scenario is sent once in the user message instead of in every persona
+        persona = format_agent_prefix(expertise)
+        sections.append(f"### {expertise} - {agent_data['name']}\n{persona}")
     
+    system_prompt = (
+        "Je beantwoordt een scenario namens meerdere specialisten tegelijk. "
+        "Schrijf per specialist een volledig, zelfstandig antwoord vanuit diens rol en instructies, "
+        "en zet het in het JSON veld met de naam van die expertise.\n\n"
+        + "\n\n".join(sections)
+    )
+    expertises = [agent_data["expertise"] for agent_data in agents_data]
+    return {
+        "model": model_name,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": f"Scenario: {description}"},
+        ],
+        "max_tokens": min(max_tokens, CONSOLIDATED_MAX_TOKENS),
+        "temperature": temperature,
+        "response_format": {
+            "type": "json_schema",
+            "json_schema": {
+                "name": "agent_responses",
+                "strict": True,
+                "schema": {
+                    "type": "object",
+                    "properties": {expertise: {"type": "string"} for expertise in expertises},
+                    "required": expertises,
+                    "additionalProperties": False,
+                },
+            },
+        },
+    }
+
+
+def split_consolidated_response(agents_data: List[dict], description: str, content: str) -> List[dict]:
+    """Split a consolidated JSON answer into the agent_responses shape.
+
+    Raises ValueError if the content is not a JSON object; agents with a missing
+    or empty section get the fallback text.
+    """
+    sections = json.loads(content)
+    if not isinstance(sections, dict):
+        raise ValueError("Consolidated response is not a JSON object")
+    agent_responses = []
+    for agent_data in agents_data:
+        section = sections.get(agent_data["expertise"])
+        if not isinstance(section, str) or not section.strip():
+            logger.warning(f"Consolidated response has no section for {agent_data['expertise']}")
+            section = agent_fallback_response(agent_data["expertise"], description)
+        agent_responses.append({
+            "agent_name": agent_data["name"],
+            "agent_expertise": agent_data["expertise"],
+            "response": section.strip(),
+        })
+    return agent_responses
+
+
+async def run_consolidated(
+    agents_data: List[dict], description: str, semaphore: Optional[asyncio.Semaphore] = None
+) -> List[dict]:
+    """Answer for all selected agents with a single structured-output call.
+
+    Uses the fan-out instead when the agents do not share a model and
+    temperature, and falls back to it when the call fails or its JSON cannot
+    be parsed.
+    """
+    settings = consolidated_model_settings(agents_data)
+    if settings is None:
+        logger.info("Consolidated mode skipped: selected agents use different models or temperatures")
+        return await run_agent_fanout(agents_data, description, semaphore)
     try:
-        # Get all available agents from agent-tools endpoint
-        available_agents_data = [
-            {"agent": "hr", "name": "HR Specialist", "expertise": "hr"},
-            {"agent": "marketing", "name": "Marketing Expert", "expertise": "marketing"},
-            {"agent": "product", "name": "Product Specialist", "expertise": "product"},
-            {"agent": "procurement", "name": "Procurement Agent", "expertise": "procurement"},
-            {"agent": "tech_support", "name": "Tech Support Agent", "expertise": "tech_support"},
-            {"agent": "generic", "name": "Generic Agent", "expertise": "generic"},
-            {"agent": "planner", "name": "Planner Agent", "expertise": "planner"}
-        ]
-        
-        # Filter agents based on selected_agents if provided
-        if input_task.selected_agents:
-            available_agents_data = [
-                agent for agent in available_agents_data 
-                if agent["expertise"] in input_task.selected_agents
-            ]
-        
-        # Generate AI responses for selected agents only
-        agent_responses = []
-        for agent_data in available_agents_data:
-            try:
-                ai_response = await generate_ai_response(
-                    agent_data["expertise"], 
-                    input_task.description
-                )
-                
-                agent_responses.append({
-                    "agent_name": agent_data["name"],
-                    "agent_expertise": agent_data["expertise"],
-                    "response": ai_response
-                })
-                
-            except Exception as agent_error:
-                # Enhanced fallback for individual agent failures with context
-                expertise_context = {
-                    "hr": f"📊 Voor '{input_task.description}' - kritieke HR overwegingen: talent behoeften, organisatie impact, change management. Specifieke skills gap analyse nodig.",
-                    "marketing": f"📢 Voor '{input_task.description}' - kern marketing vragen: doelgroep identificatie, positioning strategie, kanaal effectiviteit. Markt research aanbevolen.",
-                    "product": f"🚀 Voor '{input_task.description}' - product focus punten: user needs analysis, technical feasibility, market fit assessment. User research starten.",
-                    "procurement": f"🛒 Voor '{input_task.description}' - sourcing prioriteiten: vendor landscape, cost analysis, risk assessment. Supplier evaluation nodig.",
-                    "tech_support": f"⚙️ Voor '{input_task.description}' - technische aspecten: infrastructure requirements, security overwegingen, scalability planning. Technical assessment starten.",
-                    "generic": f"💼 Voor '{input_task.description}' - strategische focus: business alignment, resource planning, ROI assessment. Strategic review aanbevolen.",
-                    "planner": f"📋 Voor '{input_task.description}' - planning prioriteiten: milestone definitie, resource allocatie, risk management. Project planning opstarten."
-                }
-                
-                context_response = expertise_context.get(agent_data["expertise"], 
-                    f"Analyse voor '{input_task.description}' - context-specifieke inzichten worden voorbereid.")
-                
-                agent_responses.append({
-                    "agent_name": agent_data["name"],
-                    "agent_expertise": agent_data["expertise"],
-                    "response": f"{context_response}\n\n⚠️ AI analyse tijdelijk niet beschikbaar - herstart voor volledige strategische inzichten."
-                })
-                logger.warning(f"Agent {agent_data['name']} response failed: {agent_error}")
+        request_args = build_consolidated_request(agents_data, description, settings)
+        # One call takes one slot of a shared (batch) budget
+        async with semaphore or nullcontext():
+            response = await asyncio.wait_for(
+                completion_flights.do(
+                    SingleFlight.make_key("consolidated", request_args),
+                    lambda: create_chat_completion(request_args, usage_key="consolidated"),
+                ),
+                timeout=AGENT_RESPONSE_TIMEOUT_SECONDS,
+            )
+        return split_consolidated_response(
+            agents_data, description, response.choices[0].message.content
+        )
+    except Exception as e:
+        logger.warning(f"Consolidated call failed, falling back to fan-out: {e!r}")
+        return await run_agent_fanout(agents_data, description, semaphore)
+
+
+@app.get("/api/llm/stats")
+async def get_llm_stats():
+    """LLM call statistics: response caches, request coalescing, rate limits and client pool"""
+    return {
+        "response_cache": response_cache.stats() if RESPONSE_CACHE_ENABLED else None,
+        "semantic_cache": semantic_cache.stats() if SEMANTIC_CACHE_ENABLED else None,
+        "single_flight": completion_flights.stats(),
+        "rate_limits": rate_limiter.stats(),
+        "deployments": deployment_router.stats(),
+        "hedging": hedged_requests.stats() if HEDGING_ENABLED else None,
+        "prompt_cache": {"layout": PROMPT_LAYOUT, **prompt_cache_stats.stats()},
+        "agent_router": agent_router.stats(),
+        "model_cascade": model_cascade.stats(),
+        "agent_configs": {
+            **agent_config_store.stats(),
+            "broadcast": config_broadcaster.stats(),
+            "file": agent_config_watcher.stats() if agent_config_watcher is not None else None
+        },
+        "jobs": await job_manager.stats(),
+        "cosmos": (
+            {
+                **cosmos_registry.stats(),
+                "request_units": request_charges.stats(),
+                "read_cache": memory_read_caches.stats(),
+                "identity_map": identity_map_stats.stats(),
+            }
+            if COSMOS_REGISTRY_AVAILABLE
+            else None
+        ),
+        "client_pool": client_registry.stats() if AZURE_OPENAI_AVAILABLE else None,
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+async def process_input_task(
+    input_task: InputTask, semaphore: Optional[asyncio.Semaphore] = None
+) -> dict:
+    """Run the agent pipeline for one scenario and build the /api/input_task response"""
+    try:
+        # Generate AI responses for selected agents only: all agents in parallel,
+        # or in one consolidated call when requested
+        selection = await select_task_agents(input_task)
+        agents_data = selection.selected
+        if (input_task.mode or AGENT_RESPONSE_MODE) == "consolidated":
+            agent_responses = await run_consolidated(agents_data, input_task.description, semaphore)
+        else:
+            agent_responses = await run_agent_fanout(agents_data, input_task.description, semaphore)
         
         # Return enhanced response structure
-        return {
+        result = {
             "status": "success",
             "session_id": input_task.session_id,
             "agent_responses": agent_responses,
             "message": "AI analyse voltooid - strategische inzichten van alle specialisten"
         }
+        if selection.method not in ("selected", "all"):
+            result["skipped_agents"] = selection.skipped
+            result["agent_selection"] = selection.report()
+        return result
         
     except Exception as e:
         logger.error(f"Input task processing failed: {e}")
@@ -731,6 +1551,231 @@ async def input_task_endpoint(input_task: InputTask, request: Request):
         }
 
 
+async def run_input_task_job(payload: Dict[str, Any]) -> dict:
+    """Job handler: run a queued input task through the agent pipeline"""
+    # A job is the queued form of a request, so it gets its own unit of work too
+    with identity_scope():
+        return await process_input_task(InputTask.model_validate(payload))
+
+
+# Background jobs for scenarios that would outlast ingress timeouts
+JOB_MAX_WAIT_SECONDS = float(os.getenv("JOB_MAX_WAIT_SECONDS", "60"))
+job_manager = JobManager(create_job_store(), handler=run_input_task_job)
+
+
+@app.post("/api/input_task")
+@app.post("/input_task")  # Legacy support for frontend compatibility
+async def input_task_endpoint(
+    input_task: InputTask,
+    request: Request,
+    async_mode: bool = Query(False, alias="async", description="Queue the task and return a job id"),
+):
+    """
+    Receive the initial input task from the user.
+    Returns a proper response structure that the frontend expects.
+    With ?async=true the task is queued and a job id is returned immediately;
+    poll GET /api/jobs/{job_id} for the result.
+    """
+    if async_mode:
+        job = await job_manager.submit(input_task.model_dump())
+        return JSONResponse(
+            status_code=202,
+            content={
+                "status": "accepted",
+                "job_id": job.id,
+                "session_id": input_task.session_id,
+                "status_url": f"/api/jobs/{job.id}",
+                "message": "Analyse ingepland - haal het resultaat op via de status_url",
+            },
+        )
+    return await process_input_task(input_task)
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, description="Seconds to wait for the job to finish (long-poll)"),
+):
+    """Get the status and, once finished, the result of a queued input task"""
+    if wait > 0:
+        job = await job_manager.wait(job_id, min(wait, JOB_MAX_WAIT_SECONDS))
+    else:
+        job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return job.to_dict()
+
+
+# Global budget of concurrent agent calls shared by all running batches
+BATCH_AGENT_CONCURRENCY = max(1, int(os.getenv("BATCH_AGENT_CONCURRENCY", "14")))
+# Scenarios of one batch that are read and processed at the same time
+BATCH_MAX_IN_FLIGHT = max(1, int(os.getenv("BATCH_MAX_IN_FLIGHT", "4")))
+batch_agent_semaphore = asyncio.Semaphore(BATCH_AGENT_CONCURRENCY)
+
+
+async def stream_input_task_batch(
+    body: AsyncIterator[bytes], body_read: Optional[asyncio.Event] = None
+) -> AsyncIterator[str]:
+    """Process a JSON array / JSONL body of InputTasks and yield NDJSON result lines.
+
+    Each line carries the item index and a per-item status (success, error or
+    invalid) in completion order; a final line summarizes the batch. body_read
+    is set once the request body has been consumed.
+    """
+    counts = {"success": 0, "error": 0, "invalid": 0}
+    started = time.monotonic()
+
+    async def items() -> AsyncIterator[Any]:
+        try:
+            async for item in iter_json_items(body):
+                yield item
+        except BatchParseError as e:
+            # Stop reading but let the scenarios already started finish
+            yield e
+        finally:
+            if body_read is not None:
+                body_read.set()
+
+    async def process(index: int, item: Any) -> dict:
+        item_started = time.monotonic()
+        if isinstance(item, BatchParseError):
+            return {"status": "invalid", "message": str(item)}
+        try:
+            input_task = InputTask.model_validate(item)
+        except ValidationError as e:
+            return {"status": "invalid", "message": f"Ongeldige input task: {e.errors(include_url=False)}"}
+        result = await process_input_task(input_task, batch_agent_semaphore)
+        result["duration_ms"] = round((time.monotonic() - item_started) * 1000)
+        return result
+
+    async for index, result in run_bounded(items(), process, BATCH_MAX_IN_FLIGHT):
+        counts[result["status"]] += 1
+        yield json.dumps({"index": index, **result}, ensure_ascii=False) + "\n"
+
+    yield json.dumps({
+        "batch_summary": {
+            "total": sum(counts.values()),
+            **counts,
+            "duration_ms": round((time.monotonic() - started) * 1000),
+        }
+    }) + "\n"
+
+
+@app.post("/api/input_task/batch")
+async def input_task_batch_endpoint(request: Request):
+    """
+    Run many scenarios through the agent pipeline in one request.
+    Accepts a JSON array or JSONL of InputTasks and streams NDJSON results as
+    each scenario finishes.
+    """
+    body_read = asyncio.Event()
+    return DuplexStreamingResponse(
+        stream_input_task_batch(request.stream(), body_read),
+        body_read,
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Format a Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def stream_agent_fanout(
+    agents_data: List[dict], input_task: InputTask, skipped_agents: Optional[List[dict]] = None
+) -> AsyncIterator[str]:
+    """Run the selected agents concurrently and yield SSE events as tokens arrive.
+
+    Emits ``token`` events tagged with agent expertise, an ``agent_done`` event per
+    agent with its full response, and a final ``summary`` event with the same shape
+    as the /api/input_task response. Agents skipped by routing are listed in the
+    ``start`` event.
+    """
+    description = input_task.description
+    semaphore = asyncio.Semaphore(AGENT_FANOUT_CONCURRENCY)
+    queue: asyncio.Queue = asyncio.Queue()
+    responses: Dict[str, str] = {}
+
+    async def produce(agent_data: dict) -> None:
+        expertise = agent_data["expertise"]
+        parts: List[str] = []
+        try:
+            async with semaphore:
+                async with asyncio.timeout(AGENT_RESPONSE_TIMEOUT_SECONDS):
+                    async for delta in stream_ai_response(expertise, description):
+                        parts.append(delta)
+                        await queue.put(("token", agent_data, delta))
+            full_response = "".join(parts).strip()
+        except Exception as agent_error:
+            logger.warning(f"Agent {agent_data['name']} stream failed: {agent_error!r}")
+            if parts:
+                # Keep what was already streamed and mark it as incomplete
+                full_response = "".join(parts).strip() + "\n\n⚠️ Antwoord onvolledig - herstart voor de volledige analyse."
+            else:
+                full_response = agent_fallback_response(expertise, description)
+        responses[expertise] = full_response
+        await queue.put(("agent_done", agent_data, full_response))
+
+    producers = [asyncio.create_task(produce(agent_data)) for agent_data in agents_data]
+    try:
+        yield format_sse("start", {
+            "session_id": input_task.session_id,
+            "agents": [agent_data["expertise"] for agent_data in agents_data],
+            "skipped_agents": skipped_agents or [],
+        })
+        remaining = len(producers)
+        while remaining:
+            event, agent_data, payload = await queue.get()
+            if event == "token":
+                yield format_sse("token", {
+                    "agent_expertise": agent_data["expertise"],
+                    "agent_name": agent_data["name"],
+                    "delta": payload,
+                })
+            else:
+                remaining -= 1
+                yield format_sse("agent_done", {
+                    "agent_expertise": agent_data["expertise"],
+                    "agent_name": agent_data["name"],
+                    "response": payload,
+                })
+
+        # Summary keeps the agent order of the non-streaming endpoint
+        yield format_sse("summary", {
+            "status": "success",
+            "session_id": input_task.session_id,
+            "agent_responses": [
+                {
+                    "agent_name": agent_data["name"],
+                    "agent_expertise": agent_data["expertise"],
+                    "response": responses.get(agent_data["expertise"], ""),
+                }
+                for agent_data in agents_data
+            ],
+            "message": "AI analyse voltooid - strategische inzichten van alle specialisten"
+        })
+    finally:
+        # Client disconnected or stream finished - stop any agent still running
+        for producer in producers:
+            if not producer.done():
+                producer.cancel()
+
+
+@app.post("/api/input_task/stream")
+async def input_task_stream_endpoint(input_task: InputTask, request: Request):
+    """
+    Streaming variant of /api/input_task using Server-Sent Events.
+    Tokens are pushed per agent as they arrive, followed by a summary event.
+    """
+    selection = await select_task_agents(input_task)
+    return StreamingResponse(
+        stream_agent_fanout(selection.selected, input_task, selection.skipped),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.post("/api/human_feedback")
 async def human_feedback_endpoint(human_feedback: HumanFeedback, request: Request):
     """
@@ -1409,8 +2454,8 @@ async def get_agent_tools():
     """
     try:
         # Haal agents uit Directus
-        if DIRECTUS_AVAILABLE and directus_manager.is_enabled():
-            directus_configs = directus_manager.get_agent_configs_sync()
+        if directus_config_cache is not None:
+            directus_configs = directus_config_cache.configs()
             if directus_configs:
                 # Maak een visueel en functioneel agent tools object
                 available_agents = []
@@ -1430,6 +2475,7 @@ async def get_agent_tools():
                         "temperature": config.get("temperature", 0.7),
                         "max_tokens": config.get("max_tokens", 1500),
                         "model_override": config.get("model_override", ""),
+                        "cascade": config.get("cascade"),
                         "custom_features": config.get("custom_features", {})
                     })
                 return available_agents
@@ -0,0 +1,83 @@
+"""Benchmark automatic agent selection: specialist calls saved and recall.
+
+Routes a set of labelled scenarios through the agent router with the current
+AGENT_CONFIGS and reports how many specialist calls the fan-out would make
+compared to calling every agent, and how many of the expected agents were kept.
+The local keyword scorer needs no Azure OpenAI access; set AGENT_ROUTER_MODEL
+or AGENT_ROUTER_EMBEDDINGS to benchmark the classifier or blended scores.
+
+Usage (from src/backend):
+    python benchmarks/agent_selection.py --top-k 3 --threshold 0.35
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import app_kernel  # noqa: E402
+from task_processing.agent_router import AgentRouter  # noqa: E402
+
+# Scenario -> agents a reviewer would expect to answer
+LABELLED_SCENARIOS = [
+    ("We willen 20 nieuwe developers aannemen en de onboarding verbeteren.", ["hr"]),
+    ("Onze leverancier verhoogt de licentiekosten met 30%, hoe heronderhandelen we het contract?", ["procurement"]),
+    ("De migratie van ons CRM naar de cloud geeft veel storingen en tickets.", ["tech_support"]),
+    ("We lanceren een nieuwe app voor jonge klanten en zoeken de juiste campagne.", ["marketing", "product"]),
+    ("Maak een planning met mijlpalen voor de uitrol van het nieuwe ERP in zes maanden.", ["planner", "tech_support"]),
+    ("Hoe laten we de omzet groeien met een overname in Duitsland?", ["generic"]),
+    ("Het verloop onder medewerkers is hoog sinds de reorganisatie.", ["hr"]),
+    ("We willen de inkoop van hardware centraliseren om kosten te besparen.", ["procurement"]),
+    ("Onze SaaS dienst heeft features nodig die gebruikers echt missen.", ["product"]),
+    ("Beveiliging van klantdata na een datalek: wat nu?", ["tech_support"]),
+]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top-k", type=int, default=None)
+    parser.add_argument("--threshold", type=float, default=None)
+    args = parser.parse_args()
+
+    router = AgentRouter(
+        top_k=args.top_k,
+        threshold=args.threshold,
+        embed=app_kernel.agent_router.embed,
+        classifier=app_kernel.agent_router.classifier,
+    )
+    agents = app_kernel.AVAILABLE_AGENTS
+    configs = {agent["expertise"]: app_kernel.get_agent_config(agent["expertise"]) for agent in agents}
+
+    rows = []
+    expected_total = expected_kept = 0
+    for scenario, expected in LABELLED_SCENARIOS:
+        selection = await router.select(scenario, agents, configs)
+        selected = [agent["expertise"] for agent in selection.selected]
+        expected_total += len(expected)
+        expected_kept += sum(1 for expertise in expected if expertise in selected)
+        rows.append({
+            "scenario": scenario,
+            "method": selection.method,
+            "selected": selected,
+            "missed": [expertise for expertise in expected if expertise not in selected],
+        })
+
+    stats = router.stats()
+    summary = {
+        "scenarios": len(LABELLED_SCENARIOS),
+        "calls_without_routing": stats["agents_considered"],
+        "calls_with_routing": stats["agents_called"],
+        "calls_saved": stats["calls_saved"],
+        "calls_saved_ratio": stats["calls_saved_ratio"],
+        "expected_agent_recall": round(expected_kept / expected_total, 4) if expected_total else 0.0,
+        "top_k": router.top_k,
+        "threshold": router.threshold,
+    }
+    print(json.dumps({"summary": summary, "scenarios": rows}, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
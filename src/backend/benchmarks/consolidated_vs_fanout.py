@@ -0,0 +1,111 @@
+"""Benchmark the consolidated single-call mode against the per-agent fan-out.
+
+Runs each scenario through both paths against the configured Azure OpenAI
+deployment (caches are bypassed) and reports wall-clock latency and token usage.
+
+Usage (from src/backend, with the usual AZURE_OPENAI_* settings):
+    python benchmarks/consolidated_vs_fanout.py --runs 3 --agents hr,marketing,product
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import app_kernel  # noqa: E402
+
+DEFAULT_SCENARIOS = [
+    "We willen binnen zes maanden een nieuwe SaaS dienst voor MKB klanten lanceren.",
+    "Onze klantenservice krijgt 40% meer tickets sinds de migratie naar het nieuwe CRM.",
+]
+
+
+def usage_of(response) -> dict:
+    usage = getattr(response, "usage", None)
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+    }
+
+
+async def run_fanout(agents_data, scenario) -> dict:
+    started = time.perf_counter()
+    responses = await asyncio.gather(
+        *(
+            app_kernel.create_chat_completion(
+                app_kernel.prepare_agent_completion(agent_data["expertise"], scenario)
+            )
+            for agent_data in agents_data
+        )
+    )
+    elapsed = time.perf_counter() - started
+    usages = [usage_of(response) for response in responses]
+    return {
+        "latency_seconds": elapsed,
+        "calls": len(responses),
+        "prompt_tokens": sum(u["prompt_tokens"] for u in usages),
+        "completion_tokens": sum(u["completion_tokens"] for u in usages),
+    }
+
+
+async def run_consolidated(agents_data, scenario) -> dict:
+    started = time.perf_counter()
+    request_args = app_kernel.build_consolidated_request(agents_data, scenario)
+    response = await app_kernel.create_chat_completion(request_args)
+    elapsed = time.perf_counter() - started
+    # Fails loudly if the structured output cannot be split
+    app_kernel.split_consolidated_response(agents_data, scenario, response.choices[0].message.content)
+    return {"latency_seconds": elapsed, "calls": 1, **usage_of(response)}
+
+
+def summarize(results: list) -> dict:
+    latencies = [r["latency_seconds"] for r in results]
+    return {
+        "runs": len(results),
+        "latency_p50_seconds": round(statistics.median(latencies), 3),
+        "latency_max_seconds": round(max(latencies), 3),
+        "avg_prompt_tokens": round(statistics.mean(r["prompt_tokens"] for r in results)),
+        "avg_completion_tokens": round(statistics.mean(r["completion_tokens"] for r in results)),
+        "calls_per_scenario": results[0]["calls"],
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="Runs per scenario and mode")
+    parser.add_argument("--agents", default="", help="Comma separated expertises (default: all)")
+    parser.add_argument("--scenario", action="append", help="Scenario text (repeatable)")
+    args = parser.parse_args()
+
+    agents_data = app_kernel.select_agents([a for a in args.agents.split(",") if a] or None)
+    scenarios = args.scenario or DEFAULT_SCENARIOS
+
+    results = {"fanout": [], "consolidated": []}
+    for scenario in scenarios:
+        for run in range(args.runs):
+            # Alternate the order so warm connections do not favour one mode
+            modes = [("fanout", run_fanout), ("consolidated", run_consolidated)]
+            for mode, runner in modes if run % 2 == 0 else reversed(modes):
+                results[mode].append(await runner(agents_data, scenario))
+
+    summary = {mode: summarize(mode_results) for mode, mode_results in results.items()}
+    fanout, consolidated = summary["fanout"], summary["consolidated"]
+    summary["consolidated_vs_fanout"] = {
+        "latency_p50_ratio": round(consolidated["latency_p50_seconds"] / fanout["latency_p50_seconds"], 3),
+        "total_tokens_ratio": round(
+            (consolidated["avg_prompt_tokens"] + consolidated["avg_completion_tokens"])
+            / max(fanout["avg_prompt_tokens"] + fanout["avg_completion_tokens"], 1),
+            3,
+        ),
+    }
+    print(json.dumps(summary, indent=2))
+    await app_kernel.client_registry.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
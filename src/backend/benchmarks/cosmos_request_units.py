@@ -0,0 +1,132 @@
+"""Cosmos DB request units of the memory store reads, cross-partition vs partition-scoped.
+
+Seeds one session (a plan with steps, agent messages and memory records) plus
+--noise-sessions other sessions in the configured container, then runs each
+session-scoped CosmosMemoryContext read twice: "before" with the partition key
+dropped (cross-partition query, as before partition keys were passed) and
+"after" as the code runs now. The RU charge comes from the x-ms-request-charge
+header of every response. Seeded documents are deleted afterwards.
+
+Needs a real Cosmos DB account or the emulator (COSMOSDB_ENDPOINT,
+COSMOSDB_DATABASE, COSMOSDB_CONTAINER plus the variables AppConfig requires).
+
+Usage (from src/backend):
+    python benchmarks/cosmos_request_units.py --steps 8 --noise-sessions 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import uuid
+
+from azure.cosmos.partition_key import NonePartitionKeyValue
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from context import cosmos_memory_kernel  # noqa: E402
+from context.cosmos_memory_kernel import CosmosMemoryContext  # noqa: E402
+from context.cosmos_registry import cosmos_registry  # noqa: E402
+from context.read_cache import MemoryReadCaches  # noqa: E402
+from context.request_charges import RequestChargeStats  # noqa: E402
+from models.messages_kernel import AgentMessage, AgentType, Plan, Session, Step  # noqa: E402
+
+USER_ID = "ru-benchmark-user"
+
+
+async def seed(context: CosmosMemoryContext, session_id: str, steps: int, noise_sessions: int) -> Plan:
+    await context.add_session(Session(id=session_id, user_id=USER_ID, current_status="active"))
+    plan = Plan(session_id=session_id, user_id=USER_ID, initial_goal="RU benchmark")
+    await context.add_plan(plan)
+    for i in range(steps):
+        step = Step(plan_id=plan.id, session_id=session_id, user_id=USER_ID, action=f"Stap {i}", agent=AgentType.HR)
+        await context.add_step(step)
+        await context.add_agent_message(
+            AgentMessage(session_id=session_id, user_id=USER_ID, plan_id=plan.id, content=f"Bericht {i}", source="bench")
+        )
+        await context.upsert_async(
+            "memory",
+            {"data_type": "memory", "collection": "bench", "key": f"k{i}", "text": "x", "user_id": USER_ID},
+        )
+    for _ in range(noise_sessions):
+        other = CosmosMemoryContext(str(uuid.uuid4()), USER_ID)
+        await other.add_plan(Plan(session_id=other.session_id, user_id=USER_ID, initial_goal="noise"))
+    return plan
+
+
+async def measure(context: CosmosMemoryContext, plan: Plan) -> dict:
+    """RU per read, recorded with a fresh RequestChargeStats per call."""
+    reads = {
+        "get_session": lambda: context.get_session(context.session_id),
+        "get_plan_by_plan_id": lambda: context.get_plan_by_plan_id(plan.id),
+        "get_plan_by_session": lambda: context.get_plan_by_session(context.session_id),
+        "get_steps_by_plan": lambda: context.get_steps_by_plan(plan.id),
+        "get_agent_messages_by_session": lambda: context.get_agent_messages_by_session(context.session_id),
+        "get_data_by_type(step)": lambda: context.get_data_by_type("step"),
+        "get_messages": context.get_messages,
+        "get_memory_records": lambda: context.get_memory_records("bench"),
+    }
+    results = {}
+    for name, read in reads.items():
+        charges = RequestChargeStats()
+        cosmos_memory_kernel.request_charges = charges
+        await read()
+        results[name] = round(sum(op["request_units"] for op in charges.stats().values()), 2)
+    return results
+
+
+async def run(args: argparse.Namespace) -> dict:
+    original_scope = CosmosMemoryContext._query_scope
+    original_point_read = CosmosMemoryContext.point_read
+    original_charges = cosmos_memory_kernel.request_charges
+    # Measure Cosmos itself, not the read-through caches
+    cosmos_memory_kernel.memory_read_caches = MemoryReadCaches(enabled=False)
+    context = CosmosMemoryContext(str(uuid.uuid4()), USER_ID)
+    plan = await seed(context, context.session_id, args.steps, args.noise_sessions)
+    try:
+        # Before: every query cross-partition and no point reads
+        CosmosMemoryContext._query_scope = staticmethod(lambda partition_key: original_scope(None))
+
+        async def no_point_read(self, item_id, data_type, model_class):
+            return None
+
+        CosmosMemoryContext.point_read = no_point_read
+        before = await measure(context, plan)
+
+        CosmosMemoryContext._query_scope = staticmethod(original_scope)
+        CosmosMemoryContext.point_read = original_point_read
+        after = await measure(context, plan)
+    finally:
+        CosmosMemoryContext._query_scope = staticmethod(original_scope)
+        CosmosMemoryContext.point_read = original_point_read
+        cosmos_memory_kernel.request_charges = original_charges
+        # The session document has no session_id, so it cannot go through the query delete
+        await context.delete_item(context.session_id, partition_key=NonePartitionKeyValue)
+        await context.delete_items_by_query(
+            "SELECT c.id, c.session_id FROM c WHERE c.user_id=@user_id",
+            [{"name": "@user_id", "value": USER_ID}],
+        )
+        await cosmos_registry.close()
+
+    return {
+        "steps": args.steps,
+        "noise_sessions": args.noise_sessions,
+        "request_units": {
+            name: {"before": before[name], "after": after[name], "saved": round(before[name] - after[name], 2)}
+            for name in before
+        },
+        "total": {"before": round(sum(before.values()), 2), "after": round(sum(after.values()), 2)},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=int, default=8)
+    parser.add_argument("--noise-sessions", type=int, default=50)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Microbenchmark of agent prompt rendering before and after compiled templates.
+
+"before" repeats the old format_agent_prompt work on every call: str.format of
+the agent prompt plus the system prompt, instructions, capabilities, format and
+language concatenations. "after" renders the template compiled once per config
+version. Both are measured on the raw render and through format_agent_prompt
+(which adds the get_agent_config lookup).
+
+Usage (from src/backend):
+    python benchmarks/prompt_render.py --number 100000
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import app_kernel  # noqa: E402
+from agent_config.templates import template_for  # noqa: E402
+
+SCENARIO = "We willen binnen zes maanden een nieuwe SaaS dienst voor MKB klanten lanceren."
+
+
+def format_uncompiled(config: dict, user_query: str) -> str:
+    """The per-call work format_agent_prompt did before templates were compiled."""
+    system_part = config.get("system_prompt", "")
+    if system_part:
+        system_part += "\n\n"
+    main_prompt = config["prompt"].format(query=user_query)
+    instructions = config.get("instructions", "")
+    if instructions:
+        main_prompt += f"\n\nSpecifieke instructies: {instructions}"
+    capabilities = config.get("capabilities", [])
+    if capabilities:
+        main_prompt += f"\n\nJe hebt toegang tot deze capabilities: {', '.join(capabilities)}"
+    response_format = config.get("response_format", "markdown")
+    if response_format == "markdown":
+        main_prompt += "\n\nFormatteer je antwoord in duidelijke Markdown met headers en bullet points."
+    elif response_format == "json":
+        main_prompt += "\n\nGeef je antwoord terug als gestructureerd JSON object."
+    language = config.get("language", "nl")
+    if language != "nl":
+        lang_names = {"en": "English", "fr": "French", "de": "German"}
+        main_prompt += f"\n\nAntwoord in het {lang_names.get(language, language)}."
+    return system_part + main_prompt
+
+
+def per_call_ns(fn, number: int) -> float:
+    return round(min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e9, 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=100000)
+    parser.add_argument("--agent", default="hr")
+    args = parser.parse_args()
+
+    config = app_kernel.get_agent_config(args.agent)
+    template = template_for(config)
+    assert template.render(SCENARIO) == format_uncompiled(config, SCENARIO)
+
+    before = per_call_ns(lambda: format_uncompiled(config, SCENARIO), args.number)
+    after = per_call_ns(lambda: template.render(SCENARIO), args.number)
+    endpoint = per_call_ns(lambda: app_kernel.format_agent_prompt(args.agent, SCENARIO), args.number)
+    print(json.dumps({
+        "agent": args.agent,
+        "render_ns_before": before,
+        "render_ns_after": after,
+        "speedup": round(before / after, 2) if after else None,
+        "format_agent_prompt_ns": endpoint,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -8,15 +8,25 @@ import datetime
 from typing import Any, Dict, List, Optional, Type, Tuple
 import numpy as np
 
-from azure.cosmos.partition_key import PartitionKey
-from azure.cosmos.aio import CosmosClient
-from azure.identity import DefaultAzureCredential
+from azure.cosmos.exceptions import CosmosResourceNotFoundError
 from semantic_kernel.memory.memory_record import MemoryRecord
 from semantic_kernel.memory.memory_store_base import MemoryStoreBase
 from semantic_kernel.contents import ChatMessageContent, ChatHistory, AuthorRole
 
 # Import the AppConfig instance
 from app_config import config
+from context.cosmos_registry import cosmos_registry
+from context.identity_map import current_identity_map, identity_mapped
+from context.read_cache import memory_read_caches
+from context.request_charges import request_charges
+from context.partition_resolver import (
+    ID_ADDRESSED_TYPES,
+    LOOKUP_ID_PREFIX,
+    lookup_document,
+    partition_key_from_lookup,
+    partition_key_of,
+    partition_key_resolver,
+)
 from models.messages_kernel import BaseDataModel, Plan, Session, Step, AgentMessage
 
 
@@ -59,7 +69,6 @@ class CosmosMemoryContext(MemoryStoreBase):
         self._cosmos_endpoint = cosmos_endpoint or config.COSMOSDB_ENDPOINT
         self._cosmos_database = cosmos_database or config.COSMOSDB_DATABASE
 
-        self._database = None
         self._container = None
         self.session_id = session_id
         self.user_id = user_id
@@ -70,19 +79,10 @@ class CosmosMemoryContext(MemoryStoreBase):
     async def initialize(self):
         """Initialize the memory context using CosmosDB."""
         try:
-            if not self._database:
-                # Create Cosmos client
-                cosmos_client = CosmosClient(
-                    self._cosmos_endpoint, credential=DefaultAzureCredential()
-                )
-                self._database = cosmos_client.get_database_client(
-                    self._cosmos_database
-                )
-
-            # Set up CosmosDB container
-            self._container = await self._database.create_container_if_not_exists(
-                id=self._cosmos_container,
-                partition_key=PartitionKey(path="/session_id"),
+            # Borrow the process-wide container handle; the client, credential and
+            # container check are shared by every context
+            self._container = await cosmos_registry.get_container(
+                self._cosmos_endpoint, self._cosmos_database, self._cosmos_container
             )
         except Exception as e:
             logging.error(
@@ -134,6 +134,31 @@ class CosmosMemoryContext(MemoryStoreBase):
             logging.exception(f"Failed to add item to Cosmos DB: {e}")
             raise  # Propagate the error instead of silently failing
 
+        partition_key_resolver.remember_document(document)
+        self._write_through(item, created=True)
+        if partition_key_resolver.lookup_documents and document.get("data_type") in ID_ADDRESSED_TYPES:
+            await self._write_lookup(document)
+
+    @staticmethod
+    def _write_through(item: BaseDataModel, created: bool) -> None:
+        """Keep the request's identity map and the plan and step read caches in line with a write."""
+        identity_map = current_identity_map()
+        if identity_map is not None:
+            identity_map.refresh(item, created)
+        if isinstance(item, Plan):
+            memory_read_caches.write_plan(item, created)
+        elif isinstance(item, Step):
+            memory_read_caches.write_step(item, created)
+
+    async def _write_lookup(self, document: Dict[str, Any]) -> None:
+        """Store the lookup document that resolves the partition key of an id-addressed item."""
+        try:
+            await self._container.upsert_item(
+                body=lookup_document(document["id"], partition_key_of(document))
+            )
+        except Exception as e:
+            logging.warning(f"Failed to write partition key lookup for {document['id']}: {e}")
+
     async def update_item(self, item: BaseDataModel) -> None:
         """Update an existing item in Cosmos DB."""
         await self.ensure_initialized()
@@ -149,6 +174,8 @@ class CosmosMemoryContext(MemoryStoreBase):
 
             # Now upsert the item with the serialized datetime values
             await self._container.upsert_item(body=document)
+            partition_key_resolver.remember_document(document)
+            self._write_through(item, created=False)
         except Exception as e:
             logging.exception(f"Failed to update item in Cosmos DB: {e}")
             raise  # Propagate the error instead of silently failing
@@ -161,39 +188,119 @@ class CosmosMemoryContext(MemoryStoreBase):
 
         try:
             item = await self._container.read_item(
-                item=item_id, partition_key=partition_key
+                item=item_id,
+                partition_key=partition_key,
+                response_hook=request_charges.hook("point_read"),
             )
+            partition_key_resolver.remember_document(item)
             return model_class.model_validate(item)
         except Exception as e:
             logging.exception(f"Failed to retrieve item from Cosmos DB: {e}")
             return None
 
+    @staticmethod
+    def _query_scope(partition_key: Optional[Any]) -> Dict[str, Any]:
+        """query_items keyword arguments: target one partition when its key is known, and record the RU charge."""
+        if partition_key is None:
+            return {"response_hook": request_charges.hook("query_cross_partition")}
+        return {
+            "partition_key": partition_key,
+            "response_hook": request_charges.hook("query_single_partition"),
+        }
+
     async def query_items(
         self,
         query: str,
         parameters: List[Dict[str, Any]],
         model_class: Type[BaseDataModel],
+        partition_key: Optional[Any] = None,
     ) -> List[BaseDataModel]:
-        """Query items from Cosmos DB and return a list of model instances."""
+        """Query items from Cosmos DB and return a list of model instances.
+
+        Pass partition_key (the session_id) whenever the query is limited to one
+        session, so it runs against a single partition instead of fanning out.
+        """
         await self.ensure_initialized()
 
         try:
-            items = self._container.query_items(query=query, parameters=parameters)
+            items = self._container.query_items(
+                query=query, parameters=parameters, **self._query_scope(partition_key)
+            )
             result_list = []
             async for item in items:
                 item["ts"] = item["_ts"]
+                partition_key_resolver.remember_document(item)
                 result_list.append(model_class.model_validate(item))
             return result_list
         except Exception as e:
             logging.exception(f"Failed to query items from Cosmos DB: {e}")
             return []
 
+    async def _resolve_partition_key(self, item_id: str) -> Optional[Any]:
+        """Partition key of a document id from the resolver cache or its lookup document."""
+        partition_key = partition_key_resolver.resolve(item_id)
+        if partition_key is not None or not partition_key_resolver.lookup_documents:
+            return partition_key
+        try:
+            lookup = await self._container.read_item(
+                item=f"{LOOKUP_ID_PREFIX}{item_id}",
+                partition_key=item_id,
+                response_hook=request_charges.hook("point_read"),
+            )
+        except CosmosResourceNotFoundError:
+            partition_key_resolver.record_lookup(False)
+            return None
+        partition_key_resolver.record_lookup(True)
+        partition_key = partition_key_from_lookup(lookup)
+        partition_key_resolver.remember(item_id, partition_key)
+        return partition_key
+
+    async def point_read(
+        self, item_id: str, data_type: str, model_class: Type[BaseDataModel]
+    ) -> Optional[BaseDataModel]:
+        """Read a document by id with a point read when its partition key can be resolved.
+
+        Args:
+            item_id: The document id
+            data_type: The expected data_type of the document
+            model_class: The model to validate the document with
+
+        Returns:
+            The model, or None on a miss (unknown partition key, not found or another
+            data type); callers then fall back to a query
+        """
+        await self.ensure_initialized()
+
+        try:
+            partition_key = await self._resolve_partition_key(item_id)
+            if partition_key is None:
+                return None
+            item = await self._container.read_item(
+                item=item_id,
+                partition_key=partition_key,
+                response_hook=request_charges.hook("point_read"),
+            )
+        except CosmosResourceNotFoundError:
+            partition_key_resolver.forget(item_id)
+            return None
+        except Exception as e:
+            logging.warning(f"Point read of {item_id} failed, falling back to a query: {e}")
+            return None
+        if item.get("data_type") != data_type:
+            return None
+        item["ts"] = item["_ts"]
+        return model_class.model_validate(item)
+
     async def add_session(self, session: Session) -> None:
         """Add a session to Cosmos DB."""
         await self.add_item(session)
 
+    @identity_mapped
     async def get_session(self, session_id: str) -> Optional[Session]:
         """Retrieve a session by session_id."""
+        session = await self.point_read(session_id, "session", Session)
+        if session is not None:
+            return session
         query = "SELECT * FROM c WHERE c.id=@id AND c.data_type=@data_type"
         parameters = [
             {"name": "@id", "value": session_id},
@@ -219,19 +326,32 @@ class CosmosMemoryContext(MemoryStoreBase):
         """Update an existing plan in Cosmos DB."""
         await self.update_item(plan)
 
+    @identity_mapped
     async def get_plan_by_session(self, session_id: str) -> Optional[Plan]:
         """Retrieve a plan associated with a session."""
+        cached = memory_read_caches.get_session_plan(self.user_id, session_id)
+        if cached is not None:
+            return cached
         query = "SELECT * FROM c WHERE c.session_id=@session_id AND c.user_id=@user_id AND c.data_type=@data_type"
         parameters = [
             {"name": "@session_id", "value": session_id},
             {"name": "@data_type", "value": "plan"},
             {"name": "@user_id", "value": self.user_id},
         ]
-        plans = await self.query_items(query, parameters, Plan)
-        return plans[0] if plans else None
+        plans = await self.query_items(query, parameters, Plan, partition_key=session_id)
+        plan = plans[0] if plans else None
+        memory_read_caches.put_plan(plan, session_plan=True)
+        return plan
 
+    @identity_mapped
     async def get_plan_by_plan_id(self, plan_id: str) -> Optional[Plan]:
         """Retrieve a plan associated with a session."""
+        plan = memory_read_caches.get_plan(plan_id)
+        if plan is None:
+            plan = await self.point_read(plan_id, "plan", Plan)
+            memory_read_caches.put_plan(plan)
+        if plan is not None:
+            return plan if plan.user_id == self.user_id else None
         query = "SELECT * FROM c WHERE c.id=@id AND c.user_id=@user_id AND c.data_type=@data_type"
         parameters = [
             {"name": "@id", "value": plan_id},
@@ -239,7 +359,9 @@ class CosmosMemoryContext(MemoryStoreBase):
             {"name": "@user_id", "value": self.user_id},
         ]
         plans = await self.query_items(query, parameters, Plan)
-        return plans[0] if plans else None
+        plan = plans[0] if plans else None
+        memory_read_caches.put_plan(plan)
+        return plan
 
     async def get_thread_by_session(self, session_id: str) -> Optional[Any]:
         """Retrieve a plan associated with a session."""
@@ -249,9 +371,10 @@ class CosmosMemoryContext(MemoryStoreBase):
             {"name": "@data_type", "value": "thread"},
             {"name": "@user_id", "value": self.user_id},
         ]
-        threads = await self.query_items(query, parameters, Plan)
+        threads = await self.query_items(query, parameters, Plan, partition_key=session_id)
         return threads[0] if threads else None
 
+    @identity_mapped
     async def get_plan(self, plan_id: str) -> Optional[Plan]:
         """Retrieve a plan by its ID.
 
@@ -261,10 +384,19 @@ class CosmosMemoryContext(MemoryStoreBase):
         Returns:
             The Plan object or None if not found
         """
-        # Use the session_id as the partition key since that's how we're partitioning our data
-        return await self.get_item_by_id(
-            plan_id, partition_key=self.session_id, model_class=Plan
-        )
+        # Use the session_id as the partition key since that's how we're partitioning our data,
+        # unless the resolver knows the plan lives in another session
+        plan = memory_read_caches.get_plan(plan_id)
+        if plan is None:
+            partition_key = partition_key_resolver.resolve(plan_id) or self.session_id
+            plan = await self.get_item_by_id(
+                plan_id, partition_key=partition_key, model_class=Plan
+            )
+            memory_read_caches.put_plan(plan)
+        # The cache and the resolver reach beyond this session; only return the user's own plans
+        if plan is not None and plan.user_id != self.user_id:
+            return None
+        return plan
 
     async def get_all_plans(self) -> List[Plan]:
         """Retrieve all plans."""
@@ -284,15 +416,27 @@ class CosmosMemoryContext(MemoryStoreBase):
         """Update an existing step in Cosmos DB."""
         await self.update_item(step)
 
-    async def get_steps_by_plan(self, plan_id: str) -> List[Step]:
-        """Retrieve all steps associated with a plan."""
+    @identity_mapped
+    async def get_steps_by_plan(
+        self, plan_id: str, session_id: Optional[str] = None
+    ) -> List[Step]:
+        """Retrieve all steps associated with a plan.
+
+        Steps live in their plan's session partition; when session_id is not given
+        it is resolved from the plan id if the plan was read or written before.
+        """
+        cached = memory_read_caches.get_steps(self.user_id, plan_id)
+        if cached is not None:
+            return cached
+        partition_key = session_id or partition_key_resolver.resolve(plan_id)
         query = "SELECT * FROM c WHERE c.plan_id=@plan_id AND c.user_id=@user_id AND c.data_type=@data_type"
         parameters = [
             {"name": "@plan_id", "value": plan_id},
             {"name": "@data_type", "value": "step"},
             {"name": "@user_id", "value": self.user_id},
         ]
-        steps = await self.query_items(query, parameters, Step)
+        steps = await self.query_items(query, parameters, Step, partition_key=partition_key)
+        memory_read_caches.put_steps(self.user_id, plan_id, steps)
         return steps
 
     async def get_steps_for_plan(
@@ -307,8 +451,9 @@ class CosmosMemoryContext(MemoryStoreBase):
         Returns:
             List of Step objects
         """
-        return await self.get_steps_by_plan(plan_id)
+        return await self.get_steps_by_plan(plan_id, session_id=session_id)
 
+    @identity_mapped
     async def get_step(self, step_id: str, session_id: str) -> Optional[Step]:
         return await self.get_item_by_id(
             step_id, partition_key=session_id, model_class=Step
@@ -338,7 +483,9 @@ class CosmosMemoryContext(MemoryStoreBase):
             {"name": "@session_id", "value": session_id},
             {"name": "@data_type", "value": "agent_message"},
         ]
-        messages = await self.query_items(query, parameters, AgentMessage)
+        messages = await self.query_items(
+            query, parameters, AgentMessage, partition_key=session_id
+        )
         return messages
 
     async def add_message(self, message: ChatMessageContent) -> None:
@@ -387,6 +534,7 @@ class CosmosMemoryContext(MemoryStoreBase):
             items = self._container.query_items(
                 query=query,
                 parameters=parameters,
+                **self._query_scope(self.session_id),
             )
             messages = []
             async for item in items:
@@ -437,7 +585,9 @@ class CosmosMemoryContext(MemoryStoreBase):
                 {"name": "@data_type", "value": data_type},
                 {"name": "@user_id", "value": self.user_id},
             ]
-            return await self.query_items(query, parameters, model_class)
+            return await self.query_items(
+                query, parameters, model_class, partition_key=self.session_id
+            )
         except Exception as e:
             logging.exception(f"Failed to query data by type from Cosmos DB: {e}")
             return []
@@ -458,7 +608,9 @@ class CosmosMemoryContext(MemoryStoreBase):
                 {"name": "@data_type", "value": data_type},
                 {"name": "@user_id", "value": self.user_id},
             ]
-            return await self.query_items(query, parameters, model_class)
+            return await self.query_items(
+                query, parameters, model_class, partition_key=session_id
+            )
         except Exception as e:
             logging.exception(f"Failed to query data by type from Cosmos DB: {e}")
             return []
@@ -470,6 +622,8 @@ class CosmosMemoryContext(MemoryStoreBase):
             await self._container.delete_item(item=item_id, partition_key=partition_key)
         except Exception as e:
             logging.exception(f"Failed to delete item from Cosmos DB: {e}")
+        finally:
+            self._forget_reads()
 
     async def delete_items_by_query(
         self, query: str, parameters: List[Dict[str, Any]]
@@ -477,7 +631,9 @@ class CosmosMemoryContext(MemoryStoreBase):
         """Delete items matching the query."""
         await self.ensure_initialized()
         try:
-            items = self._container.query_items(query=query, parameters=parameters)
+            items = self._container.query_items(
+                query=query, parameters=parameters, **self._query_scope(None)
+            )
             async for item in items:
                 item_id = item["id"]
                 partition_key = item.get("session_id", None)
@@ -486,6 +642,17 @@ class CosmosMemoryContext(MemoryStoreBase):
                 )
         except Exception as e:
             logging.exception(f"Failed to delete items from Cosmos DB: {e}")
+        finally:
+            # Deletes are rare bulk operations; drop every cached read rather than track them
+            self._forget_reads()
+
+    @staticmethod
+    def _forget_reads() -> None:
+        """Drop the read caches and the request's identity map after a delete."""
+        memory_read_caches.clear()
+        identity_map = current_identity_map()
+        if identity_map is not None:
+            identity_map.clear()
 
     async def delete_all_messages(self, data_type) -> None:
         """Delete all messages of a specific type from Cosmos DB."""
@@ -513,7 +680,9 @@ class CosmosMemoryContext(MemoryStoreBase):
                 {"name": "@user_id", "value": self.user_id},
                 {"name": "@limit", "value": 100},
             ]
-            items = self._container.query_items(query=query, parameters=parameters)
+            items = self._container.query_items(
+                query=query, parameters=parameters, **self._query_scope(None)
+            )
             async for item in items:
                 messages_list.append(item)
             return messages_list
@@ -562,7 +731,9 @@ class CosmosMemoryContext(MemoryStoreBase):
             """
             parameters = [{"name": "@session_id", "value": self.session_id}]
 
-            items = self._container.query_items(query=query, parameters=parameters)
+            items = self._container.query_items(
+                query=query, parameters=parameters, **self._query_scope(self.session_id)
+            )
             collections = []
             async for item in items:
                 if "collection" in item and item["collection"] not in collections:
@@ -592,7 +763,9 @@ class CosmosMemoryContext(MemoryStoreBase):
                 {"name": "@session_id", "value": self.session_id},
             ]
 
-            items = self._container.query_items(query=query, parameters=parameters)
+            items = self._container.query_items(
+                query=query, parameters=parameters, **self._query_scope(self.session_id)
+            )
             async for item in items:
                 await self._container.delete_item(
                     item=item["id"], partition_key=item["session_id"]
@@ -636,7 +809,9 @@ class CosmosMemoryContext(MemoryStoreBase):
             {"name": "@data_type", "value": "memory"},
         ]
 
-        items = self._container.query_items(query=query, parameters=parameters)
+        items = self._container.query_items(
+            query=query, parameters=parameters, **self._query_scope(self.session_id)
+        )
         async for item in items:
             return MemoryRecord(
                 id=item["id"],
@@ -666,7 +841,9 @@ class CosmosMemoryContext(MemoryStoreBase):
             {"name": "@data_type", "value": "memory"},
         ]
 
-        items = self._container.query_items(query=query, parameters=parameters)
+        items = self._container.query_items(
+            query=query, parameters=parameters, **self._query_scope(self.session_id)
+        )
         async for item in items:
             await self._container.delete_item(
                 item=item["id"], partition_key=self.session_id
@@ -711,7 +888,9 @@ class CosmosMemoryContext(MemoryStoreBase):
                 {"name": "@limit", "value": limit},
             ]
 
-            items = self._container.query_items(query=query, parameters=parameters)
+            items = self._container.query_items(
+                query=query, parameters=parameters, **self._query_scope(self.session_id)
+            )
             records = []
             async for item in items:
                 embedding = None
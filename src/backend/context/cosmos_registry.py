@@ -0,0 +1,128 @@
+# cosmos_registry.py
+
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from azure.cosmos.aio import CosmosClient
+from azure.cosmos.partition_key import PartitionKey
+
+# Import the AppConfig instance
+from app_config import config
+
+ContainerKey = Tuple[str, str, str]
+
+
+class CosmosContainerRegistry:
+    """Process-wide Cosmos DB clients and container handles.
+
+    The configured database client comes from AppConfig.get_cosmos_database_client,
+    so the credential and connection pool are created once; other endpoints get one
+    client each. create_container_if_not_exists runs once per container (normally
+    at startup) and every CosmosMemoryContext borrows the cached handle.
+    """
+
+    def __init__(self, app_config: Any = None) -> None:
+        """Initialize the registry.
+
+        Args:
+            app_config: The AppConfig to take endpoint, database and credential from
+        """
+        self._config = app_config or config
+        self._clients: Dict[str, CosmosClient] = {}
+        self._containers: Dict[ContainerKey, Any] = {}
+        self._lock = asyncio.Lock()
+        self._counters = {"hits": 0, "container_checks": 0, "failures": 0}
+
+    def _key(self, endpoint: Optional[str], database: Optional[str], container: Optional[str]) -> ContainerKey:
+        return (
+            endpoint or self._config.COSMOSDB_ENDPOINT,
+            database or self._config.COSMOSDB_DATABASE,
+            container or self._config.COSMOSDB_CONTAINER,
+        )
+
+    def _database_client(self, endpoint: str, database: str):
+        if endpoint == self._config.COSMOSDB_ENDPOINT and database == self._config.COSMOSDB_DATABASE:
+            return self._config.get_cosmos_database_client()
+        client = self._clients.get(endpoint)
+        if client is None:
+            client = CosmosClient(endpoint, credential=self._config.get_azure_credentials())
+            self._clients[endpoint] = client
+        return client.get_database_client(database)
+
+    async def get_container(
+        self,
+        endpoint: Optional[str] = None,
+        database: Optional[str] = None,
+        container: Optional[str] = None,
+    ):
+        """Return the shared container handle, checking the container exists on first use.
+
+        Args:
+            endpoint: Cosmos DB endpoint (defaults to COSMOSDB_ENDPOINT)
+            database: Database name (defaults to COSMOSDB_DATABASE)
+            container: Container name (defaults to COSMOSDB_CONTAINER)
+
+        Returns:
+            The container proxy
+
+        Raises:
+            Exception: If the client cannot be created or the container check fails
+        """
+        key = self._key(endpoint, database, container)
+        handle = self._containers.get(key)
+        if handle is not None:
+            self._counters["hits"] += 1
+            return handle
+        async with self._lock:
+            handle = self._containers.get(key)
+            if handle is not None:
+                self._counters["hits"] += 1
+                return handle
+            self._counters["container_checks"] += 1
+            try:
+                handle = await self._database_client(key[0], key[1]).create_container_if_not_exists(
+                    id=key[2],
+                    partition_key=PartitionKey(path="/session_id"),
+                )
+            except Exception:
+                self._counters["failures"] += 1
+                raise
+            self._containers[key] = handle
+            return handle
+
+    async def start(self) -> bool:
+        """Create the clients and check the configured container once. Never raises."""
+        if not self._config.COSMOSDB_ENDPOINT:
+            logging.info("COSMOSDB_ENDPOINT not set, skipping Cosmos DB warm-up")
+            return False
+        try:
+            await self.get_container()
+            return True
+        except Exception as e:
+            logging.error(f"Cosmos DB warm-up failed, retrying on first use: {e}")
+            return False
+
+    async def close(self) -> None:
+        """Close every client, including the one cached by AppConfig."""
+        clients = list(self._clients.values())
+        app_client = getattr(self._config, "_cosmos_client", None)
+        if app_client is not None:
+            clients.append(app_client)
+            self._config._cosmos_client = None
+            self._config._cosmos_database = None
+        for client in clients:
+            try:
+                await client.close()
+            except Exception as e:
+                logging.warning(f"Error closing Cosmos DB client: {e}")
+        self._clients.clear()
+        self._containers.clear()
+
+    def stats(self) -> dict:
+        """Return the number of cached containers, hits and container checks."""
+        return {"containers": len(self._containers), "clients": len(self._clients), **self._counters}
+
+
+# Create a global instance of the container registry
+cosmos_registry = CosmosContainerRegistry()
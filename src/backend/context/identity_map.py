@@ -0,0 +1,155 @@
+# identity_map.py
+
+import functools
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterator, Optional, TypeVar
+
+from pydantic import BaseModel
+
+ReadMethod = TypeVar("ReadMethod", bound=Callable[..., Awaitable[Any]])
+
+# Marks keys of documents, as opposed to keys of read calls
+ITEM_KEY = "item"
+
+
+class IdentityMapStats:
+    """Scopes opened and identity map hits and misses, over all scopes in the process."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters = {"scopes": 0, "hits": 0, "misses": 0, "refreshed": 0}
+
+    def count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return {
+                **self._counters,
+                "hit_ratio": round(self._counters["hits"] / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Create a global instance of the identity map statistics
+identity_map_stats = IdentityMapStats()
+
+
+def _item_key(value: Any) -> Optional[tuple]:
+    data_type = getattr(value, "data_type", None)
+    item_id = getattr(value, "id", None)
+    if not isinstance(value, BaseModel) or data_type is None or item_id is None:
+        return None
+    return (ITEM_KEY, data_type, item_id)
+
+
+class IdentityMap:
+    """Unit of work of one request: every memory store document read in it, once.
+
+    Read results are kept by read call; the documents in them are kept by
+    data_type and id, so the same document read through different calls is the
+    same pydantic object. Nothing outlives the scope, so there is no staleness
+    across requests.
+    """
+
+    def __init__(self) -> None:
+        self._objects: Dict[Hashable, Any] = {}
+        self.closed = False
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        value = self._objects.get(key)
+        identity_map_stats.count("hits" if value is not None else "misses")
+        return value
+
+    def put(self, key: Hashable, value: Any) -> Any:
+        """Keep a read result and return it with its documents replaced by the ones already in the map."""
+        if value is None or self.closed:
+            return value
+        if isinstance(value, list):
+            value = [self._adopt(item) for item in value]
+        else:
+            value = self._adopt(value)
+        self._objects[key] = value
+        return value
+
+    def _adopt(self, value: Any) -> Any:
+        key = _item_key(value)
+        if key is None:
+            return value
+        return self._objects.setdefault(key, value)
+
+    def refresh(self, item: BaseModel, created: bool) -> None:
+        """Write-through: copy a written document onto the object read earlier in this scope.
+
+        Adding a document can change what a query returns, so read results
+        (not documents) are dropped then.
+        """
+        if self.closed:
+            return
+        if created:
+            self._objects = {key: value for key, value in self._objects.items() if key[0] == ITEM_KEY}
+        key = _item_key(item)
+        current = self._objects.get(key) if key is not None else None
+        if current is None or current is item:
+            return
+        for name in type(current).model_fields:
+            if hasattr(item, name):
+                setattr(current, name, getattr(item, name))
+        identity_map_stats.count("refreshed")
+
+    def clear(self) -> None:
+        self._objects.clear()
+
+    def close(self) -> None:
+        """End the scope; tasks that copied the context no longer use the map."""
+        self.closed = True
+        self._objects.clear()
+
+
+_current_identity_map: ContextVar[Optional[IdentityMap]] = ContextVar("memory_identity_map", default=None)
+
+
+def current_identity_map() -> Optional[IdentityMap]:
+    """The identity map of the running request, or None outside a scope."""
+    identity_map = _current_identity_map.get()
+    if identity_map is None or identity_map.closed:
+        return None
+    return identity_map
+
+
+@contextmanager
+def identity_scope() -> Iterator[IdentityMap]:
+    """Run a block (a request or a job) as one unit of work with its own identity map."""
+    identity_map = IdentityMap()
+    token = _current_identity_map.set(identity_map)
+    identity_map_stats.count("scopes")
+    try:
+        yield identity_map
+    finally:
+        _current_identity_map.reset(token)
+        identity_map.close()
+
+
+def identity_mapped(read: ReadMethod) -> ReadMethod:
+    """Decorator for memory store reads: inside an identity scope, repeated calls
+    with the same arguments (and user) return the objects of the first call.
+    """
+
+    @functools.wraps(read)
+    async def wrapper(self, *args: Any, **kwargs: Any) -> Any:
+        identity_map = current_identity_map()
+        if identity_map is None:
+            return await read(self, *args, **kwargs)
+        key = (read.__name__, getattr(self, "user_id", None), args, tuple(sorted(kwargs.items())))
+        found = identity_map.get(key)
+        if found is not None:
+            return found
+        return identity_map.put(key, await read(self, *args, **kwargs))
+
+    return wrapper
@@ -0,0 +1,107 @@
+# partition_resolver.py
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from azure.cosmos.partition_key import NonePartitionKeyValue
+
+# Documents looked up by id alone; only these get lookup documents
+ID_ADDRESSED_TYPES = ("session", "plan")
+LOOKUP_DATA_TYPE = "pk_lookup"
+LOOKUP_ID_PREFIX = "pk-lookup-"
+
+
+def partition_key_of(document: Dict[str, Any]) -> Any:
+    """The /session_id partition key of a document (NonePartitionKeyValue when absent, e.g. sessions)."""
+    partition_key = document.get("session_id")
+    return NonePartitionKeyValue if partition_key is None else partition_key
+
+
+def lookup_document(item_id: str, partition_key: Any) -> Dict[str, Any]:
+    """A lookup document for item_id, stored in partition item_id so it can be point-read by id alone."""
+    return {
+        "id": f"{LOOKUP_ID_PREFIX}{item_id}",
+        "session_id": item_id,
+        "data_type": LOOKUP_DATA_TYPE,
+        "partition_key": None if partition_key is NonePartitionKeyValue else partition_key,
+    }
+
+
+def partition_key_from_lookup(document: Dict[str, Any]) -> Any:
+    partition_key = document.get("partition_key")
+    return NonePartitionKeyValue if partition_key is None else partition_key
+
+
+class PartitionKeyResolver:
+    """Bounded LRU map from document id to partition key.
+
+    Filled whenever a document is written or read, so later reads of the same id
+    can be point reads (about 1 RU) instead of cross-partition queries. With
+    lookup documents enabled, writes of id-addressed documents also store a tiny
+    lookup document that resolves ids this process has never seen.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, lookup_documents: Optional[bool] = None) -> None:
+        """Initialize the resolver.
+
+        Args:
+            max_entries: Most ids kept (least recently used are dropped first)
+            lookup_documents: Whether to write and read lookup documents
+        """
+        self.max_entries = max_entries or int(os.getenv("COSMOS_PK_CACHE_SIZE", "10000"))
+        self.lookup_documents = (
+            lookup_documents
+            if lookup_documents is not None
+            else os.getenv("COSMOS_PK_LOOKUP_DOCS", "false").lower() in ["true", "1"]
+        )
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "lookup_hits": 0, "lookup_misses": 0, "stale": 0}
+
+    def remember(self, item_id: str, partition_key: Any) -> None:
+        """Record the partition key of a document id."""
+        with self._lock:
+            self._entries[item_id] = partition_key
+            self._entries.move_to_end(item_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def remember_document(self, document: Dict[str, Any]) -> None:
+        """Record the partition key of a written or read document."""
+        if document.get("id") and document.get("data_type") != LOOKUP_DATA_TYPE:
+            self.remember(document["id"], partition_key_of(document))
+
+    def resolve(self, item_id: str) -> Optional[Any]:
+        """The cached partition key of an id, or None when unknown."""
+        with self._lock:
+            partition_key = self._entries.get(item_id)
+            if partition_key is None:
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(item_id)
+            self._counters["hits"] += 1
+            return partition_key
+
+    def forget(self, item_id: str) -> None:
+        """Drop an id whose cached partition key turned out to be wrong."""
+        with self._lock:
+            if self._entries.pop(item_id, None) is not None:
+                self._counters["stale"] += 1
+
+    def record_lookup(self, found: bool) -> None:
+        self._counters["lookup_hits" if found else "lookup_misses"] += 1
+
+    def stats(self) -> dict:
+        """Return cache size and hit/miss counts."""
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "lookup_documents": self.lookup_documents,
+            **self._counters,
+        }
+
+
+# Create a global instance of the partition key resolver
+partition_key_resolver = PartitionKeyResolver()
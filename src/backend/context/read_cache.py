@@ -0,0 +1,212 @@
+# read_cache.py
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+
+def _clone(value: Any) -> Any:
+    """Deep copy of models (and lists of models); callers may mutate what they read."""
+    if isinstance(value, BaseModel):
+        return value.model_copy(deep=True)
+    if isinstance(value, list):
+        return [_clone(item) for item in value]
+    return value
+
+
+class ReadThroughCache:
+    """Bounded LRU + TTL cache of memory store reads with hit metrics.
+
+    Values are copied on the way in and out, so a plan or step changed by one
+    caller never leaks into the cache without going through a write. The TTL
+    bounds staleness against writes made by other processes.
+    """
+
+    def __init__(self, name: str, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None) -> None:
+        """Initialize the cache.
+
+        Args:
+            name: Name shown in the stats
+            max_entries: Maximum number of entries (least recently used are dropped first)
+            ttl_seconds: Time to live of an entry in seconds
+        """
+        self.name = name
+        self.max_entries = max_entries or int(os.getenv("COSMOS_READ_CACHE_MAX_ENTRIES", "1000"))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("COSMOS_READ_CACHE_TTL_SECONDS", "30"))
+        self._entries: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "updates": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+        }
+
+    def get(self, key: Any) -> Optional[Any]:
+        """Return a copy of the cached value, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                self._counters["expirations"] += 1
+                entry = None
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            value = entry[1]
+        return _clone(value)
+
+    def set(self, key: Any, value: Any) -> None:
+        """Store a copy of value (None is not cached)."""
+        if value is None:
+            return
+        value = _clone(value)
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            self._counters["sets"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def update(self, key: Any, change: Callable[[Any], Optional[Any]]) -> None:
+        """Write-through: replace a cached value with change(value), or drop it when change returns None.
+
+        Keys that are not cached are left alone; the next read loads them.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            value = change(entry[1])
+            if value is None:
+                del self._entries[key]
+                self._counters["invalidations"] += 1
+            else:
+                self._entries[key] = (entry[0], value)
+                self._counters["updates"] += 1
+
+    def invalidate(self, key: Any) -> None:
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._counters["invalidations"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counters["invalidations"] += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return size, hit ratio and counters."""
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                **self._counters,
+                "hit_ratio": round(self._counters["hits"] / lookups, 4) if lookups else 0.0,
+            }
+
+
+class MemoryReadCaches:
+    """The read-through caches of CosmosMemoryContext, shared by every context in the process.
+
+    Plans are cached by plan id, the plan of a session by (user_id, session_id)
+    and the steps of a plan by (user_id, plan_id). Writes through the memory
+    store update or drop the affected entries. Every method is a no-op when
+    the caches are disabled.
+
+    The caches are off unless COSMOS_READ_CACHE_ENABLED is set. Writes made by
+    other replicas are not seen until an entry expires, so with several
+    replicas a plan or step status can be up to COSMOS_READ_CACHE_TTL_SECONDS
+    stale. Only enable them for a single replica or when that staleness is
+    acceptable; the identity map gives per-request reuse without it.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None) -> None:
+        self.enabled = (
+            enabled
+            if enabled is not None
+            else os.getenv("COSMOS_READ_CACHE_ENABLED", "false").lower() in ["true", "1"]
+        )
+        # plan id -> Plan
+        self.plans = ReadThroughCache("plans")
+        # (user_id, session_id) -> plan id
+        self.session_plans = ReadThroughCache("session_plans")
+        # (user_id, plan_id) -> List[Step]
+        self.steps = ReadThroughCache("steps")
+
+    def get_plan(self, plan_id: str) -> Optional[Any]:
+        return self.plans.get(plan_id) if self.enabled else None
+
+    def get_session_plan(self, user_id: str, session_id: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        plan_id = self.session_plans.get((user_id, session_id))
+        return self.plans.get(plan_id) if plan_id is not None else None
+
+    def get_steps(self, user_id: str, plan_id: str) -> Optional[List[Any]]:
+        return self.steps.get((user_id, plan_id)) if self.enabled else None
+
+    def put_plan(self, plan: Any, session_plan: bool = False) -> None:
+        """Cache a plan that was read (and, for get_plan_by_session, its session index)."""
+        if not self.enabled or plan is None:
+            return
+        self.plans.set(plan.id, plan)
+        if session_plan:
+            self.session_plans.set((plan.user_id, plan.session_id), plan.id)
+
+    def put_steps(self, user_id: str, plan_id: str, steps: List[Any]) -> None:
+        if self.enabled:
+            self.steps.set((user_id, plan_id), steps)
+
+    def write_plan(self, plan: Any, created: bool) -> None:
+        """Write-through of an added or updated plan."""
+        if not self.enabled:
+            return
+        self.plans.set(plan.id, plan)
+        if created:
+            # Which plan get_plan_by_session returns is up to the query again
+            self.session_plans.invalidate((plan.user_id, plan.session_id))
+
+    def write_step(self, step: Any, created: bool) -> None:
+        """Write-through of an added or updated step into its plan's cached step list."""
+        if not self.enabled:
+            return
+        step = _clone(step)
+
+        def apply(steps: List[Any]) -> Optional[List[Any]]:
+            for index, cached in enumerate(steps):
+                if cached.id == step.id:
+                    return steps[:index] + [step] + steps[index + 1:]
+            return steps + [step] if created else None
+
+        self.steps.update((step.user_id, step.plan_id), apply)
+
+    def clear(self) -> None:
+        self.plans.clear()
+        self.session_plans.clear()
+        self.steps.clear()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "plans": self.plans.stats(),
+            "session_plans": self.session_plans.stats(),
+            "steps": self.steps.stats(),
+        }
+
+
+# Create a global instance of the memory read caches (opt-in, see MemoryReadCaches)
+memory_read_caches = MemoryReadCaches()
@@ -0,0 +1,56 @@
+# request_charges.py
+
+import threading
+from typing import Any, Callable, Dict, Mapping
+
+REQUEST_CHARGE_HEADER = "x-ms-request-charge"
+
+ResponseHook = Callable[[Mapping[str, str], Any], None]
+
+
+class RequestChargeStats:
+    """Cosmos DB request units (RU) per operation kind.
+
+    hook(operation) returns a response_hook for the SDK; it is called once per
+    response (every page of a query), with the x-ms-request-charge header.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._operations: Dict[str, Dict[str, float]] = {}
+
+    def record(self, operation: str, charge: float) -> None:
+        """Add one response's charge to an operation kind."""
+        with self._lock:
+            counters = self._operations.setdefault(operation, {"responses": 0, "request_units": 0.0})
+            counters["responses"] += 1
+            counters["request_units"] += charge
+
+    def hook(self, operation: str) -> ResponseHook:
+        """A response_hook that records the charge of each response under operation."""
+        def response_hook(headers: Mapping[str, str], result: Any) -> None:
+            try:
+                charge = float(headers.get(REQUEST_CHARGE_HEADER, 0) or 0)
+            except (TypeError, ValueError):
+                return
+            self.record(operation, charge)
+
+        return response_hook
+
+    def stats(self) -> dict:
+        """Return responses, total and average RU per operation kind."""
+        with self._lock:
+            return {
+                operation: {
+                    "responses": int(counters["responses"]),
+                    "request_units": round(counters["request_units"], 2),
+                    "avg_request_units": round(counters["request_units"] / counters["responses"], 2)
+                    if counters["responses"]
+                    else 0.0,
+                }
+                for operation, counters in self._operations.items()
+            }
+
+
+# Create a global instance of the request charge statistics
+request_charges = RequestChargeStats()
@@ -6,6 +6,9 @@ from typing import (Any, List, Mapping, Optional)
 from app_config import config
 from context.cosmos_memory_kernel import CosmosMemoryContext
 from event_utils import track_event_if_configured
+from llm.deployment_router import deployment_router
+from llm.rate_limiter import estimate_tokens, rate_limiter
+from llm.single_flight import SingleFlight, action_flights
 from models.messages_kernel import (ActionRequest, ActionResponse,
                                     AgentMessage, Step, StepStatus)
 from semantic_kernel.agents.chat_completion_agent import ChatCompletionAgent
@@ -75,13 +78,18 @@ class BaseAgent(ChatCompletionAgent):
         # Create a kernel with Azure OpenAI service
         kernel = config.create_kernel()
         
-        # Add Azure OpenAI chat service to the kernel
-        chat_service = AzureChatCompletion(
-            deployment_name=config.AZURE_OPENAI_DEPLOYMENT_NAME,
-            endpoint=config.AZURE_OPENAI_ENDPOINT,
-            api_key=config.AZURE_OPENAI_API_KEY,
-            api_version=config.AZURE_OPENAI_API_VERSION,
-        )
+        # Add Azure OpenAI chat service to the kernel, bound to the least loaded
+        # healthy deployment at creation time
+        deployment_target = deployment_router.pick(config.AZURE_OPENAI_DEPLOYMENT_NAME)
+        if deployment_target is not None:
+            chat_service = AzureChatCompletion(**deployment_target.chat_completion_kwargs())
+        else:
+            chat_service = AzureChatCompletion(
+                deployment_name=config.AZURE_OPENAI_DEPLOYMENT_NAME,
+                endpoint=config.AZURE_OPENAI_ENDPOINT,
+                api_key=config.AZURE_OPENAI_API_KEY,
+                api_version=config.AZURE_OPENAI_API_VERSION,
+            )
         kernel.add_service(chat_service)
         
         # Initialize the ChatCompletionAgent
@@ -100,6 +108,7 @@ class BaseAgent(ChatCompletionAgent):
         self._memory_store = memory_store
         self._tools = tools
         self._system_message = system_message
+        self._deployment_target = deployment_target
         self._chat_history = [{"role": "system", "content": self._system_message}]
         # self._agent = None  # Will be initialized in async_init
 
@@ -114,6 +123,44 @@ class BaseAgent(ChatCompletionAgent):
     #         A list of plugins, or None if not applicable.
     #     """
     #     return None
+    async def invoke_with_rate_limit(
+        self, prompt_text: str, max_tokens: int = 0, **invoke_kwargs
+    ) -> str:
+        """Invoke the agent under the deployment's rate limit and collect the response.
+
+        The invocation waits for request/token budget and is retried on 429s and
+        transient errors, so callers only see an error once retries are exhausted.
+
+        Args:
+            prompt_text: Text used to estimate the prompt tokens of the call
+            max_tokens: Completion token budget of the call
+            **invoke_kwargs: Arguments passed to invoke
+
+        Returns:
+            The concatenated response content
+        """
+
+        async def collect() -> str:
+            response_content = ""
+            async for chunk in self.invoke(**invoke_kwargs):
+                if chunk is not None:
+                    response_content += str(chunk)
+            return response_content
+
+        target = self._deployment_target
+        if target is None:
+            return await rate_limiter.call(
+                config.AZURE_OPENAI_DEPLOYMENT_NAME,
+                estimate_tokens(prompt_text, max_tokens),
+                collect,
+            )
+        # The chat service is bound to its deployment, so there is no failover;
+        # failures still put the deployment on cool-down for other callers
+        with deployment_router.track(target):
+            return await rate_limiter.call(
+                target.name, estimate_tokens(prompt_text, max_tokens), collect
+            )
+
     @staticmethod
     def default_system_message(agent_name=None) -> str:
         name = agent_name
@@ -122,12 +169,28 @@ class BaseAgent(ChatCompletionAgent):
     async def handle_action_request(self, action_request: ActionRequest) -> str:
         """Handle an action request from another agent or the system.
 
+        Concurrent identical requests (same agent, step and action) are coalesced
+        into a single agent invocation and share its response.
+
         Args:
             action_request_json: The action request as a JSON string
 
         Returns:
             A JSON string containing the action response
         """
+        key = SingleFlight.make_key(
+            self._agent_name,
+            action_request.session_id,
+            action_request.plan_id,
+            action_request.step_id,
+            action_request.action,
+        )
+        return await action_flights.do(
+            key, lambda: self._handle_action_request(action_request)
+        )
+
+    async def _handle_action_request(self, action_request: ActionRequest) -> str:
+        """Run an action request through the agent and record the result."""
 
         # Get the step from memory
         step: Step = await self._memory_store.get_step(
@@ -164,18 +227,11 @@ class BaseAgent(ChatCompletionAgent):
             # thread = self.client.agents.get_thread(
             #     thread=step.session_id
             # )  # AzureAIAgentThread(thread_id=step.session_id)
-            async_generator = self.invoke(
-                messages=f"{str(self._chat_history)}\n\nPlease perform this action",
-                thread=thread,
+            messages = f"{str(self._chat_history)}\n\nPlease perform this action"
+            response_content = await self.invoke_with_rate_limit(
+                messages, messages=messages, thread=thread
             )
 
-            response_content = ""
-
-            # Collect the response from the async generator
-            async for chunk in async_generator:
-                if chunk is not None:
-                    response_content += str(chunk)
-
             logging.info(f"Response content length: {len(response_content)}")
             logging.info(f"Response content: {response_content}")
 
@@ -338,7 +338,9 @@ class GroupChatManager(BaseAgent):
 
         # generate conversation history for the invoked agent
         plan = await self._memory_store.get_plan_by_session(session_id=session_id)
-        steps: List[Step] = await self._memory_store.get_steps_by_plan(plan.id)
+        steps: List[Step] = await self._memory_store.get_steps_by_plan(
+            plan.id, session_id=plan.session_id
+        )
 
         current_step_id = step.id
         # Initialize the formatted string
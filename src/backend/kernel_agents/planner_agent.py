@@ -329,23 +329,19 @@ class PlannerAgent(BaseAgent):
 
             thread = None
             # thread = self.client.agents.create_thread(thread_id=input_task.session_id)
-            async_generator = self.invoke(
+            max_tokens = 10096  # Ensure we have enough tokens for the full plan
+            # Call invoke with proper keyword arguments; 429s are retried by the rate limiter
+            response_content = await self.invoke_with_rate_limit(
+                str(args),
+                max_tokens,
                 arguments=kernel_args,
                 settings={
                     "temperature": 0.0,  # Keep temperature low for consistent planning
-                    "max_tokens": 10096,  # Ensure we have enough tokens for the full plan
+                    "max_tokens": max_tokens,
                 },
                 thread=thread,
             )
 
-            # Call invoke with proper keyword arguments and JSON response schema
-            response_content = ""
-
-            # Collect the response from the async generator
-            async for chunk in async_generator:
-                if chunk is not None:
-                    response_content += str(chunk)
-
             logging.info(f"Response content length: {len(response_content)}")
 
             # Check if response is empty or whitespace
@@ -443,7 +439,7 @@ class PlannerAgent(BaseAgent):
         except Exception as e:
             error_message = str(e)
             if "Rate limit is exceeded" in error_message:
-                logging.warning("Rate limit hit. Consider retrying after some delay.")
+                logging.warning("Rate limit still exceeded after retries.")
                 raise
             else:
                 logging.exception(f"Error creating structured plan: {e}")
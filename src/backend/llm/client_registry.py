@@ -0,0 +1,153 @@
+"""Process-wide registry of pooled AsyncAzureOpenAI clients."""
+
+import hashlib
+import logging
+import os
+from typing import Dict, Optional, Tuple
+
+import httpx
+from openai import AsyncAzureOpenAI, DefaultAsyncHttpxClient
+
+DEFAULT_API_VERSION = "2024-08-01-preview"
+
+
+class AzureOpenAIClientRegistry:
+    """Holds one AsyncAzureOpenAI client per endpoint/deployment.
+
+    All clients share a single keep-alive httpx connection pool, so TLS and
+    connection setup are paid once per process instead of once per call. The
+    registry is opened lazily on first use and closed from the FastAPI lifespan.
+    """
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        request_timeout: Optional[float] = None,
+        sdk_max_retries: Optional[int] = None,
+    ) -> None:
+        """Initialize the registry with connection pool limits.
+
+        Args:
+            max_connections: Maximum number of open connections in the shared pool
+            max_keepalive_connections: Maximum number of idle keep-alive connections
+            keepalive_expiry: Seconds an idle connection is kept open
+            request_timeout: Default request timeout in seconds
+            sdk_max_retries: Retries done by the OpenAI SDK itself (the rate
+                limiter schedules retries, so this defaults to 0)
+        """
+        self.max_connections = max_connections or int(
+            os.getenv("AZURE_OPENAI_MAX_CONNECTIONS", "100")
+        )
+        self.max_keepalive_connections = max_keepalive_connections or int(
+            os.getenv("AZURE_OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20")
+        )
+        self.keepalive_expiry = keepalive_expiry or float(
+            os.getenv("AZURE_OPENAI_KEEPALIVE_EXPIRY_SECONDS", "30")
+        )
+        self.request_timeout = request_timeout or float(
+            os.getenv("AZURE_OPENAI_REQUEST_TIMEOUT_SECONDS", "120")
+        )
+        self.sdk_max_retries = (
+            sdk_max_retries
+            if sdk_max_retries is not None
+            else int(os.getenv("AZURE_OPENAI_SDK_MAX_RETRIES", "0"))
+        )
+
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._clients: Dict[Tuple[str, str, str, str], AsyncAzureOpenAI] = {}
+
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Return the shared httpx client, creating it on first use."""
+        if self._http_client is None or self._http_client.is_closed:
+            # Clients bound to a closed pool cannot be reused
+            self._clients.clear()
+            self._http_client = DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+                timeout=httpx.Timeout(self.request_timeout, connect=10.0),
+            )
+            logging.info(
+                "Created shared Azure OpenAI connection pool (max=%s, keepalive=%s)",
+                self.max_connections,
+                self.max_keepalive_connections,
+            )
+        return self._http_client
+
+    def get_client(
+        self,
+        endpoint: str,
+        deployment: str,
+        api_key: Optional[str] = None,
+        api_version: Optional[str] = None,
+        azure_ad_token_provider=None,
+    ) -> AsyncAzureOpenAI:
+        """Get the pooled client for an endpoint/deployment, creating it if needed.
+
+        Args:
+            endpoint: The Azure OpenAI endpoint URL
+            deployment: The deployment name the client is bound to
+            api_key: Optional API key (token provider is used when omitted)
+            api_version: Optional API version
+            azure_ad_token_provider: Optional Entra ID token provider
+
+        Returns:
+            The shared AsyncAzureOpenAI client for this endpoint/deployment
+        """
+        if not endpoint:
+            raise ValueError("An Azure OpenAI endpoint is required")
+        if not api_key and azure_ad_token_provider is None:
+            raise ValueError("Either api_key or azure_ad_token_provider is required")
+
+        api_version = api_version or DEFAULT_API_VERSION
+        # Key on a digest of the credential so rotated keys get a fresh client
+        key_digest = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+        cache_key = (endpoint.rstrip("/"), deployment, api_version, key_digest)
+
+        http_client = self._get_http_client()
+        client = self._clients.get(cache_key)
+        if client is None:
+            client = AsyncAzureOpenAI(
+                azure_endpoint=endpoint,
+                azure_deployment=deployment,
+                api_key=api_key,
+                api_version=api_version,
+                azure_ad_token_provider=azure_ad_token_provider,
+                http_client=http_client,
+                max_retries=self.sdk_max_retries,
+            )
+            self._clients[cache_key] = client
+            logging.info(
+                "Registered pooled AsyncAzureOpenAI client for %s / %s",
+                endpoint,
+                deployment,
+            )
+        return client
+
+    def stats(self) -> dict:
+        """Return registry statistics for diagnostics."""
+        return {
+            "clients": len(self._clients),
+            "pool_open": self._http_client is not None and not self._http_client.is_closed,
+            "max_connections": self.max_connections,
+            "max_keepalive_connections": self.max_keepalive_connections,
+            "keepalive_expiry": self.keepalive_expiry,
+        }
+
+    async def aclose(self) -> None:
+        """Close the shared connection pool and drop all clients."""
+        self._clients.clear()
+        if self._http_client is not None:
+            try:
+                await self._http_client.aclose()
+            except Exception as e:
+                logging.warning(f"Error closing Azure OpenAI connection pool: {e}")
+            self._http_client = None
+
+
+# Create a global instance of the registry
+client_registry = AzureOpenAIClientRegistry()
@@ -0,0 +1,303 @@
+"""Load balancing of LLM calls across Azure OpenAI endpoints and deployments."""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, List, Optional, TypeVar
+from urllib.parse import urlparse
+
+import numpy as np
+
+from llm.rate_limiter import (
+    RateLimiterRegistry,
+    is_rate_limit_error,
+    is_transient_error,
+    rate_limiter,
+    retry_after_seconds,
+)
+
+T = TypeVar("T")
+
+DEFAULT_API_VERSION = "2024-08-01-preview"
+
+
+@dataclass(eq=False)
+class DeploymentTarget:
+    """One endpoint + deployment that can serve a model, with its health state."""
+
+    name: str
+    endpoint: str
+    deployment: str
+    model: str
+    api_key: Optional[str] = None
+    api_version: str = DEFAULT_API_VERSION
+    weight: float = 1.0
+    outstanding: int = 0
+    cooldown_until: float = 0.0
+    counters: Dict[str, int] = field(
+        default_factory=lambda: {
+            "requests": 0,
+            "successes": 0,
+            "failures": 0,
+            "throttled": 0,
+            "server_errors": 0,
+            "cooldowns": 0,
+        }
+    )
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=200))
+
+    def cooling_down(self, now: float) -> bool:
+        return self.cooldown_until > now
+
+    def chat_completion_kwargs(self) -> Dict[str, Any]:
+        """Keyword arguments for semantic_kernel's AzureChatCompletion."""
+        return {
+            "deployment_name": self.deployment,
+            "endpoint": self.endpoint,
+            "api_key": self.api_key,
+            "api_version": self.api_version,
+        }
+
+
+def parse_deployment_targets(
+    raw: Optional[str],
+    default_endpoint: Optional[str],
+    default_deployment: Optional[str],
+    default_api_key: Optional[str] = None,
+    default_api_version: Optional[str] = None,
+) -> List[DeploymentTarget]:
+    """Build targets from an AZURE_OPENAI_DEPLOYMENTS JSON list.
+
+    Each entry has endpoint, deployment and optionally api_key, api_version,
+    weight, name (defaulting to the deployment name) and model (the model group
+    it serves, defaulting to the deployment name). Missing fields fall back to
+    the single-endpoint settings. Without a list, the single endpoint and
+    deployment is the only target.
+
+    Args:
+        raw: The JSON list (may be empty)
+        default_endpoint: AZURE_OPENAI_ENDPOINT
+        default_deployment: AZURE_OPENAI_DEPLOYMENT_NAME
+        default_api_key: AZURE_OPENAI_API_KEY
+        default_api_version: AZURE_OPENAI_API_VERSION
+
+    Returns:
+        The list of targets (empty when nothing is configured)
+
+    Raises:
+        ValueError: If the list is not valid JSON or an entry lacks an endpoint/deployment
+    """
+    default_api_version = default_api_version or DEFAULT_API_VERSION
+    if not raw:
+        if not default_endpoint or not default_deployment:
+            return []
+        entries = [{"endpoint": default_endpoint, "deployment": default_deployment}]
+    else:
+        try:
+            entries = json.loads(raw)
+        except ValueError as e:
+            raise ValueError(f"AZURE_OPENAI_DEPLOYMENTS is not valid JSON: {e}") from e
+        if not isinstance(entries, list):
+            raise ValueError("AZURE_OPENAI_DEPLOYMENTS must be a JSON list")
+
+    targets: List[DeploymentTarget] = []
+    for entry in entries:
+        endpoint = entry.get("endpoint") or default_endpoint
+        deployment = entry.get("deployment") or default_deployment
+        if not endpoint or not deployment:
+            raise ValueError(f"Deployment entry needs an endpoint and a deployment: {entry}")
+        # Names key the rate limits (AZURE_OPENAI_RATE_LIMITS) and stats
+        name = entry.get("name") or deployment
+        if any(target.name == name for target in targets):
+            name = f"{deployment}@{urlparse(endpoint).hostname or endpoint}"
+        targets.append(
+            DeploymentTarget(
+                name=name,
+                endpoint=endpoint,
+                deployment=deployment,
+                model=entry.get("model") or deployment,
+                api_key=entry.get("api_key") or default_api_key,
+                api_version=entry.get("api_version") or default_api_version,
+                weight=max(float(entry.get("weight", 1.0)), 0.01),
+            )
+        )
+    return targets
+
+
+class DeploymentRouter:
+    """Weighted least-outstanding-requests router with cool-downs.
+
+    A request for a model goes to the target serving that model with the lowest
+    (outstanding + 1) / weight. Targets that answer 429 or 5xx are taken out of
+    rotation for their retry-after (or ROUTER_COOLDOWN_SECONDS) and the call
+    fails over to the next target. If every target is cooling down, the one
+    that recovers first is used and the rate limiter holds the call until then.
+    """
+
+    def __init__(
+        self,
+        targets: Optional[List[DeploymentTarget]] = None,
+        cooldown_seconds: Optional[float] = None,
+        limiter: Optional[RateLimiterRegistry] = None,
+    ) -> None:
+        """Initialize the router.
+
+        Args:
+            targets: The targets (loaded from the environment on first use when None)
+            cooldown_seconds: Cool-down when a failure carries no retry-after
+            limiter: Rate limiter registry used per target (defaults to the global one)
+        """
+        self._targets = targets
+        self.cooldown_seconds = cooldown_seconds or float(os.getenv("ROUTER_COOLDOWN_SECONDS", "30"))
+        self.limiter = limiter or rate_limiter
+
+    @property
+    def targets(self) -> List[DeploymentTarget]:
+        if self._targets is None:
+            # Read lazily so .env has been loaded by the time the router is used
+            try:
+                self._targets = parse_deployment_targets(
+                    os.getenv("AZURE_OPENAI_DEPLOYMENTS", ""),
+                    os.getenv("AZURE_OPENAI_ENDPOINT"),
+                    os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4o"),
+                    os.getenv("AZURE_OPENAI_API_KEY"),
+                    os.getenv("AZURE_OPENAI_API_VERSION"),
+                )
+            except ValueError as e:
+                logging.error(f"Invalid deployment list, routing disabled: {e}")
+                self._targets = []
+            logging.info("Deployment router loaded %s targets", len(self._targets))
+        return self._targets
+
+    def candidates(self, model: str) -> List[DeploymentTarget]:
+        """Return the targets that serve a model."""
+        return [target for target in self.targets if target.model == model]
+
+    def pick(self, model: str, exclude: Optional[List[DeploymentTarget]] = None) -> Optional[DeploymentTarget]:
+        """Choose a target for a model, or None if no target serves it."""
+        candidates = [t for t in self.candidates(model) if not exclude or t not in exclude]
+        if not candidates:
+            return None
+        now = time.monotonic()
+        healthy = [t for t in candidates if not t.cooling_down(now)]
+        if not healthy:
+            return min(candidates, key=lambda t: t.cooldown_until)
+        best = min((t.outstanding + 1) / t.weight for t in healthy)
+        # Break ties randomly so equal targets share the load
+        return random.choice([t for t in healthy if (t.outstanding + 1) / t.weight == best])
+
+    def cool_down(self, target: DeploymentTarget, seconds: Optional[float] = None) -> None:
+        """Take a target out of rotation."""
+        seconds = self.cooldown_seconds if seconds is None else seconds
+        target.cooldown_until = max(target.cooldown_until, time.monotonic() + seconds)
+        target.counters["cooldowns"] += 1
+        self.limiter.get(target.name).penalize(seconds)
+        logging.warning(f"Deployment {target.name} cooling down for {seconds:.1f}s")
+
+    @contextmanager
+    def track(self, target: DeploymentTarget) -> Iterator[None]:
+        """Count a call against a target and record its latency and outcome."""
+        target.outstanding += 1
+        target.counters["requests"] += 1
+        started = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            target.counters["failures"] += 1
+            if is_rate_limit_error(e):
+                target.counters["throttled"] += 1
+                self.cool_down(target, retry_after_seconds(e))
+            elif is_transient_error(e):
+                target.counters["server_errors"] += 1
+                self.cool_down(target)
+            raise
+        else:
+            target.counters["successes"] += 1
+            target.latencies.append(time.monotonic() - started)
+        finally:
+            target.outstanding -= 1
+
+    async def call(
+        self,
+        model: str,
+        estimated_tokens: int,
+        fn: Callable[[DeploymentTarget], Awaitable[T]],
+        usage_tokens: Optional[Callable[[T], Optional[int]]] = None,
+        avoid: Optional[List[DeploymentTarget]] = None,
+        on_target: Optional[Callable[[DeploymentTarget], None]] = None,
+    ) -> T:
+        """Run fn against a target for model, failing over on 429/5xx.
+
+        Args:
+            model: The model group (deployment name the caller asked for)
+            estimated_tokens: Estimated prompt + completion tokens
+            fn: Called with the chosen target, returns the awaitable to run
+            usage_tokens: Optional function extracting actual token usage from the result
+            avoid: Targets to use only when no other target serves the model
+            on_target: Called with each target the call is sent to
+
+        Returns:
+            The result of fn
+
+        Raises:
+            ValueError: If no target serves the model
+        """
+        tried: List[DeploymentTarget] = []
+        while True:
+            target = self.pick(model, exclude=tried + (avoid or [])) or self.pick(model, exclude=tried)
+            if target is None:
+                if not tried:
+                    raise ValueError(f"No deployment configured for model '{model}'")
+                target = self.pick(model)
+            tried.append(target)
+            if on_target is not None:
+                on_target(target)
+            # With another target to fail over to, do not wait out retries here
+            can_fail_over = self.pick(model, exclude=tried) is not None
+            try:
+                with self.track(target):
+                    return await self.limiter.call(
+                        target.name,
+                        estimated_tokens,
+                        lambda: fn(target),
+                        usage_tokens=usage_tokens,
+                        max_retries=0 if can_fail_over else None,
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if not can_fail_over or not (is_rate_limit_error(e) or is_transient_error(e)):
+                    raise
+                logging.warning(f"Deployment {target.name} failed, failing over: {e}")
+
+    def stats(self) -> dict:
+        """Return per-target health, load and latency."""
+        now = time.monotonic()
+        targets = {}
+        for target in self.targets:
+            latencies = np.fromiter(target.latencies, dtype=np.float64)
+            targets[target.name] = {
+                "model": target.model,
+                "deployment": target.deployment,
+                "weight": target.weight,
+                "outstanding": target.outstanding,
+                "healthy": not target.cooling_down(now),
+                "cooldown_remaining_seconds": round(max(0.0, target.cooldown_until - now), 3),
+                **target.counters,
+                "latency_seconds": (
+                    {f"p{p}": round(float(np.percentile(latencies, p)), 4) for p in (50, 90, 99)}
+                    if latencies.size
+                    else {}
+                ),
+            }
+        return {"cooldown_seconds": self.cooldown_seconds, "targets": targets}
+
+
+# Create a global instance of the deployment router
+deployment_router = DeploymentRouter()
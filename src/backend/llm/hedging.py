@@ -0,0 +1,177 @@
+"""Hedged requests: duplicate slow LLM calls to a second deployment."""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+import numpy as np
+
+T = TypeVar("T")
+
+# An attempt is called with its index (0 = primary, 1 = hedge) and a callback
+# it must call when the first token arrives
+Attempt = Callable[[int, Callable[[], None]], Awaitable[T]]
+
+
+class HedgedRequests:
+    """Sends a duplicate request when the primary has no first token in time.
+
+    The hedge delay adapts per key (agent type + deployment): it is the rolling
+    percentile of observed time-to-first-token, or default_delay until enough
+    samples exist. The first attempt to finish wins and the other is cancelled.
+    Hedges are limited to budget_ratio of the requests in a rolling window so
+    hedging can never more than slightly increase the load on the service.
+    """
+
+    def __init__(
+        self,
+        percentile: Optional[float] = None,
+        budget_ratio: Optional[float] = None,
+        default_delay: Optional[float] = None,
+        min_delay: Optional[float] = None,
+        min_samples: int = 20,
+        window: int = 200,
+    ) -> None:
+        """Initialize the hedging policy.
+
+        Args:
+            percentile: Percentile of time-to-first-token used as the hedge delay
+            budget_ratio: Maximum share of requests that may be hedged
+            default_delay: Hedge delay in seconds before enough samples exist
+            min_delay: Lower bound for the adaptive delay in seconds
+            min_samples: Samples needed before the adaptive delay is used
+            window: Size of the rolling latency and budget windows
+        """
+        self.percentile = percentile or float(os.getenv("HEDGE_PERCENTILE", "90"))
+        self.budget_ratio = budget_ratio if budget_ratio is not None else float(
+            os.getenv("HEDGE_BUDGET_RATIO", "0.1")
+        )
+        self.default_delay = default_delay or float(os.getenv("HEDGE_DEFAULT_DELAY_SECONDS", "10"))
+        self.min_delay = min_delay if min_delay is not None else float(
+            os.getenv("HEDGE_MIN_DELAY_SECONDS", "1")
+        )
+        self.min_samples = min_samples
+        self._window = window
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._recent_hedged: Deque[bool] = deque(maxlen=window)
+        self._counters = {
+            "requests": 0,
+            "hedges_sent": 0,
+            "hedge_wins": 0,
+            "primary_wins_after_hedge": 0,
+            "budget_denied": 0,
+            "no_secondary": 0,
+        }
+
+    def delay_for(self, key: str) -> float:
+        """Return the current hedge delay for a key."""
+        samples = self._latencies.get(key)
+        if not samples or len(samples) < self.min_samples:
+            return self.default_delay
+        observed = np.percentile(np.fromiter(samples, dtype=np.float64), self.percentile)
+        return max(self.min_delay, float(observed))
+
+    def record_first_token(self, key: str, seconds: float) -> None:
+        """Add a time-to-first-token sample for a key."""
+        self._latencies.setdefault(key, deque(maxlen=self._window)).append(seconds)
+
+    def _budget_allows(self) -> bool:
+        hedged = sum(self._recent_hedged)
+        return hedged < self.budget_ratio * max(len(self._recent_hedged), 1)
+
+    async def run(self, key: str, attempt: Attempt, can_hedge: bool = True) -> T:
+        """Run attempt, hedging it with a second attempt when it is slow.
+
+        Args:
+            key: Latency key, e.g. "agent_type:deployment"
+            attempt: Coroutine function (index, on_first_token) -> result
+            can_hedge: False when there is no secondary deployment to hedge to
+
+        Returns:
+            The result of the attempt that finished first
+        """
+        self._counters["requests"] += 1
+        first_token = asyncio.Event()
+        started = time.monotonic()
+
+        primary = asyncio.ensure_future(attempt(0, self._first_token_callback(key, first_token)))
+        first_token_wait = asyncio.ensure_future(first_token.wait())
+        try:
+            await asyncio.wait(
+                {primary, first_token_wait},
+                timeout=self.delay_for(key),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+        except asyncio.CancelledError:
+            primary.cancel()
+            raise
+        finally:
+            first_token_wait.cancel()
+
+        if primary.done() or first_token.is_set() or not self._hedge_allowed(can_hedge):
+            self._recent_hedged.append(False)
+            return await primary
+
+        self._recent_hedged.append(True)
+        self._counters["hedges_sent"] += 1
+        logging.info(f"Hedging {key} after {time.monotonic() - started:.2f}s without a first token")
+        hedge = asyncio.ensure_future(attempt(1, self._first_token_callback(key, asyncio.Event())))
+        return await self._first_success(primary, hedge)
+
+    def _first_token_callback(self, key: str, event: asyncio.Event) -> Callable[[], None]:
+        """Return a callback that records time-to-first-token once and sets event."""
+        started = time.monotonic()
+
+        def on_first_token() -> None:
+            if not event.is_set():
+                event.set()
+                self.record_first_token(key, time.monotonic() - started)
+
+        return on_first_token
+
+    def _hedge_allowed(self, can_hedge: bool) -> bool:
+        if not can_hedge:
+            self._counters["no_secondary"] += 1
+            return False
+        if not self._budget_allows():
+            self._counters["budget_denied"] += 1
+            return False
+        return True
+
+    async def _first_success(self, primary: asyncio.Future, hedge: asyncio.Future) -> T:
+        """Return the first successful result and cancel the other attempt."""
+        pending = {primary, hedge}
+        first_error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        winner = "hedge_wins" if task is hedge else "primary_wins_after_hedge"
+                        self._counters[winner] += 1
+                        return task.result()
+                    if first_error is None or task is primary:
+                        first_error = task.exception()
+            raise first_error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> dict:
+        """Return hedge counts, win rates, budget use and current delays."""
+        hedges = self._counters["hedges_sent"]
+        requests = self._counters["requests"]
+        return {
+            **self._counters,
+            "hedge_rate": round(hedges / requests, 4) if requests else 0.0,
+            "hedge_win_rate": round(self._counters["hedge_wins"] / hedges, 4) if hedges else 0.0,
+            "budget_ratio": self.budget_ratio,
+            "delays_seconds": {key: round(self.delay_for(key), 3) for key in self._latencies},
+        }
+
+
+# Create a global instance of the hedging policy
+hedged_requests = HedgedRequests()
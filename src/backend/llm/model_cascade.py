@@ -0,0 +1,211 @@
+"""Model cascade: answer simple scenarios with a small deployment, escalate hard ones."""
+
+import json
+import logging
+import os
+import re
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from llm.rate_limiter import CHARS_PER_TOKEN
+
+TIERS = ("small", "large")
+
+# Words that tend to mark multi-step or cross-domain scenarios
+COMPLEXITY_SIGNALS = (
+    "strategie", "integratie", "migratie", "afweging", "risico", "compliance", "internationaal",
+    "meerdere", "vergelijk", "reorganisatie", "overname", "fusie", "wetgeving", "architectuur",
+    "tegelijk", "afhankelijk", "scenario's",
+)
+
+CONFIDENCE_INSTRUCTION = (
+    "\n\nSluit af met een laatste regel 'ZEKERHEID: <getal tussen 0 en 1>' "
+    "die aangeeft hoe zeker je bent dat je antwoord volledig en juist is."
+)
+_CONFIDENCE_PATTERN = re.compile(r"\s*\**\s*ZEKERHEID:\s*\**\s*([01](?:[.,]\d+)?)\s*\**\s*$", re.IGNORECASE)
+
+
+def estimate_complexity(text: str) -> float:
+    """Heuristic complexity of a scenario in [0, 1].
+
+    Half of the score is length (saturating at about 150 tokens), a quarter the
+    number of clauses and questions and a quarter domain words that signal
+    multi-step or cross-domain work.
+    """
+    text = text or ""
+    lowered = text.lower()
+    length = min(1.0, (len(text) / CHARS_PER_TOKEN) / 150)
+    clauses = len(re.findall(r"[.?!;\n]|\b(?:en|maar|of|and|but)\b", lowered))
+    structure = min(1.0, clauses / 4)
+    signals = min(1.0, sum(1 for word in COMPLEXITY_SIGNALS if word in lowered) / 3)
+    return round(0.5 * length + 0.25 * structure + 0.25 * signals, 4)
+
+
+def add_confidence_instruction(messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Copy of messages whose system message asks for a self-reported confidence."""
+    result = [dict(message) for message in messages]
+    for message in result:
+        if message["role"] == "system":
+            message["content"] += CONFIDENCE_INSTRUCTION
+            break
+    return result
+
+
+def split_confidence(text: str) -> Tuple[str, Optional[float]]:
+    """Strip a trailing 'ZEKERHEID: x' line and return (answer, confidence)."""
+    match = _CONFIDENCE_PATTERN.search(text or "")
+    if match is None:
+        return text, None
+    return text[: match.start()].rstrip(), float(match.group(1).replace(",", "."))
+
+
+@dataclass
+class CascadePolicy:
+    """How an agent picks between a small and a large deployment."""
+
+    small_model: str
+    large_model: str
+    complexity_threshold: float = 0.5
+    # 0 disables the self-reported confidence check
+    confidence_threshold: float = 0.0
+
+    @property
+    def uses_confidence(self) -> bool:
+        return self.confidence_threshold > 0
+
+
+class ModelCascade:
+    """Cascade policies plus per-tier latency, token and cost statistics.
+
+    Agents opt in with a "cascade" entry next to temperature/max_tokens, e.g.
+    {"small_model": "gpt-4o-mini", "complexity_threshold": 0.5,
+    "confidence_threshold": 0.6}; CASCADE_SMALL_MODEL enables it for every agent
+    and "cascade": false opts an agent out. Costs use MODEL_PRICES, USD per
+    million prompt and completion tokens per model.
+    """
+
+    def __init__(
+        self,
+        small_model: Optional[str] = None,
+        complexity_threshold: Optional[float] = None,
+        confidence_threshold: Optional[float] = None,
+        prices: Optional[Dict[str, Dict[str, float]]] = None,
+        window: int = 200,
+    ) -> None:
+        """Initialize the cascade.
+
+        Args:
+            small_model: Default small deployment (empty disables the default policy)
+            complexity_threshold: Default complexity at which calls go straight to the large model
+            confidence_threshold: Default self-reported confidence below which answers escalate
+            prices: USD per million tokens, {"model": {"prompt": x, "completion": y}}
+            window: Latency samples kept per tier
+        """
+        self.small_model = small_model if small_model is not None else os.getenv("CASCADE_SMALL_MODEL", "")
+        self.complexity_threshold = complexity_threshold if complexity_threshold is not None else float(
+            os.getenv("CASCADE_COMPLEXITY_THRESHOLD", "0.5")
+        )
+        self.confidence_threshold = confidence_threshold if confidence_threshold is not None else float(
+            os.getenv("CASCADE_CONFIDENCE_THRESHOLD", "0")
+        )
+        if prices is None:
+            try:
+                prices = json.loads(os.getenv("MODEL_PRICES", "") or "{}")
+            except ValueError:
+                logging.warning("MODEL_PRICES is not valid JSON, ignoring")
+                prices = {}
+        self.prices = prices
+        self._latencies: Dict[str, Deque[float]] = {tier: deque(maxlen=window) for tier in TIERS}
+        self._tiers: Dict[str, Dict[str, Any]] = {
+            tier: {"calls": 0, "failures": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0}
+            for tier in TIERS
+        }
+        self._decisions = {
+            "small_first": 0,
+            "direct_large": 0,
+            "escalated_low_confidence": 0,
+            "escalated_small_failure": 0,
+            "confidence_missing": 0,
+        }
+
+    def policy_for(self, agent_config: dict, large_model: str) -> Optional[CascadePolicy]:
+        """Return the cascade policy of an agent, or None when it has none."""
+        settings = agent_config.get("cascade")
+        if settings is False:
+            return None
+        settings = settings if isinstance(settings, dict) else {}
+        small_model = settings.get("small_model") or self.small_model
+        if not small_model or small_model == large_model:
+            return None
+        return CascadePolicy(
+            small_model=small_model,
+            large_model=large_model,
+            complexity_threshold=float(settings.get("complexity_threshold", self.complexity_threshold)),
+            confidence_threshold=float(settings.get("confidence_threshold", self.confidence_threshold)),
+        )
+
+    def choose(self, policy: CascadePolicy, complexity: float) -> str:
+        """Return the tier to start with for a scenario of the given complexity."""
+        tier = "large" if complexity >= policy.complexity_threshold else "small"
+        self._decisions["direct_large" if tier == "large" else "small_first"] += 1
+        return tier
+
+    def accepts(self, policy: CascadePolicy, confidence: Optional[float]) -> bool:
+        """Return True if a small-tier answer is kept, False if it must escalate."""
+        if not policy.uses_confidence:
+            return True
+        if confidence is None:
+            # An answer without the confidence line is kept; escalating would double the cost
+            self._decisions["confidence_missing"] += 1
+            return True
+        if confidence < policy.confidence_threshold:
+            self._decisions["escalated_low_confidence"] += 1
+            return False
+        return True
+
+    def record_failure(self, tier: str) -> None:
+        """Count a failed tier call; a failed small call escalates."""
+        self._tiers[tier]["failures"] += 1
+        if tier == "small":
+            self._decisions["escalated_small_failure"] += 1
+
+    def record(self, tier: str, model: str, seconds: float, prompt_tokens: int, completion_tokens: int) -> None:
+        """Record latency, tokens and cost of one successful tier call."""
+        counters = self._tiers[tier]
+        counters["calls"] += 1
+        counters["prompt_tokens"] += prompt_tokens
+        counters["completion_tokens"] += completion_tokens
+        price = self.prices.get(model, {})
+        counters["cost_usd"] += (
+            prompt_tokens * price.get("prompt", 0.0) + completion_tokens * price.get("completion", 0.0)
+        ) / 1_000_000
+        self._latencies[tier].append(seconds)
+
+    def stats(self) -> dict:
+        """Return per-tier calls, latency percentiles, tokens and cost, plus decisions."""
+        tiers = {}
+        for tier, counters in self._tiers.items():
+            latencies = np.fromiter(self._latencies[tier], dtype=np.float64)
+            tiers[tier] = {
+                **counters,
+                "cost_usd": round(counters["cost_usd"], 6),
+                "latency_seconds": (
+                    {f"p{p}": round(float(np.percentile(latencies, p)), 4) for p in (50, 90, 99)}
+                    if latencies.size
+                    else {}
+                ),
+            }
+        return {
+            "default_small_model": self.small_model or None,
+            "complexity_threshold": self.complexity_threshold,
+            "confidence_threshold": self.confidence_threshold,
+            "tiers": tiers,
+            "decisions": dict(self._decisions),
+        }
+
+
+# Create a global instance of the model cascade
+model_cascade = ModelCascade()
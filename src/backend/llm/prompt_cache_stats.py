@@ -0,0 +1,81 @@
+"""Per-call accounting of prompt tokens served from the service's prompt cache."""
+
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+
+def cached_prompt_tokens(usage: Any) -> Optional[int]:
+    """Read usage.prompt_tokens_details.cached_tokens, or None if not reported."""
+    details = getattr(usage, "prompt_tokens_details", None)
+    if details is None and isinstance(usage, dict):
+        details = usage.get("prompt_tokens_details")
+    if details is None:
+        return None
+    cached = details.get("cached_tokens") if isinstance(details, dict) else getattr(details, "cached_tokens", None)
+    return int(cached) if isinstance(cached, (int, float)) else None
+
+
+class PromptCacheStats:
+    """Counts prompt and cached prompt tokens per key (agent type + layout).
+
+    Azure OpenAI caches prompt prefixes of 1024 tokens and more and reports the
+    reused part as cached_tokens; comparing the cached share per prompt layout
+    shows whether a stable prefix actually pays off.
+    """
+
+    def __init__(self, recent: int = 100) -> None:
+        """Initialize the stats.
+
+        Args:
+            recent: Number of per-call records kept for inspection
+        """
+        self._keys: Dict[str, Dict[str, int]] = {}
+        self._recent: Deque[dict] = deque(maxlen=recent)
+
+    def record(self, key: str, usage: Any) -> None:
+        """Record the usage of one completion.
+
+        Args:
+            key: Stats key, e.g. "hr:prefix"
+            usage: The usage object (or dict) of the response; ignored when None
+        """
+        if usage is None:
+            return
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        if prompt_tokens is None and isinstance(usage, dict):
+            prompt_tokens = usage.get("prompt_tokens")
+        if not isinstance(prompt_tokens, (int, float)):
+            return
+        cached = cached_prompt_tokens(usage)
+        counters = self._keys.setdefault(
+            key, {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "calls_with_cache_hit": 0}
+        )
+        counters["calls"] += 1
+        counters["prompt_tokens"] += int(prompt_tokens)
+        counters["cached_tokens"] += cached or 0
+        if cached:
+            counters["calls_with_cache_hit"] += 1
+        self._recent.append({
+            "key": key,
+            "prompt_tokens": int(prompt_tokens),
+            "cached_tokens": cached,
+            "timestamp": time.time(),
+        })
+        logging.debug(f"Prompt usage {key}: {prompt_tokens} prompt tokens, {cached} cached")
+
+    def stats(self) -> dict:
+        """Return per-key totals and cached share, plus the most recent calls."""
+        keys = {}
+        for key, counters in self._keys.items():
+            prompt_tokens = counters["prompt_tokens"]
+            keys[key] = {
+                **counters,
+                "cached_ratio": round(counters["cached_tokens"] / prompt_tokens, 4) if prompt_tokens else 0.0,
+            }
+        return {"keys": keys, "recent": list(self._recent)}
+
+
+# Create a global instance of the prompt cache stats
+prompt_cache_stats = PromptCacheStats()
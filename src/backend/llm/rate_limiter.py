@@ -0,0 +1,325 @@
+"""429-aware rate limiting and retry scheduling for Azure OpenAI deployments."""
+
+import asyncio
+import email.utils
+import json
+import logging
+import os
+import random
+import time
+from datetime import timezone
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Rough characters-per-token ratio used for token estimates
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str, max_tokens: int = 0) -> int:
+    """Estimate the TPM cost of a request: prompt tokens plus the completion budget."""
+    return max(1, len(text or "") // CHARS_PER_TOKEN) + max(0, int(max_tokens or 0))
+
+
+def _error_chain(exc: BaseException):
+    """Yield an exception and its causes/contexts."""
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        yield exc
+        exc = exc.__cause__ or exc.__context__
+
+
+def is_rate_limit_error(exc: BaseException) -> bool:
+    """Return True if an exception (or one it wraps) is a 429 from the service."""
+    for error in _error_chain(exc):
+        if getattr(error, "status_code", None) == 429:
+            return True
+        message = str(error)
+        if "Rate limit is exceeded" in message or "Error code: 429" in message:
+            return True
+    return False
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """Return True for 5xx responses, timeouts and connection errors."""
+    for error in _error_chain(exc):
+        status_code = getattr(error, "status_code", None)
+        if isinstance(status_code, int) and status_code >= 500:
+            return True
+        if type(error).__name__ in ("APIConnectionError", "APITimeoutError", "ConnectError", "ReadTimeout"):
+            return True
+    return False
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Read retry-after-ms / retry-after from the response headers of an error."""
+    for error in _error_chain(exc):
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None)
+        if not headers:
+            continue
+        retry_after_ms = headers.get("retry-after-ms")
+        if retry_after_ms:
+            try:
+                return float(retry_after_ms) / 1000.0
+            except ValueError:
+                pass
+        retry_after = headers.get("retry-after")
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+            try:
+                parsed = email.utils.parsedate_to_datetime(retry_after)
+            except (TypeError, ValueError):
+                # An unparseable header must not replace the 429 it came with
+                return None
+            if parsed.tzinfo is None:
+                # HTTP dates are GMT
+                parsed = parsed.replace(tzinfo=timezone.utc)
+            return max(0.0, parsed.timestamp() - time.time())
+    return None
+
+
+class TokenBucket:
+    """A continuously refilling token bucket. A rate of 0 means unlimited."""
+
+    def __init__(self, per_minute: float) -> None:
+        self.capacity = float(per_minute)
+        self.rate = float(per_minute) / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity <= 0
+
+    def refill(self, now: float) -> None:
+        if self.unlimited:
+            return
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount tokens are available (0 if available now)."""
+        if self.unlimited or self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        if not self.unlimited:
+            self.tokens -= amount
+
+
+class DeploymentRateLimiter:
+    """Request and token budget for one deployment.
+
+    Callers queue in FIFO order instead of failing; a 429 with a retry-after
+    header pauses the whole deployment until the service accepts traffic again.
+    """
+
+    def __init__(self, name: str, requests_per_minute: float = 0, tokens_per_minute: float = 0) -> None:
+        """Initialize the limiter.
+
+        Args:
+            name: The deployment name
+            requests_per_minute: RPM quota (0 for unlimited)
+            tokens_per_minute: TPM quota (0 for unlimited)
+        """
+        self.name = name
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+        self._queue_depth = 0
+        self._counters = {
+            "acquired": 0,
+            "throttled": 0,
+            "retries": 0,
+            "max_queue_depth": 0,
+            "total_wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+        }
+
+    async def acquire(self, estimated_tokens: int = 1) -> float:
+        """Wait for request and token budget. Returns the seconds spent waiting."""
+        started = time.monotonic()
+        self._queue_depth += 1
+        self._counters["max_queue_depth"] = max(self._counters["max_queue_depth"], self._queue_depth)
+        try:
+            # The lock hands out turns in arrival order
+            async with self._lock:
+                # A single request larger than the whole TPM budget must still pass
+                needed = min(float(estimated_tokens), self._tokens.capacity) if not self._tokens.unlimited else 0.0
+                while True:
+                    now = time.monotonic()
+                    self._requests.refill(now)
+                    self._tokens.refill(now)
+                    delay = max(
+                        self._blocked_until - now,
+                        self._requests.wait_time(1.0),
+                        self._tokens.wait_time(needed),
+                    )
+                    if delay <= 0:
+                        self._requests.consume(1.0)
+                        self._tokens.consume(needed)
+                        break
+                    await asyncio.sleep(delay)
+        finally:
+            self._queue_depth -= 1
+
+        waited = time.monotonic() - started
+        self._counters["acquired"] += 1
+        self._counters["total_wait_seconds"] += waited
+        self._counters["max_wait_seconds"] = max(self._counters["max_wait_seconds"], waited)
+        return waited
+
+    def penalize(self, delay_seconds: float) -> None:
+        """Pause the deployment for delay_seconds after a 429."""
+        self._counters["throttled"] += 1
+        self._blocked_until = max(self._blocked_until, time.monotonic() + delay_seconds)
+
+    def record_retry(self) -> None:
+        """Count a retried call."""
+        self._counters["retries"] += 1
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: Optional[int]) -> None:
+        """Correct the token bucket once the real usage of a call is known."""
+        if actual_tokens is None or self._tokens.unlimited:
+            return
+        self._tokens.tokens = min(
+            self._tokens.capacity, self._tokens.tokens + (estimated_tokens - actual_tokens)
+        )
+
+    def stats(self) -> dict:
+        """Return queue depth, wait-time and throttling metrics."""
+        acquired = self._counters["acquired"]
+        return {
+            **self._counters,
+            "queue_depth": self._queue_depth,
+            "avg_wait_seconds": round(self._counters["total_wait_seconds"] / acquired, 4) if acquired else 0.0,
+            "requests_per_minute": self._requests.capacity,
+            "tokens_per_minute": self._tokens.capacity,
+            "blocked_for_seconds": round(max(0.0, self._blocked_until - time.monotonic()), 3),
+        }
+
+
+class RateLimiterRegistry:
+    """Shared per-deployment limiters plus the retry scheduler used by every LLM path.
+
+    Limits default to AZURE_OPENAI_RPM / AZURE_OPENAI_TPM and can be set per
+    deployment with AZURE_OPENAI_RATE_LIMITS, e.g. {"gpt-4o": {"rpm": 300, "tpm": 50000}}.
+    """
+
+    def __init__(
+        self,
+        default_rpm: Optional[float] = None,
+        default_tpm: Optional[float] = None,
+        limits: Optional[Dict[str, dict]] = None,
+        max_retries: Optional[int] = None,
+        base_backoff_seconds: Optional[float] = None,
+        max_backoff_seconds: Optional[float] = None,
+    ) -> None:
+        self.default_rpm = default_rpm if default_rpm is not None else float(os.getenv("AZURE_OPENAI_RPM", "0"))
+        self.default_tpm = default_tpm if default_tpm is not None else float(os.getenv("AZURE_OPENAI_TPM", "0"))
+        if limits is None:
+            try:
+                limits = json.loads(os.getenv("AZURE_OPENAI_RATE_LIMITS", "") or "{}")
+            except ValueError:
+                logging.warning("AZURE_OPENAI_RATE_LIMITS is not valid JSON, ignoring")
+                limits = {}
+        self.limits = limits
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("AZURE_OPENAI_MAX_RETRIES", "4"))
+        self.base_backoff_seconds = base_backoff_seconds or float(os.getenv("AZURE_OPENAI_BACKOFF_SECONDS", "1"))
+        self.max_backoff_seconds = max_backoff_seconds or float(os.getenv("AZURE_OPENAI_MAX_BACKOFF_SECONDS", "60"))
+        self._limiters: Dict[str, DeploymentRateLimiter] = {}
+
+    def get(self, deployment: str) -> DeploymentRateLimiter:
+        """Return the limiter of a deployment, creating it on first use."""
+        limiter = self._limiters.get(deployment)
+        if limiter is None:
+            limits = self.limits.get(deployment, {})
+            limiter = DeploymentRateLimiter(
+                deployment,
+                requests_per_minute=limits.get("rpm", self.default_rpm),
+                tokens_per_minute=limits.get("tpm", self.default_tpm),
+            )
+            self._limiters[deployment] = limiter
+        return limiter
+
+    def backoff_seconds(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Delay before the next attempt: retry-after if given, else exponential, plus jitter."""
+        if retry_after is not None:
+            base = retry_after
+        else:
+            base = min(self.max_backoff_seconds, self.base_backoff_seconds * (2 ** attempt))
+        # Jitter spreads retries of queued callers so they do not stampede together
+        return base + random.uniform(0, base * 0.25 + 0.1)
+
+    async def call(
+        self,
+        deployment: str,
+        estimated_tokens: int,
+        fn: Callable[[], Awaitable[T]],
+        usage_tokens: Optional[Callable[[T], Optional[int]]] = None,
+        max_retries: Optional[int] = None,
+    ) -> T:
+        """Run fn under the deployment budget, retrying 429s and transient errors.
+
+        Args:
+            deployment: The deployment the call goes to
+            estimated_tokens: Estimated prompt + completion tokens
+            fn: Zero-argument callable returning the awaitable to run
+            usage_tokens: Optional function extracting actual token usage from the result
+            max_retries: Optional override of the registry's retry count
+
+        Returns:
+            The result of fn
+        """
+        limiter = self.get(deployment)
+        max_retries = self.max_retries if max_retries is None else max_retries
+        attempt = 0
+        while True:
+            await limiter.acquire(estimated_tokens)
+            try:
+                result = await fn()
+            except Exception as e:
+                rate_limited = is_rate_limit_error(e)
+                if attempt >= max_retries or not (rate_limited or is_transient_error(e)):
+                    raise
+                delay = self.backoff_seconds(attempt, retry_after_seconds(e))
+                if rate_limited:
+                    # Hold back every caller of this deployment, not just this one
+                    limiter.penalize(delay)
+                limiter.record_retry()
+                logging.warning(
+                    f"{deployment}: {'429' if rate_limited else 'transient error'} on attempt {attempt + 1}, "
+                    f"retrying in {delay:.2f}s: {e}"
+                )
+                attempt += 1
+                if not rate_limited:
+                    await asyncio.sleep(delay)
+                continue
+
+            if usage_tokens is not None:
+                try:
+                    limiter.record_usage(estimated_tokens, usage_tokens(result))
+                except Exception:
+                    pass
+            return result
+
+    def stats(self) -> dict:
+        """Return the stats of every deployment limiter."""
+        return {name: limiter.stats() for name, limiter in self._limiters.items()}
+
+
+def completion_usage_tokens(response) -> Optional[int]:
+    """Total tokens of a chat completion response, if reported."""
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "total_tokens", None) if usage is not None else None
+
+
+# Create a global instance of the rate limiter registry
+rate_limiter = RateLimiterRegistry()
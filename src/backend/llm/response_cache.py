@@ -0,0 +1,274 @@
+"""Exact-match cache for specialist LLM responses."""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+
+@dataclass
+class CacheEntry:
+    """A cached response with its owner agent, expiry time and size in bytes."""
+
+    agent_type: str
+    value: str
+    expires_at: float
+    size: int
+
+
+class ResponseCache:
+    """LRU + TTL response cache with a byte-size cap and an optional disk tier.
+
+    Keys combine the agent type, a hash of the agent's effective configuration
+    and the normalized scenario text, so any change to prompt, temperature,
+    max_tokens or model produces a different key. Entries for an agent can also
+    be dropped explicitly when its configuration is updated.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        disk_path: Optional[str] = None,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of in-memory entries
+            max_bytes: Maximum total size of in-memory values in bytes
+            ttl_seconds: Time to live for entries in seconds
+            disk_path: Optional directory for the on-disk tier (disabled when empty)
+        """
+        self.max_entries = max_entries or int(
+            os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000")
+        )
+        self.max_bytes = max_bytes or int(
+            os.getenv("RESPONSE_CACHE_MAX_BYTES", str(50 * 1024 * 1024))
+        )
+        self.ttl_seconds = ttl_seconds or float(
+            os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600")
+        )
+        self.disk_path = (
+            disk_path if disk_path is not None else os.getenv("RESPONSE_CACHE_DIR", "")
+        )
+        if self.disk_path:
+            os.makedirs(self.disk_path, exist_ok=True)
+
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+        }
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Normalize a scenario so trivial whitespace and case changes still hit."""
+        return re.sub(r"\s+", " ", query or "").strip().casefold()
+
+    @staticmethod
+    def config_hash(agent_config: Dict[str, Any]) -> str:
+        """Return a stable hash of an agent's effective configuration."""
+        # Snapshot configs carry their hash, computed once per config version
+        precomputed = getattr(agent_config, "content_hash", None)
+        if isinstance(precomputed, str):
+            return precomputed
+        serialized = json.dumps(agent_config, sort_keys=True, default=str)
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()[:16]
+
+    def make_key(
+        self, agent_type: str, agent_config: Dict[str, Any], query: str, model: str = ""
+    ) -> str:
+        """Build the cache key for an agent call.
+
+        Args:
+            agent_type: The agent type
+            agent_config: The effective agent configuration (from get_agent_config)
+            query: The raw scenario text
+            model: The deployment the call resolves to
+
+        Returns:
+            The cache key
+        """
+        raw = "\x1f".join(
+            [agent_type, self.config_hash(agent_config), model, self.normalize_query(query)]
+        )
+        return f"{agent_type}:{hashlib.sha256(raw.encode('utf-8')).hexdigest()}"
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value for a key, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    return entry.value
+                self._remove(key)
+                self._counters["expirations"] += 1
+
+        entry = self._read_disk(key, now)
+        with self._lock:
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            # Promote the disk hit into memory
+            self._counters["disk_hits"] += 1
+            self._store(key, entry)
+            return entry.value
+
+    def set(self, key: str, agent_type: str, value: str) -> None:
+        """Store a response in the cache (and the disk tier if enabled)."""
+        entry = CacheEntry(
+            agent_type=agent_type,
+            value=value,
+            expires_at=time.time() + self.ttl_seconds,
+            size=len(value.encode("utf-8")),
+        )
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            self._store(key, entry)
+            self._counters["sets"] += 1
+        self._write_disk(key, entry)
+
+    def invalidate_agent(self, agent_type: str) -> int:
+        """Drop every entry of an agent type. Returns the number of entries removed."""
+        prefix = f"{agent_type}:"
+        with self._lock:
+            keys = [key for key in self._entries if key.startswith(prefix)]
+            for key in keys:
+                self._remove(key)
+            removed = len(keys)
+        removed += self._clear_disk(prefix)
+        with self._lock:
+            self._counters["invalidations"] += removed
+        if removed:
+            logging.info(f"Invalidated {removed} cached responses for agent {agent_type}")
+        return removed
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        self._clear_disk("")
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["disk_hits"] + self._counters["misses"]
+            hits = self._counters["hits"] + self._counters["disk_hits"]
+            return {
+                **self._counters,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "disk_tier": bool(self.disk_path),
+            }
+
+    def _store(self, key: str, entry: CacheEntry) -> None:
+        """Insert an entry and evict least recently used ones over the caps. Lock held."""
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._counters["evictions"] += 1
+
+    def _remove(self, key: str) -> None:
+        """Remove an in-memory entry. Lock held."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _disk_file(self, key: str) -> str:
+        """Return the file path of a key in the disk tier."""
+        return os.path.join(self.disk_path, key.replace(":", "__") + ".json")
+
+    def _read_disk(self, key: str, now: float) -> Optional[CacheEntry]:
+        """Read an entry from the disk tier, dropping it if expired."""
+        if not self.disk_path:
+            return None
+        path = self._disk_file(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning(f"Failed to read response cache file {path}: {e}")
+            return None
+
+        if data.get("expires_at", 0) <= now:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return CacheEntry(
+            agent_type=data["agent_type"],
+            value=data["value"],
+            expires_at=data["expires_at"],
+            size=len(data["value"].encode("utf-8")),
+        )
+
+    def _write_disk(self, key: str, entry: CacheEntry) -> None:
+        """Write an entry to the disk tier with an atomic rename."""
+        if not self.disk_path:
+            return
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.disk_path, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "agent_type": entry.agent_type,
+                        "value": entry.value,
+                        "expires_at": entry.expires_at,
+                    },
+                    f,
+                )
+            os.replace(tmp_path, self._disk_file(key))
+        except Exception as e:
+            logging.warning(f"Failed to write response cache file: {e}")
+
+    def _clear_disk(self, prefix: str) -> int:
+        """Remove disk entries whose key starts with prefix. Returns the count."""
+        if not self.disk_path:
+            return 0
+        file_prefix = prefix.replace(":", "__")
+        removed = 0
+        for name in os.listdir(self.disk_path):
+            if name.endswith(".json") and name.startswith(file_prefix):
+                try:
+                    os.remove(os.path.join(self.disk_path, name))
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+
+# Create a global instance of the response cache
+response_cache = ResponseCache()
@@ -0,0 +1,275 @@
+"""Embedding-similarity cache for near-duplicate specialist scenarios."""
+
+import json
+import logging
+import os
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Similarity histogram buckets: 20 bins of width 0.05 over [0, 1]
+HISTOGRAM_BINS = 20
+
+
+class SemanticIndex:
+    """Bounded matrix index of normalized embeddings for one agent type.
+
+    Embeddings live in a preallocated (capacity x dim) float32 matrix, so a lookup
+    is a single matrix-vector product. When the index is full the least recently
+    used row is overwritten. Config hashes are interned to small ids per index;
+    an id is released when its last row is overwritten, so configs that changed
+    do not accumulate.
+    """
+
+    def __init__(self, capacity: int, dim: int) -> None:
+        """Initialize an empty index.
+
+        Args:
+            capacity: Maximum number of cached entries
+            dim: Embedding dimension
+        """
+        self.capacity = capacity
+        self.dim = dim
+        self._matrix = np.zeros((capacity, dim), dtype=np.float32)
+        self._config_ids = np.full(capacity, -1, dtype=np.int64)
+        self._config_numbers: Dict[str, int] = {}
+        self._next_config_id = 0
+        self._last_used = np.zeros(capacity, dtype=np.int64)
+        self._values: List[Optional[str]] = [None] * capacity
+        self._size = 0
+        self._clock = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def config_count(self) -> int:
+        """Number of config hashes with rows in the index."""
+        return len(self._config_numbers)
+
+    def _intern(self, config_hash: str) -> int:
+        if config_hash not in self._config_numbers:
+            self._config_numbers[config_hash] = self._next_config_id
+            self._next_config_id += 1
+        return self._config_numbers[config_hash]
+
+    def _release_if_unused(self, config_id: int) -> None:
+        if not np.any(self._config_ids[: self._size] == config_id):
+            for config_hash, number in list(self._config_numbers.items()):
+                if number == config_id:
+                    del self._config_numbers[config_hash]
+
+    def search(self, vector: np.ndarray, config_hash: str) -> Tuple[int, float]:
+        """Return the row index and cosine similarity of the best match.
+
+        Only rows stored under the same config hash are considered. Returns
+        (-1, 0.0) when there is no candidate.
+        """
+        config_id = self._config_numbers.get(config_hash)
+        if self._size == 0 or config_id is None:
+            return -1, 0.0
+        scores = self._matrix[: self._size] @ vector
+        scores = np.where(self._config_ids[: self._size] == config_id, scores, -np.inf)
+        best = int(np.argmax(scores))
+        best_score = float(scores[best])
+        if best_score == -np.inf:
+            return -1, 0.0
+        return best, best_score
+
+    def touch(self, row: int) -> str:
+        """Mark a row as recently used and return its value."""
+        self._clock += 1
+        self._last_used[row] = self._clock
+        return self._values[row]
+
+    def add(self, vector: np.ndarray, config_hash: str, value: str) -> bool:
+        """Insert an entry, overwriting the least recently used row when full.
+
+        Returns True when an existing entry was evicted.
+        """
+        evicted_config = None
+        if self._size < self.capacity:
+            row = self._size
+            self._size += 1
+        else:
+            row = int(np.argmin(self._last_used))
+            evicted_config = int(self._config_ids[row])
+        self._matrix[row] = vector
+        self._config_ids[row] = self._intern(config_hash)
+        self._values[row] = value
+        self.touch(row)
+        if evicted_config is None:
+            return False
+        self._release_if_unused(evicted_config)
+        return True
+
+
+class SemanticResponseCache:
+    """Per-agent semantic cache that returns answers for paraphrased scenarios.
+
+    A lookup hits when the cosine similarity between the scenario embedding and a
+    cached one (for the same agent type and config hash) reaches the agent's
+    threshold. Hit rates and the distribution of best similarities are tracked per
+    agent type so the thresholds can be tuned.
+    """
+
+    def __init__(
+        self,
+        capacity_per_agent: Optional[int] = None,
+        default_threshold: Optional[float] = None,
+        thresholds: Optional[Dict[str, float]] = None,
+        score_window: int = 1000,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            capacity_per_agent: Maximum entries per agent type
+            default_threshold: Cosine similarity needed for a hit
+            thresholds: Optional per-agent-type threshold overrides
+            score_window: Number of recent best scores kept for percentiles
+        """
+        self.capacity_per_agent = capacity_per_agent or int(
+            os.getenv("SEMANTIC_CACHE_MAX_ENTRIES_PER_AGENT", "500")
+        )
+        self.default_threshold = default_threshold or float(
+            os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95")
+        )
+        if thresholds is None:
+            try:
+                thresholds = json.loads(os.getenv("SEMANTIC_CACHE_THRESHOLDS", "") or "{}")
+            except ValueError:
+                logging.warning("SEMANTIC_CACHE_THRESHOLDS is not valid JSON, ignoring")
+                thresholds = {}
+        self.thresholds: Dict[str, float] = thresholds
+
+        self._indexes: Dict[str, SemanticIndex] = {}
+        self._lock = threading.Lock()
+        self._score_window = score_window
+        self._stats: Dict[str, dict] = {}
+
+    def threshold_for(self, agent_type: str) -> float:
+        """Return the similarity threshold for an agent type."""
+        return float(self.thresholds.get(agent_type, self.default_threshold))
+
+    @staticmethod
+    def _normalize(embedding) -> Optional[np.ndarray]:
+        """Return the embedding as a unit float32 vector, or None if degenerate."""
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        norm = float(np.linalg.norm(vector))
+        if norm == 0.0:
+            return None
+        return vector / norm
+
+    def _agent_stats(self, agent_type: str) -> dict:
+        """Return the mutable stats record of an agent type. Lock held."""
+        if agent_type not in self._stats:
+            self._stats[agent_type] = {
+                "hits": 0,
+                "misses": 0,
+                "evictions": 0,
+                "histogram": [0] * HISTOGRAM_BINS,
+                "recent_scores": deque(maxlen=self._score_window),
+            }
+        return self._stats[agent_type]
+
+    def lookup(
+        self,
+        agent_type: str,
+        config_hash: str,
+        embedding,
+        threshold: Optional[float] = None,
+    ) -> Optional[Tuple[str, float]]:
+        """Find a cached answer for a near-duplicate scenario.
+
+        Args:
+            agent_type: The agent type
+            config_hash: Hash of the agent's effective configuration
+            embedding: The scenario embedding
+            threshold: Optional threshold override (defaults to threshold_for)
+
+        Returns:
+            (answer, similarity) on a hit, otherwise None
+        """
+        vector = self._normalize(embedding)
+        if vector is None:
+            return None
+        threshold = self.threshold_for(agent_type) if threshold is None else threshold
+
+        with self._lock:
+            stats = self._agent_stats(agent_type)
+            index = self._indexes.get(agent_type)
+            if index is None or index.dim != vector.shape[0]:
+                stats["misses"] += 1
+                return None
+
+            row, score = index.search(vector, config_hash)
+            if row >= 0:
+                bucket = min(max(int(score * HISTOGRAM_BINS), 0), HISTOGRAM_BINS - 1)
+                stats["histogram"][bucket] += 1
+                stats["recent_scores"].append(score)
+            if row >= 0 and score >= threshold:
+                stats["hits"] += 1
+                return index.touch(row), score
+            stats["misses"] += 1
+            return None
+
+    def add(self, agent_type: str, config_hash: str, embedding, value: str) -> None:
+        """Store an answer under the scenario embedding."""
+        vector = self._normalize(embedding)
+        if vector is None:
+            return
+        with self._lock:
+            index = self._indexes.get(agent_type)
+            if index is None or index.dim != vector.shape[0]:
+                # A new embedding model changes the dimension; start over
+                index = SemanticIndex(self.capacity_per_agent, vector.shape[0])
+                self._indexes[agent_type] = index
+            if index.add(vector, config_hash, value):
+                self._agent_stats(agent_type)["evictions"] += 1
+
+    def invalidate_agent(self, agent_type: str) -> None:
+        """Drop every cached answer of an agent type."""
+        with self._lock:
+            self._indexes.pop(agent_type, None)
+
+    def stats(self) -> dict:
+        """Return per-agent hit rates and similarity distributions."""
+        with self._lock:
+            agents = {}
+            for agent_type, stats in self._stats.items():
+                lookups = stats["hits"] + stats["misses"]
+                scores = np.fromiter(stats["recent_scores"], dtype=np.float32)
+                index = self._indexes.get(agent_type)
+                agents[agent_type] = {
+                    "hits": stats["hits"],
+                    "misses": stats["misses"],
+                    "evictions": stats["evictions"],
+                    "hit_rate": round(stats["hits"] / lookups, 4) if lookups else 0.0,
+                    "entries": len(index) if index is not None else 0,
+                    "configs": index.config_count if index is not None else 0,
+                    "threshold": self.threshold_for(agent_type),
+                    "similarity_histogram": {
+                        f"{i / HISTOGRAM_BINS:.2f}": count
+                        for i, count in enumerate(stats["histogram"])
+                        if count
+                    },
+                    "similarity_percentiles": (
+                        {
+                            f"p{p}": round(float(np.percentile(scores, p)), 4)
+                            for p in (50, 90, 99)
+                        }
+                        if scores.size
+                        else {}
+                    ),
+                }
+            return {
+                "default_threshold": self.default_threshold,
+                "capacity_per_agent": self.capacity_per_agent,
+                "agents": agents,
+            }
+
+
+# Create a global instance of the semantic cache
+semantic_cache = SemanticResponseCache()
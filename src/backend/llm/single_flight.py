@@ -0,0 +1,91 @@
+"""Single-flight coalescing of identical in-flight async calls."""
+
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    """A shared in-flight call and the number of callers waiting on it."""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Future) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one upstream call.
+
+    The first caller for a key starts the call as a task; callers arriving while
+    it runs await the same task and get the same result or exception. Each
+    waiter awaits through asyncio.shield, so cancelling one waiter never cancels
+    the shared call while others still wait. The call is cancelled only when
+    its last waiter goes away.
+    """
+
+    def __init__(self, name: str = "") -> None:
+        """Initialize the group.
+
+        Args:
+            name: Name used in logs and stats
+        """
+        self.name = name
+        self._calls: Dict[str, _Call] = {}
+        self._counters = {"calls": 0, "coalesced": 0, "abandoned": 0}
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Build a stable key from the parts that identify a call."""
+        serialized = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run fn once per key among concurrent callers and share its result.
+
+        Args:
+            key: Identity of the call (see make_key)
+            fn: Zero-argument callable returning the awaitable to run
+
+        Returns:
+            The result of the shared call
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            self._counters["calls"] += 1
+            call.task.add_done_callback(lambda _task, key=key, call=call: self._forget(key, call))
+        else:
+            self._counters["coalesced"] += 1
+            logging.info(f"Single-flight {self.name}: joined in-flight call")
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Nobody is interested in the result anymore
+                self._counters["abandoned"] += 1
+                call.task.cancel()
+                self._forget(key, call)
+
+    def _forget(self, key: str, call: _Call) -> None:
+        """Remove a finished call so later callers start a fresh one."""
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def stats(self) -> dict:
+        """Return call, coalescing and in-flight counters."""
+        return {**self._counters, "in_flight": len(self._calls)}
+
+
+# Shared groups for specialist completions and agent action requests
+completion_flights = SingleFlight("completions")
+action_flights = SingleFlight("action_requests")
@@ -0,0 +1,21 @@
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from context.identity_map import identity_scope
+
+
+class IdentityMapMiddleware:
+    """Runs every HTTP request as one unit of work with its own memory store identity map.
+
+    A plain ASGI middleware, so the context variable is set in the context the
+    endpoint (and its background tasks) run in.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with identity_scope():
+            await self.app(scope, receive, send)
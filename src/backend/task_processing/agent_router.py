@@ -0,0 +1,256 @@
+"""Relevance routing: pick the agents worth calling for a scenario."""
+
+import logging
+import math
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Tokens shorter than this only match exactly, longer ones also by prefix
+# (Dutch plurals and compounds: "leverancier" / "leveranciers", "kosten" / "kostenbesparing")
+MIN_PREFIX_LENGTH = 4
+
+_TOKEN_PATTERN = re.compile(r"[^\W_]+", re.UNICODE)
+
+Embed = Callable[[str], Awaitable[List[float]]]
+# Classifier: (scenario, {expertise: profile text}) -> {expertise: score in [0, 1]}
+Classifier = Callable[[str, Dict[str, str]], Awaitable[Dict[str, float]]]
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens; underscores split capability names."""
+    return [token for token in _TOKEN_PATTERN.findall((text or "").lower()) if len(token) > 1]
+
+
+def agent_profile_terms(agent_config: dict) -> List[str]:
+    """Routing vocabulary of an agent: its focus, capabilities and routing_keywords."""
+    phrases = [
+        *agent_config.get("focus", []),
+        *agent_config.get("capabilities", []),
+        *agent_config.get("routing_keywords", []),
+    ]
+    terms: List[str] = []
+    for phrase in phrases:
+        for token in tokenize(phrase):
+            if token not in terms:
+                terms.append(token)
+    return terms
+
+
+def _term_matches(term: str, token: str) -> bool:
+    if term == token:
+        return True
+    if len(term) < MIN_PREFIX_LENGTH or len(token) < MIN_PREFIX_LENGTH:
+        return False
+    return token.startswith(term) or term.startswith(token)
+
+
+def keyword_scores(query: str, profiles: Dict[str, List[str]]) -> Dict[str, float]:
+    """Score agents by the profile terms found in the query.
+
+    Each matched term counts with its inverse document frequency over the
+    profiles, so a term shared by many agents says little about any one of them.
+
+    Args:
+        query: The scenario
+        profiles: Profile terms per expertise
+
+    Returns:
+        Raw (unnormalized) scores per expertise
+    """
+    query_tokens = set(tokenize(query))
+    document_frequency: Dict[str, int] = {}
+    for terms in profiles.values():
+        for term in set(terms):
+            document_frequency[term] = document_frequency.get(term, 0) + 1
+    scores = {}
+    for expertise, terms in profiles.items():
+        scores[expertise] = sum(
+            math.log(1 + len(profiles) / document_frequency[term])
+            for term in set(terms)
+            if any(_term_matches(term, token) for token in query_tokens)
+        )
+    return scores
+
+
+def _normalize(scores: Dict[str, float]) -> Dict[str, float]:
+    """Scale scores to [0, 1] relative to the best one."""
+    best = max(scores.values(), default=0.0)
+    if best <= 0:
+        return {expertise: 0.0 for expertise in scores}
+    return {expertise: max(0.0, score) / best for expertise, score in scores.items()}
+
+
+@dataclass
+class AgentSelection:
+    """The agents to call for a scenario and the ones that were skipped."""
+
+    selected: List[dict]
+    skipped: List[dict] = field(default_factory=list)
+    method: str = "keywords"
+    scores: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def calls_saved(self) -> int:
+        return len(self.skipped)
+
+    def report(self) -> dict:
+        """Summary for the API response."""
+        return {
+            "method": self.method,
+            "selected": [agent["expertise"] for agent in self.selected],
+            "calls_saved": self.calls_saved,
+            "scores": {expertise: round(score, 3) for expertise, score in self.scores.items()},
+        }
+
+
+class AgentRouter:
+    """Selects the top-k relevant agents for a scenario before the fan-out.
+
+    The default scorer is local: keyword overlap between the scenario and each
+    agent's focus, capabilities and routing_keywords, optionally blended with the
+    cosine similarity of scenario and profile embeddings. When a classifier is
+    configured (a small model), its scores are used instead and the local scorer
+    is the fallback. If no agent scores above zero the task goes to every agent,
+    as it did before routing existed.
+    """
+
+    def __init__(
+        self,
+        top_k: Optional[int] = None,
+        threshold: Optional[float] = None,
+        embed: Optional[Embed] = None,
+        classifier: Optional[Classifier] = None,
+    ) -> None:
+        """Initialize the router.
+
+        Args:
+            top_k: Maximum number of agents to call
+            threshold: Minimum normalized score (0..1) an agent needs to be called
+            embed: Optional async text -> embedding function for the blended score
+            classifier: Optional async small-model classifier
+        """
+        self.top_k = top_k or int(os.getenv("AGENT_ROUTER_TOP_K", "3"))
+        self.threshold = threshold if threshold is not None else float(
+            os.getenv("AGENT_ROUTER_THRESHOLD", "0.35")
+        )
+        self.embed = embed
+        self.classifier = classifier
+        self._profile_embeddings: Dict[str, np.ndarray] = {}
+        self._counters = {
+            "selections": 0,
+            "agents_considered": 0,
+            "agents_called": 0,
+            "calls_saved": 0,
+            "no_match_all_agents": 0,
+            "classifier_failures": 0,
+            "embedding_failures": 0,
+        }
+
+    async def select(self, query: str, agents: Sequence[dict], configs: Dict[str, dict]) -> AgentSelection:
+        """Choose the agents to call for a scenario.
+
+        Args:
+            query: The scenario
+            agents: Candidate agent entries (with "expertise" and "name")
+            configs: Agent config per expertise
+
+        Returns:
+            The selection, with a reason for every skipped agent
+        """
+        profiles = {agent["expertise"]: agent_profile_terms(configs[agent["expertise"]]) for agent in agents}
+        scores, method = await self._score(query, profiles)
+
+        self._counters["selections"] += 1
+        self._counters["agents_considered"] += len(agents)
+        if not any(score > 0 for score in scores.values()):
+            self._counters["no_match_all_agents"] += 1
+            self._counters["agents_called"] += len(agents)
+            return AgentSelection(list(agents), method=f"{method}:no_match", scores=scores)
+
+        ranked = sorted(agents, key=lambda agent: scores[agent["expertise"]], reverse=True)
+        selected: List[dict] = []
+        skipped: List[dict] = []
+        for agent in ranked:
+            score = scores[agent["expertise"]]
+            if score < self.threshold or score <= 0:
+                reason = f"relevantie {score:.2f} onder drempel {self.threshold:.2f}"
+            elif len(selected) >= self.top_k:
+                reason = f"relevantie {score:.2f} valt buiten de top {self.top_k}"
+            else:
+                selected.append(agent)
+                continue
+            skipped.append({
+                "agent_name": agent["name"],
+                "agent_expertise": agent["expertise"],
+                "score": round(score, 3),
+                "reason": reason,
+            })
+
+        # Keep the response order of the candidate list
+        selected.sort(key=lambda agent: list(agents).index(agent))
+        self._counters["agents_called"] += len(selected)
+        self._counters["calls_saved"] += len(skipped)
+        return AgentSelection(selected, skipped, method, scores)
+
+    async def _score(self, query: str, profiles: Dict[str, List[str]]):
+        """Return normalized scores and the method that produced them."""
+        if self.classifier is not None:
+            try:
+                profile_texts = {expertise: ", ".join(terms) for expertise, terms in profiles.items()}
+                raw = await self.classifier(query, profile_texts)
+                return {
+                    expertise: min(1.0, max(0.0, float(raw.get(expertise, 0.0))))
+                    for expertise in profiles
+                }, "classifier"
+            except Exception as e:
+                self._counters["classifier_failures"] += 1
+                logging.warning(f"Agent classifier failed, using keyword scores: {e}")
+
+        scores = _normalize(keyword_scores(query, profiles))
+        if self.embed is None:
+            return scores, "keywords"
+        try:
+            similarities = await self._embedding_scores(query, profiles)
+        except Exception as e:
+            self._counters["embedding_failures"] += 1
+            logging.warning(f"Agent routing embeddings failed, using keyword scores: {e}")
+            return scores, "keywords"
+        return {
+            expertise: (scores[expertise] + similarities[expertise]) / 2 for expertise in profiles
+        }, "keywords+embeddings"
+
+    async def _embedding_scores(self, query: str, profiles: Dict[str, List[str]]) -> Dict[str, float]:
+        """Cosine similarity of scenario and profiles, min-max scaled to [0, 1]."""
+        query_vector = self._unit(await self.embed(query))
+        similarities = {}
+        for expertise, terms in profiles.items():
+            text = ", ".join(terms)
+            vector = self._profile_embeddings.get(text)
+            if vector is None:
+                vector = self._unit(await self.embed(text))
+                self._profile_embeddings[text] = vector
+            similarities[expertise] = float(vector @ query_vector)
+        low, high = min(similarities.values()), max(similarities.values())
+        if high - low < 1e-6:
+            return {expertise: 0.0 for expertise in similarities}
+        return {expertise: (value - low) / (high - low) for expertise, value in similarities.items()}
+
+    @staticmethod
+    def _unit(vector: Any) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
+
+    def stats(self) -> dict:
+        """Return selection counts and the calls saved by routing."""
+        considered = self._counters["agents_considered"]
+        return {
+            **self._counters,
+            "top_k": self.top_k,
+            "threshold": self.threshold,
+            "calls_saved_ratio": round(self._counters["calls_saved"] / considered, 4) if considered else 0.0,
+        }
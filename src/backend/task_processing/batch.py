@@ -0,0 +1,180 @@
+"""Streaming batch processing: incremental JSON/JSONL parsing and bounded fan-out."""
+
+import asyncio
+import codecs
+import json
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Tuple, TypeVar
+
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Characters that separate items in a JSON array or a JSONL stream
+_SEPARATORS = " \t\r\n,"
+
+
+class BatchParseError(ValueError):
+    """Raised when the batch body is not a JSON array or JSONL stream."""
+
+
+async def iter_json_items(chunks: AsyncIterable[bytes]) -> AsyncIterator[Any]:
+    """Yield the items of a JSON array or a JSONL body as the bytes arrive.
+
+    Only the item currently being parsed is buffered, so arbitrarily large
+    batches can be read without holding the whole body in memory. A body that
+    starts with ``[`` is read as a JSON array, anything else as JSONL.
+
+    Args:
+        chunks: The raw request body (e.g. ``request.stream()``)
+
+    Raises:
+        BatchParseError: If the body contains malformed JSON
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    is_array = None
+    array_closed = False
+
+    async def feed() -> bool:
+        """Append the next chunk to the buffer. Returns False at end of body."""
+        nonlocal buffer
+        async for chunk in chunk_iterator:
+            buffer += utf8.decode(chunk)
+            return True
+        buffer += utf8.decode(b"", final=True)
+        return False
+
+    chunk_iterator = chunks.__aiter__()
+    more = True
+    while True:
+        buffer = buffer.lstrip(_SEPARATORS if is_array is not None else " \t\r\n")
+        if not buffer:
+            if not more:
+                break
+            more = await feed()
+            continue
+
+        if is_array is None:
+            is_array = buffer[0] == "["
+            if is_array:
+                buffer = buffer[1:]
+            continue
+        if array_closed:
+            raise BatchParseError("Unexpected content after the closing ]")
+        if is_array and buffer[0] == "]":
+            array_closed = True
+            buffer = buffer[1:]
+            continue
+
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError as e:
+            # The item may simply be incomplete; read more before giving up,
+            # unless a JSONL line is already complete
+            if more and (is_array or "\n" not in buffer):
+                more = await feed()
+                continue
+            raise BatchParseError(f"Invalid JSON in batch: {e.msg}") from e
+        if end == len(buffer) and more and not isinstance(item, (dict, list)):
+            # A bare number or literal could continue in the next chunk
+            more = await feed()
+            continue
+        buffer = buffer[end:]
+        yield item
+
+    if is_array and not array_closed:
+        raise BatchParseError("JSON array is not closed")
+
+
+async def run_bounded(
+    items: AsyncIterable[T],
+    worker: Callable[[int, T], Awaitable[R]],
+    max_in_flight: int,
+) -> AsyncIterator[Tuple[int, R]]:
+    """Run worker over items with at most max_in_flight running, yielding in completion order.
+
+    The next item is only pulled from items when a slot frees up, so input and
+    output are both streamed. Outstanding workers are cancelled if the consumer
+    stops early (e.g. the client disconnects).
+
+    Args:
+        items: The input items
+        worker: Coroutine function called with (index, item)
+        max_in_flight: Maximum number of concurrently running workers
+
+    Yields:
+        (index, result) tuples as workers finish
+    """
+    pending = set()
+    iterator = items.__aiter__()
+    index = 0
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < max_in_flight:
+                try:
+                    item = await iterator.__anext__()
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                pending.add(asyncio.ensure_future(_indexed(index, worker(index, item))))
+                index += 1
+            if not pending:
+                break
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def _indexed(index: int, awaitable: Awaitable[R]) -> Tuple[int, R]:
+    return index, await awaitable
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """StreamingResponse for endpoints that keep reading the request body while responding.
+
+    A disconnect watcher calls receive(), which would steal body chunks from
+    request.stream(), so it only starts once body_read is set. Sending and
+    watching are implemented here on the plain ASGI messages rather than on
+    StreamingResponse internals.
+    """
+
+    def __init__(self, content: Any, body_read: asyncio.Event, **kwargs: Any) -> None:
+        super().__init__(content, **kwargs)
+        self.body_read = body_read
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        sender = asyncio.ensure_future(self._send_response(send))
+        watcher = asyncio.ensure_future(self._wait_for_disconnect(receive))
+        try:
+            # A disconnect cancels the body iterator, which cancels its work
+            await asyncio.wait({sender, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in (sender, watcher):
+                task.cancel()
+            await asyncio.gather(sender, watcher, return_exceptions=True)
+        if not sender.cancelled() and sender.exception() is not None:
+            raise sender.exception()
+        if self.background is not None:
+            await self.background()
+
+    async def _send_response(self, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        async for chunk in self.body_iterator:
+            if isinstance(chunk, str):
+                chunk = chunk.encode(self.charset)
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def _wait_for_disconnect(self, receive: Receive) -> None:
+        await self.body_read.wait()
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
@@ -0,0 +1,558 @@
+"""Background jobs for long-running input tasks with pluggable queue backends."""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import asdict, dataclass, field, replace
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+
+class JobStatus:
+    """Job lifecycle states."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+    FINISHED = (COMPLETED, FAILED)
+
+
+@dataclass
+class Job:
+    """A queued unit of work and, once finished, its result."""
+
+    id: str
+    payload: Dict[str, Any]
+    status: str = JobStatus.QUEUED
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    # Worker that holds the job while it runs, and until when its claim is valid
+    owner: Optional[str] = None
+    lease_expires_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in JobStatus.FINISHED
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class JobStore(ABC):
+    """Queue backend: persists jobs and hands queued ones to workers in FIFO order."""
+
+    @abstractmethod
+    def put(self, job: Job) -> None:
+        """Add a new queued job."""
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return a job by id, or None if unknown."""
+
+    @abstractmethod
+    def update(self, job: Job) -> None:
+        """Persist the state of a job."""
+
+    @abstractmethod
+    def claim_next(self, owner: str, lease_seconds: float) -> Optional[Job]:
+        """Atomically take the oldest queued job, mark it running and lease it to owner."""
+
+    @abstractmethod
+    def renew_lease(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        """Extend the lease of a running job. Returns False if owner no longer holds it."""
+
+    @abstractmethod
+    def release(self, job: Job, owner: str) -> bool:
+        """Persist a job that owner ran (finished, or handed back as queued).
+
+        Only applies while owner still holds the lease of this attempt, so a
+        worker that lost its lease cannot overwrite a later run. Returns False
+        when nothing was written.
+        """
+
+    @abstractmethod
+    def requeue_expired(self, now: float) -> int:
+        """Put running jobs whose lease expired (their worker died) back in the queue."""
+
+    @abstractmethod
+    def purge_finished(self, older_than: float) -> int:
+        """Drop finished jobs that finished before the given timestamp."""
+
+    @abstractmethod
+    def counts(self) -> Dict[str, int]:
+        """Return the number of jobs per status."""
+
+
+class InMemoryJobStore(JobStore):
+    """Process-local store; jobs are lost on restart."""
+
+    def __init__(self) -> None:
+        self._jobs: Dict[str, Job] = {}
+        self._queue: Deque[str] = deque()
+        self._lock = threading.Lock()
+
+    def put(self, job: Job) -> None:
+        with self._lock:
+            self._jobs[job.id] = job
+            self._queue.append(job.id)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def update(self, job: Job) -> None:
+        with self._lock:
+            self._store(job)
+
+    def _store(self, job: Job) -> None:
+        """Keep a job; a job set back to queued is queued again. Lock held."""
+        self._jobs[job.id] = job
+        if job.status == JobStatus.QUEUED and job.id not in self._queue:
+            self._queue.append(job.id)
+
+    def claim_next(self, owner: str, lease_seconds: float) -> Optional[Job]:
+        with self._lock:
+            while self._queue:
+                job = self._jobs.get(self._queue.popleft())
+                if job is not None and job.status == JobStatus.QUEUED:
+                    job.status = JobStatus.RUNNING
+                    job.started_at = time.time()
+                    job.attempts += 1
+                    job.owner = owner
+                    job.lease_expires_at = job.started_at + lease_seconds
+                    # The worker gets its own copy, as from a persistent store
+                    return replace(job)
+            return None
+
+    def renew_lease(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != JobStatus.RUNNING or job.owner != owner:
+                return False
+            job.lease_expires_at = time.time() + lease_seconds
+            return True
+
+    def release(self, job: Job, owner: str) -> bool:
+        with self._lock:
+            current = self._jobs.get(job.id)
+            if (
+                current is None
+                or current.status != JobStatus.RUNNING
+                or current.owner != owner
+                or current.attempts != job.attempts
+            ):
+                return False
+            self._store(job)
+            return True
+
+    def requeue_expired(self, now: float) -> int:
+        with self._lock:
+            expired = [
+                job
+                for job in self._jobs.values()
+                if job.status == JobStatus.RUNNING and (job.lease_expires_at or 0) < now
+            ]
+            for job in expired:
+                job.status = JobStatus.QUEUED
+                job.owner = None
+                job.lease_expires_at = None
+                self._queue.append(job.id)
+            return len(expired)
+
+    def purge_finished(self, older_than: float) -> int:
+        with self._lock:
+            expired = [
+                job_id
+                for job_id, job in self._jobs.items()
+                if job.finished and (job.finished_at or 0) < older_than
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+            return len(expired)
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return counts
+
+
+class SQLiteJobStore(JobStore):
+    """SQLite-backed store so queued and finished jobs survive restarts.
+
+    Claiming selects and updates the oldest queued job inside an immediate
+    transaction, so several processes on the same host can share one file.
+    A claimed job carries its worker and a lease that the worker renews while
+    it runs; only jobs whose lease expired are re-queued, never jobs another
+    live process is still running. The methods block, so JobManager calls
+    them in a thread.
+    """
+
+    _COLUMNS = (
+        "id, status, payload, result, error, attempts, created_at, started_at, finished_at, "
+        "owner, lease_expires_at"
+    )
+
+    def __init__(self, path: str) -> None:
+        """Open (or create) the job database.
+
+        Args:
+            path: Path of the SQLite database file
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                owner TEXT,
+                lease_expires_at REAL
+            )
+            """
+        )
+        # Databases created before leases existed
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, column_type in (("owner", "TEXT"), ("lease_expires_at", "REAL")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at)")
+
+    @staticmethod
+    def _row_to_job(row) -> Job:
+        return Job(
+            id=row[0],
+            status=row[1],
+            payload=json.loads(row[2]),
+            result=json.loads(row[3]) if row[3] is not None else None,
+            error=row[4],
+            attempts=row[5],
+            created_at=row[6],
+            started_at=row[7],
+            finished_at=row[8],
+            owner=row[9],
+            lease_expires_at=row[10],
+        )
+
+    def put(self, job: Job) -> None:
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO jobs ({self._COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job.id,
+                    job.status,
+                    json.dumps(job.payload, ensure_ascii=False),
+                    json.dumps(job.result, ensure_ascii=False) if job.result is not None else None,
+                    job.error,
+                    job.attempts,
+                    job.created_at,
+                    job.started_at,
+                    job.finished_at,
+                    job.owner,
+                    job.lease_expires_at,
+                ),
+            )
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {self._COLUMNS} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._row_to_job(row) if row else None
+
+    _UPDATE = (
+        "UPDATE jobs SET status = ?, result = ?, error = ?, attempts = ?, "
+        "started_at = ?, finished_at = ?, owner = ?, lease_expires_at = ? WHERE id = ?"
+    )
+
+    @staticmethod
+    def _update_values(job: Job) -> tuple:
+        return (
+            job.status,
+            json.dumps(job.result, ensure_ascii=False) if job.result is not None else None,
+            job.error,
+            job.attempts,
+            job.started_at,
+            job.finished_at,
+            job.owner,
+            job.lease_expires_at,
+            job.id,
+        )
+
+    def update(self, job: Job) -> None:
+        with self._lock:
+            self._conn.execute(self._UPDATE, self._update_values(job))
+
+    def release(self, job: Job, owner: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                f"{self._UPDATE} AND status = ? AND owner = ? AND attempts = ?",
+                (*self._update_values(job), JobStatus.RUNNING, owner, job.attempts),
+            )
+            return cursor.rowcount == 1
+
+    def claim_next(self, owner: str, lease_seconds: float) -> Optional[Job]:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    f"SELECT {self._COLUMNS} FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                    (JobStatus.QUEUED,),
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, started_at = ?, attempts = attempts + 1, "
+                    "owner = ?, lease_expires_at = ? WHERE id = ?",
+                    (JobStatus.RUNNING, now, owner, now + lease_seconds, row[0]),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        job = self._row_to_job(row)
+        job.status = JobStatus.RUNNING
+        job.started_at = now
+        job.attempts += 1
+        job.owner = owner
+        job.lease_expires_at = now + lease_seconds
+        return job
+
+    def renew_lease(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET lease_expires_at = ? WHERE id = ? AND status = ? AND owner = ?",
+                (time.time() + lease_seconds, job_id, JobStatus.RUNNING, owner),
+            )
+            return cursor.rowcount == 1
+
+    def requeue_expired(self, now: float) -> int:
+        with self._lock:
+            # Rows without a lease were written before leases existed
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, owner = NULL, lease_expires_at = NULL "
+                "WHERE status = ? AND (lease_expires_at IS NULL OR lease_expires_at < ?)",
+                (JobStatus.QUEUED, JobStatus.RUNNING, now),
+            )
+            return cursor.rowcount
+
+    def purge_finished(self, older_than: float) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                (*JobStatus.FINISHED, older_than),
+            )
+            return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_job_store(backend: Optional[str] = None, path: Optional[str] = None) -> JobStore:
+    """Create the job store selected by JOB_QUEUE_BACKEND ("memory" or "sqlite").
+
+    Args:
+        backend: Backend name (defaults to JOB_QUEUE_BACKEND, then "memory")
+        path: SQLite file (defaults to JOB_QUEUE_PATH, then "jobs.db")
+
+    Returns:
+        The job store
+    """
+    backend = (backend or os.getenv("JOB_QUEUE_BACKEND", "memory")).lower()
+    if backend == "sqlite":
+        path = path or os.getenv("JOB_QUEUE_PATH", "jobs.db")
+        logging.info("Using SQLite job queue at %s", path)
+        return SQLiteJobStore(path)
+    if backend != "memory":
+        logging.warning(f"Unknown JOB_QUEUE_BACKEND '{backend}', using in-memory queue")
+    return InMemoryJobStore()
+
+
+class JobManager:
+    """In-process worker pool that drains a JobStore.
+
+    Submitting only writes the job to the store and wakes a worker, so the HTTP
+    request returns immediately. Workers also poll the store, which picks up
+    jobs written by other processes sharing a SQLite file. A running job is
+    leased to its worker and the lease is renewed by a heartbeat; jobs whose
+    lease expired (the process died) are re-queued by any live worker. Store
+    calls run in a thread so a blocking backend never stalls the event loop.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        handler: Callable[[Dict[str, Any]], Awaitable[Any]],
+        workers: Optional[int] = None,
+        result_ttl_seconds: Optional[float] = None,
+        poll_interval: float = 1.0,
+        lease_seconds: Optional[float] = None,
+    ) -> None:
+        """Initialize the manager.
+
+        Args:
+            store: The queue backend
+            handler: Coroutine function that runs a job payload and returns its result
+            workers: Number of concurrent workers
+            result_ttl_seconds: How long finished jobs are kept
+            poll_interval: Seconds between store polls when idle
+            lease_seconds: How long a claim stays valid without a heartbeat
+        """
+        self.store = store
+        self.handler = handler
+        self.workers = workers or int(os.getenv("JOB_WORKERS", "4"))
+        self.result_ttl_seconds = result_ttl_seconds or float(
+            os.getenv("JOB_RESULT_TTL_SECONDS", "86400")
+        )
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds or float(os.getenv("JOB_LEASE_SECONDS", "60"))
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        # Long-poll waiters per job, signalled by local workers
+        self._finished_events: Dict[str, List[asyncio.Event]] = {}
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self) -> None:
+        """Start the workers, re-queueing jobs whose worker died without finishing them."""
+        if self._tasks:
+            return
+        requeued = await asyncio.to_thread(self.store.requeue_expired, time.time())
+        if requeued:
+            logging.info(f"Re-queued {requeued} jobs with an expired lease")
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Cancel the workers. Their jobs are re-queued once the lease expires."""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def submit(self, payload: Dict[str, Any]) -> Job:
+        """Queue a job and return it (with its id) without waiting for it."""
+        await asyncio.to_thread(self.store.purge_finished, time.time() - self.result_ttl_seconds)
+        job = Job(id=str(uuid.uuid4()), payload=payload)
+        await asyncio.to_thread(self.store.put, job)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Job]:
+        """Long-poll: return the job once finished or when timeout expires.
+
+        Returns None if the job is unknown.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            job = await self.get(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job.finished or remaining <= 0:
+                return job
+            event = asyncio.Event()
+            self._finished_events.setdefault(job_id, []).append(event)
+            try:
+                # Local workers signal the event; the poll covers other processes
+                await asyncio.wait_for(event.wait(), min(remaining, self.poll_interval))
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                events = self._finished_events.get(job_id)
+                if events is not None and event in events:
+                    events.remove(event)
+                    if not events:
+                        del self._finished_events[job_id]
+
+    async def _worker(self, number: int) -> None:
+        while True:
+            job = await asyncio.to_thread(self.store.claim_next, self.owner, self.lease_seconds)
+            if job is None:
+                # Idle: pick up jobs of workers that died
+                await asyncio.to_thread(self.store.requeue_expired, time.time())
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _heartbeat(self, job: Job) -> None:
+        """Renew the lease of a running job until cancelled."""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            if not await asyncio.to_thread(self.store.renew_lease, job.id, self.owner, self.lease_seconds):
+                logging.warning(f"Job {job.id} lost its lease; another worker may run it again")
+                return
+
+    async def _run(self, job: Job) -> None:
+        logging.info(f"Job {job.id} started (attempt {job.attempts})")
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            job.result = await self.handler(job.payload)
+            job.status = JobStatus.COMPLETED
+        except asyncio.CancelledError:
+            # Shutting down: hand the job back right away instead of waiting for the lease.
+            # The store call is synchronous because this task is being cancelled.
+            job.status = JobStatus.QUEUED
+            job.owner = None
+            job.lease_expires_at = None
+            self.store.release(job, self.owner)
+            raise
+        except Exception as e:
+            logging.exception(f"Job {job.id} failed: {e}")
+            job.status = JobStatus.FAILED
+            job.error = str(e)
+        finally:
+            heartbeat.cancel()
+        job.finished_at = time.time()
+        job.owner = None
+        job.lease_expires_at = None
+        if not await asyncio.to_thread(self.store.release, job, self.owner):
+            logging.warning(f"Job {job.id} lost its lease before finishing; its result was not saved")
+        for event in self._finished_events.pop(job.id, []):
+            event.set()
+
+    async def stats(self) -> dict:
+        """Return worker count and jobs per status."""
+        return {"workers": len(self._tasks), "jobs": await asyncio.to_thread(self.store.counts)}
@@ -0,0 +1,137 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from agent_config.broadcast import (  # noqa: E402
+    ConfigBroadcaster,
+    InProcessHub,
+    InProcessTransport,
+    RedisTransport,
+    create_broadcast_transport,
+)
+from agent_config.snapshot import AgentConfigStore, thaw  # noqa: E402
+
+CONFIGS = {"hr": {"name": "HR", "prompt": "HR: {query}"}, "generic": {"name": "Generic", "prompt": "{query}"}}
+
+
+class FakePubSub:
+    """Local stand-in for redis.asyncio's PubSub."""
+
+    def __init__(self, server):
+        self.server = server
+        self.queue = asyncio.Queue()
+
+    async def subscribe(self, channel):
+        self.server.subscribers.setdefault(channel, []).append(self.queue)
+
+    async def unsubscribe(self, channel):
+        self.server.subscribers[channel].remove(self.queue)
+
+    async def get_message(self, ignore_subscribe_messages=True, timeout=1.0):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class FakeRedis:
+    """Local stand-in for a redis.asyncio client; data arrives as bytes like from Redis."""
+
+    def __init__(self):
+        self.subscribers = {}
+
+    async def publish(self, channel, data):
+        for queue in self.subscribers.get(channel, []):
+            queue.put_nowait({"type": "message", "channel": channel, "data": data.encode("utf-8")})
+        return len(self.subscribers.get(channel, []))
+
+    def pubsub(self):
+        return FakePubSub(self)
+
+
+def replica(transport, replica_id):
+    store = AgentConfigStore(CONFIGS)
+    broadcaster = ConfigBroadcaster(transport, replica_id=replica_id)
+
+    async def apply(message):
+        store.set_agent(message["agent_type"], message["config"])
+
+    return store, broadcaster, apply
+
+
+@pytest.mark.asyncio
+async def test_in_process_change_reaches_other_replica_and_recompiles_template():
+    hub = InProcessHub()
+    store_a, broadcaster_a, apply_a = replica(InProcessTransport(hub), "a")
+    store_b, broadcaster_b, apply_b = replica(InProcessTransport(hub), "b")
+    await broadcaster_a.start(apply_a)
+    await broadcaster_b.start(apply_b)
+    swaps = []
+    store_b.add_listener(lambda old, new: swaps.append(new.changed_agents(old)))
+
+    updated = store_a.update_agent("hr", {"prompt": "Nieuw: {query}"})
+    await broadcaster_a.publish_change("hr", thaw(updated), updated.content_hash)
+
+    assert store_b.get("hr").content_hash == updated.content_hash
+    assert store_b.get("hr").template.render("x").startswith("Nieuw: x")
+    assert swaps == [["hr"]]
+    assert broadcaster_a.stats()["own_ignored"] == 1
+    assert broadcaster_b.stats()["applied"] == 1
+    assert store_a.stats()["swaps"] == 1
+
+    await broadcaster_b.stop()
+    await broadcaster_a.publish_change("hr", thaw(updated), updated.content_hash)
+    assert broadcaster_b.stats()["received"] == 1
+
+
+@pytest.mark.asyncio
+async def test_redis_transport_with_local_stand_in():
+    server = FakeRedis()
+    store_a, broadcaster_a, apply_a = replica(RedisTransport(client=server, channel="cfg"), "a")
+    store_b, broadcaster_b, apply_b = replica(RedisTransport(client=server, channel="cfg"), "b")
+    await broadcaster_a.start(apply_a)
+    await broadcaster_b.start(apply_b)
+
+    updated = store_a.update_agent("hr", {"temperature": 0.2})
+    await broadcaster_a.publish_change("hr", thaw(updated), updated.content_hash)
+    for _ in range(100):
+        if broadcaster_b.stats()["applied"]:
+            break
+        await asyncio.sleep(0.01)
+
+    assert store_b.get("hr")["temperature"] == 0.2
+    assert broadcaster_b.stats()["last_propagation_seconds"] < 1
+
+    await broadcaster_a.stop()
+    await broadcaster_b.stop()
+    assert server.subscribers["cfg"] == []
+
+
+@pytest.mark.asyncio
+async def test_failed_apply_and_publish_are_counted_not_raised():
+    class BrokenTransport(InProcessTransport):
+        async def publish(self, message):
+            raise ConnectionError("down")
+
+    broadcaster = ConfigBroadcaster(BrokenTransport(), replica_id="a")
+    await broadcaster.publish_change("hr")
+    assert broadcaster.stats()["errors"] == 1
+
+    async def apply(message):
+        raise ValueError("bad config")
+
+    hub = InProcessHub()
+    receiver = ConfigBroadcaster(InProcessTransport(hub), replica_id="b")
+    await receiver.start(apply)
+    await ConfigBroadcaster(InProcessTransport(hub), replica_id="a").publish_change("hr")
+    assert receiver.stats()["errors"] == 1
+
+
+def test_create_broadcast_transport():
+    assert create_broadcast_transport("none") is None
+    assert create_broadcast_transport("bogus") is None
+    assert isinstance(create_broadcast_transport("memory"), InProcessTransport)
@@ -0,0 +1,125 @@
+import asyncio
+import os
+import sys
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from agent_config.directus_cache import (  # noqa: E402
+    DirectusConfigCache,
+    DirectusFetchResult,
+    DirectusHttpFetcher,
+    items_to_configs,
+)
+
+ITEMS = [
+    {"id": 1, "agent_type": "hr", "name": "HR", "prompt": "{query}", "status": "published", "temperature": 0.5},
+    {"id": 2, "agent_type": "old", "name": "Old", "prompt": "{query}", "status": "archived"},
+    {"id": 3, "agent_type": "broken", "name": "Broken"},
+]
+
+
+def test_items_to_configs_strips_meta_and_skips_invalid():
+    assert items_to_configs(ITEMS) == {"hr": {"name": "HR", "prompt": "{query}", "temperature": 0.5}}
+
+
+@pytest.mark.asyncio
+async def test_refresh_serves_stale_on_failure_and_applies_changes_once():
+    responses = [
+        DirectusFetchResult({"hr": {"name": "HR", "prompt": "{query}"}}, etag='"v1"'),
+        RuntimeError("cms down"),
+        DirectusFetchResult(None),
+        DirectusFetchResult({"hr": {"name": "HR", "prompt": "{query}"}}),
+    ]
+    seen = []
+
+    async def fetch(etag, last_modified):
+        seen.append(etag)
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    applied = []
+    cache = DirectusConfigCache(fetch, on_update=applied.append, refresh_seconds=10)
+
+    assert await cache.refresh()
+    assert not await cache.refresh()
+    assert cache.configs() == {"hr": {"name": "HR", "prompt": "{query}"}}
+    assert cache.stats()["stale"] and cache.stats()["consecutive_failures"] == 1
+    assert cache._next_delay() == 20
+
+    assert await cache.refresh()
+    assert await cache.refresh()
+    assert seen == [None, '"v1"', '"v1"', '"v1"']
+    assert len(applied) == 1
+    stats = cache.stats()
+    assert stats["updates"] == 1 and stats["not_modified"] == 2 and stats["failures"] == 1
+    assert not stats["stale"] and stats["age_seconds"] is not None
+
+
+@pytest.mark.asyncio
+async def test_failed_apply_is_a_failure_and_retried():
+    configs = {"hr": {"name": "HR", "prompt": "{query}"}}
+    seen = []
+
+    async def fetch(etag, last_modified):
+        seen.append(etag)
+        # A CMS that answers 304 to a known etag
+        return DirectusFetchResult(None) if etag == '"v1"' else DirectusFetchResult(configs, etag='"v1"')
+
+    applied = []
+
+    def on_update(update):
+        if not applied:
+            applied.append(None)
+            raise ValueError("bad config")
+        applied.append(update)
+
+    cache = DirectusConfigCache(fetch, on_update=on_update, refresh_seconds=10)
+
+    assert not await cache.refresh()
+    assert cache.configs() is None
+    stats = cache.stats()
+    assert stats["failures"] == 1 and stats["stale"] and stats["last_error"] == "ValueError: bad config"
+
+    assert await cache.refresh()
+    assert seen == [None, None]
+    assert applied[-1] == configs and cache.configs() == configs
+    assert cache.stats()["updates"] == 1
+
+
+@pytest.mark.asyncio
+async def test_http_fetcher_sends_validators_and_handles_304():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, json={"data": ITEMS[:1]}, headers={"ETag": '"v1"'})
+
+    fetcher = DirectusHttpFetcher("https://cms.example/", "agents", token="t")
+    fetcher._client = httpx.AsyncClient(transport=httpx.MockTransport(handler), headers={"Authorization": "Bearer t"})
+
+    first = await fetcher(None, None)
+    second = await fetcher(first.etag, None)
+    await fetcher.close()
+
+    assert first.configs["hr"]["name"] == "HR" and first.etag == '"v1"'
+    assert second.not_modified
+    assert str(requests[0].url).startswith("https://cms.example/items/agents")
+    assert requests[0].headers["authorization"] == "Bearer t"
+
+
+@pytest.mark.asyncio
+async def test_start_does_not_block_on_a_hanging_cms():
+    async def fetch(etag, last_modified):
+        await asyncio.sleep(10)
+
+    cache = DirectusConfigCache(fetch, refresh_seconds=60)
+    await cache.start(initial_timeout=0.05)
+    assert cache.configs() is None and cache.stats()["last_error"] == "initial load timed out"
+    await cache.stop()
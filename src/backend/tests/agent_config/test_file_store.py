@@ -0,0 +1,94 @@
+import json
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from agent_config.file_store import AgentConfigFile, AgentConfigFileWatcher  # noqa: E402
+from agent_config.snapshot import AgentConfigStore, thaw  # noqa: E402
+
+CONFIGS = {
+    "hr": {"name": "HR", "prompt": "HR: {query}"},
+    "legal": {"name": "Legal", "prompt": "Legal: {query}"},
+    "generic": {"name": "Generic", "prompt": "{query}"},
+}
+
+
+def test_watcher_reloads_only_changed_agents_written_by_another_worker(tmp_path):
+    path = str(tmp_path / "configs" / "agents.json")
+    worker_a = AgentConfigStore(CONFIGS)
+    worker_b = AgentConfigStore(CONFIGS)
+    watcher_b = AgentConfigFileWatcher(AgentConfigFile(path), worker_b, poll_seconds=1)
+    assert watcher_b.poll() == 0
+
+    updated = worker_a.update_agent("hr", {"instructions": "Kort"})
+    AgentConfigFile(path).save_agent("hr", thaw(updated))
+    legal_before = worker_b.get("legal")
+
+    assert watcher_b.poll() == 1
+    assert worker_b.get("hr").content_hash == updated.content_hash
+    assert worker_b.get("legal") is legal_before
+    # Unchanged file: one stat, no parse and no swap
+    assert watcher_b.poll() == 0
+    assert watcher_b.stats()["reloads"] == 1
+    assert watcher_b.stats()["file_version"] == 1
+
+
+def test_edits_survive_restart_and_concurrent_writers_do_not_lose_updates(tmp_path):
+    path = str(tmp_path / "agents.json")
+
+    def write(agent_type):
+        for i in range(10):
+            AgentConfigFile(path).save_agent(agent_type, {**CONFIGS[agent_type], "temperature": i / 10})
+
+    threads = [threading.Thread(target=write, args=(agent_type,)) for agent_type in ("hr", "legal")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    assert data["version"] == 20
+    assert {agent: config["temperature"] for agent, config in data["agents"].items()} == {"hr": 0.9, "legal": 0.9}
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+    restarted = AgentConfigStore(CONFIGS)
+    AgentConfigFileWatcher(AgentConfigFile(path), restarted).poll()
+    assert restarted.get("hr")["temperature"] == 0.9
+    assert restarted.get("generic") == CONFIGS["generic"]
+
+
+def test_unreadable_file_keeps_current_configs(tmp_path):
+    path = tmp_path / "agents.json"
+    path.write_text("{not json", encoding="utf-8")
+    store = AgentConfigStore(CONFIGS)
+    watcher = AgentConfigFileWatcher(AgentConfigFile(str(path)), store)
+
+    assert watcher.poll() == 0
+    assert watcher.stats()["failures"] == 1
+    assert store.get("hr") == CONFIGS["hr"]
+    assert watcher.poll() == 0
+    assert watcher.stats()["failures"] == 1
+
+
+def test_invalid_entries_keep_the_snapshot_and_polling_continues(tmp_path):
+    path = tmp_path / "agents.json"
+    store = AgentConfigStore(CONFIGS)
+    before = store.snapshot()
+    watcher = AgentConfigFileWatcher(AgentConfigFile(str(path)), store)
+
+    # An entry without a prompt fails to compile; a list is not an agent map
+    path.write_text(json.dumps({"version": 1, "agents": {"hr": {"name": "HR"}}}), encoding="utf-8")
+    assert watcher.poll() == 0
+    path.write_text(json.dumps({"version": 2, "agents": ["hr"]}), encoding="utf-8")
+    assert watcher.poll() == 0
+    assert store.snapshot() is before
+    assert watcher.stats()["failures"] == 2
+    assert watcher.stats()["last_error"].startswith("ValueError")
+
+    path.write_text(json.dumps({"version": 3, "agents": {"hr": {**CONFIGS["hr"], "temperature": 0.1}}}), encoding="utf-8")
+    assert watcher.poll() == 1
+    assert store.get("hr")["temperature"] == 0.1
+    assert watcher.stats()["last_error"] is None
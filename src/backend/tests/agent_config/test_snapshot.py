@@ -0,0 +1,83 @@
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from agent_config.snapshot import AgentConfigStore, FrozenDict, thaw  # noqa: E402
+from llm.response_cache import ResponseCache  # noqa: E402
+
+CONFIGS = {
+    "hr": {
+        "name": "HR",
+        "prompt": "Scenario '{query}'",
+        "system_prompt": "Je bent HR",
+        "capabilities": ["talent_analysis"],
+        "language": "en",
+    },
+    "generic": {"name": "Generic", "prompt": "{query}"},
+}
+
+
+def test_configs_are_frozen_and_serialize_like_dicts():
+    store = AgentConfigStore(CONFIGS)
+    config = store.get("hr")
+
+    with pytest.raises(TypeError):
+        config["name"] = "x"
+    with pytest.raises(TypeError):
+        config.update(name="x")
+    assert isinstance(config["capabilities"], tuple)
+    assert json.loads(json.dumps(config)) == CONFIGS["hr"]
+    assert thaw(store.snapshot().agents) == CONFIGS
+    assert isinstance(store.snapshot().agents, FrozenDict)
+
+
+def test_hash_matches_response_cache_and_prompt_parts_are_precomputed():
+    config = AgentConfigStore(CONFIGS).get("hr")
+
+    assert config.content_hash == ResponseCache.config_hash(dict(CONFIGS["hr"]))
+    parts = config.prompt_parts
+    assert parts.system_part == "Je bent HR\n\n"
+    assert "talent_analysis" in parts.suffix and "English" in parts.suffix
+    assert AgentConfigStore(CONFIGS).get("unknown")["name"] == "Generic"
+
+
+def test_update_swaps_new_version_and_keeps_old_snapshot_consistent():
+    store = AgentConfigStore(CONFIGS)
+    changes = []
+    store.add_listener(lambda old, new: changes.append((old.version, new.version, new.changed_agents(old))))
+    before = store.snapshot()
+
+    updated = store.update_agent("hr", {"instructions": "Wees kort"})
+
+    after = store.snapshot()
+    assert after.version == before.version + 1
+    assert after.content_hash != before.content_hash
+    assert updated["instructions"] == "Wees kort" and "instructions" not in before.get("hr")
+    assert changes == [(1, 2, ["hr"])]
+    # Writing the same content again does not create a version
+    store.update_agent("hr", {"instructions": "Wees kort"})
+    assert store.snapshot() is after
+    with pytest.raises(KeyError):
+        store.update_agent("missing", {})
+
+
+def test_concurrent_writers_do_not_lose_updates():
+    store = AgentConfigStore(CONFIGS)
+
+    def add(index):
+        store.update_agent("generic", {f"field_{index}": index})
+
+    threads = [threading.Thread(target=add, args=(i,)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    generic = store.get("generic")
+    assert all(generic[f"field_{i}"] == i for i in range(20))
+    assert store.snapshot().version == 21
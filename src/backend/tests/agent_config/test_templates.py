@@ -0,0 +1,45 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from agent_config.templates import SCENARIO_REFERENCE, PromptTemplate, build_prompt_parts  # noqa: E402
+
+
+def format_with_str_format(config, query):
+    parts = build_prompt_parts(config)
+    return parts.system_part + parts.prompt.format(query=query) + parts.suffix
+
+
+@pytest.mark.parametrize(
+    "prompt",
+    [
+        "Voor scenario '{query}' geef advies.",
+        "{query} en nogmaals {query}",
+        "Geen query, wel {{accolades}} en {query}",
+        "Alleen tekst",
+    ],
+)
+def test_render_matches_str_format(prompt):
+    config = {
+        "prompt": prompt,
+        "system_prompt": "Systeem {niet} geformatteerd",
+        "instructions": "Kort",
+        "capabilities": ["a", "b"],
+        "language": "de",
+    }
+    template = PromptTemplate.compile(config)
+
+    assert template.segments is not None
+    assert template.render("Q {x}") == format_with_str_format(config, "Q {x}")
+    assert template.prefix == format_with_str_format(config, SCENARIO_REFERENCE)
+
+
+def test_unsupported_fields_fall_back_to_str_format():
+    template = PromptTemplate.compile({"prompt": "{query!r} voor {team}"})
+
+    assert template.segments is None and template.prefix == ""
+    with pytest.raises(KeyError):
+        template.render("Q")
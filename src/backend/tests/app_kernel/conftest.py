@@ -0,0 +1,26 @@
+"""Imports app_kernel with the variables its configuration requires at import time."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+for name, value in {
+    "AZURE_OPENAI_ENDPOINT": "https://mock",
+    "AZURE_OPENAI_API_KEY": "mock-key",
+    "AZURE_AI_SUBSCRIPTION_ID": "mock",
+    "AZURE_AI_RESOURCE_GROUP": "mock",
+    "AZURE_AI_PROJECT_NAME": "mock",
+    "AZURE_AI_AGENT_PROJECT_CONNECTION_STRING": "mock",
+    "AZURE_AI_AGENT_ENDPOINT": "https://mock",
+}.items():
+    os.environ.setdefault(name, value)
+
+import app_kernel  # noqa: E402
+
+
+@pytest.fixture
+def kernel():
+    return app_kernel
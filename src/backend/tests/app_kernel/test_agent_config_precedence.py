@@ -0,0 +1,45 @@
+from types import SimpleNamespace
+
+import pytest
+
+from agent_config.file_store import AgentConfigFile, AgentConfigFileWatcher
+from agent_config.snapshot import AgentConfigStore
+
+
+@pytest.fixture
+def store(monkeypatch, kernel):
+    """A fresh config store with the built-in agents, swapped in for the global one."""
+    fresh = AgentConfigStore(kernel.AGENT_CONFIGS)
+    monkeypatch.setattr(kernel, "agent_config_store", fresh)
+    return fresh
+
+
+def directus_serving(monkeypatch, kernel, configs):
+    monkeypatch.setattr(kernel, "directus_config_cache", SimpleNamespace(configs=lambda: configs))
+
+
+def test_runtime_edit_survives_directus_refresh(monkeypatch, kernel, store):
+    edited = store.update_agent("hr", {"instructions": "Antwoord kort"})
+    directus = {"marketing": {**kernel.AGENT_CONFIGS["marketing"], "instructions": "Uit Directus"}}
+    directus_serving(monkeypatch, kernel, directus)
+
+    kernel.apply_directus_configs(directus)
+
+    assert store.get("hr").content_hash == edited.content_hash
+    assert store.get("marketing")["instructions"] == "Uit Directus"
+    assert store.snapshot().source == "directus_cms"
+
+
+def test_config_file_does_not_override_directus(monkeypatch, kernel, store, tmp_path):
+    directus = {"hr": {**kernel.AGENT_CONFIGS["hr"], "instructions": "Uit Directus"}}
+    directus_serving(monkeypatch, kernel, directus)
+    kernel.apply_directus_configs(directus)
+
+    config_file = AgentConfigFile(str(tmp_path / "agents.json"))
+    config_file.save_agent("hr", {**kernel.AGENT_CONFIGS["hr"], "instructions": "Uit bestand"})
+    config_file.save_agent("marketing", {**kernel.AGENT_CONFIGS["marketing"], "instructions": "Uit bestand"})
+    watcher = AgentConfigFileWatcher(config_file, store, overridden=kernel.directus_agent_types)
+
+    assert watcher.poll() == 1
+    assert store.get("hr")["instructions"] == "Uit Directus"
+    assert store.get("marketing")["instructions"] == "Uit bestand"
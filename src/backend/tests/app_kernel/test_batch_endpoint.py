@@ -0,0 +1,53 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+
+def test_batch_endpoint_streams_results_in_completion_order(monkeypatch, kernel):
+    delays = {"traag": 0.2, "snel": 0.0}
+
+    async def process_input_task(input_task, semaphore=None):
+        await asyncio.sleep(delays[input_task.description])
+        return {"status": "success", "session_id": input_task.session_id, "agent_responses": []}
+
+    monkeypatch.setattr(kernel, "process_input_task", process_input_task)
+
+    def body():
+        yield b'{"session_id": "s0", "description": "traag"}\n'
+        yield b'{"session_id": "s1"}\n{"session_id": "s2", "desc'
+        yield b'ription": "snel"}\n'
+
+    client = TestClient(kernel.app)
+    with client.stream("POST", "/api/input_task/batch", content=body()) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.iter_lines() if line]
+
+    results, summary = lines[:-1], lines[-1]["batch_summary"]
+    by_index = {line["index"]: line for line in results}
+    # The slow first scenario is reported after the ones that finished earlier
+    assert results[-1]["index"] == 0
+    assert set(by_index) == {0, 1, 2}
+    assert by_index[1]["status"] == "invalid"
+    assert (by_index[0]["session_id"], by_index[2]["session_id"]) == ("s0", "s2")
+    assert (summary["total"], summary["success"], summary["invalid"]) == (3, 2, 1)
+
+def test_malformed_line_is_reported_without_dropping_earlier_items(monkeypatch, kernel):
+    async def process_input_task(input_task, semaphore=None):
+        return {"status": "success", "session_id": input_task.session_id, "agent_responses": []}
+
+    monkeypatch.setattr(kernel, "process_input_task", process_input_task)
+
+    client = TestClient(kernel.app)
+    response = client.post(
+        "/api/input_task/batch",
+        content=b'{"session_id": "s0", "description": "x"}\n{niet json}\n',
+    )
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    by_index = {line["index"]: line for line in lines[:-1]}
+
+    assert by_index[0]["status"] == "success"
+    assert by_index[1]["status"] == "invalid"
+    assert "Invalid JSON" in by_index[1]["message"]
+    assert lines[-1]["batch_summary"] == {**lines[-1]["batch_summary"], "total": 2, "success": 1, "invalid": 1}
@@ -0,0 +1,56 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+AGENTS = [
+    {"agent": "hr", "name": "HR Agent", "expertise": "hr"},
+    {"agent": "marketing", "name": "Marketing Agent", "expertise": "marketing"},
+]
+
+
+@pytest.fixture
+def calls(monkeypatch, kernel):
+    """Record consolidated completions and fan-out agent calls."""
+    recorded = {"consolidated": [], "fanout": []}
+
+    async def create_chat_completion(request_args, **kwargs):
+        recorded["consolidated"].append(request_args)
+        content = json.dumps({agent["expertise"]: f"{agent['expertise']} antwoord" for agent in AGENTS})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    async def generate_ai_response(agent_type, user_query):
+        recorded["fanout"].append(agent_type)
+        return f"{agent_type} fan-out"
+
+    monkeypatch.setattr(kernel, "create_chat_completion", create_chat_completion)
+    monkeypatch.setattr(kernel, "generate_ai_response", generate_ai_response)
+    return recorded
+
+
+def override_configs(monkeypatch, kernel, overrides):
+    original = kernel.get_agent_config
+    monkeypatch.setattr(kernel, "get_agent_config", lambda agent_type: {**original(agent_type), **overrides.get(agent_type, {})})
+
+
+@pytest.mark.asyncio
+async def test_consolidated_call_uses_the_model_and_temperature_the_agents_share(monkeypatch, kernel, calls):
+    shared = {"model_override": "gpt-4o-mini", "temperature": 0.2}
+    override_configs(monkeypatch, kernel, {"hr": shared, "marketing": shared})
+
+    responses = await kernel.run_consolidated(AGENTS, "Scenario uniek-gedeeld")
+
+    assert [r["response"] for r in responses] == ["hr antwoord", "marketing antwoord"]
+    (request_args,) = calls["consolidated"]
+    assert (request_args["model"], request_args["temperature"]) == ("gpt-4o-mini", 0.2)
+    assert calls["fanout"] == []
+
+
+@pytest.mark.asyncio
+async def test_agents_with_different_settings_use_the_fanout(monkeypatch, kernel, calls):
+    override_configs(monkeypatch, kernel, {"hr": {"temperature": 0.1}, "marketing": {"temperature": 0.9}})
+
+    responses = await kernel.run_consolidated(AGENTS, "Scenario uniek-verschillend")
+
+    assert [r["response"] for r in responses] == ["hr fan-out", "marketing fan-out"]
+    assert calls["consolidated"] == []
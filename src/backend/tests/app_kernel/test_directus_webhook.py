@@ -0,0 +1,27 @@
+from fastapi.testclient import TestClient
+
+EVENT = {"event": "agent_configs.items.update", "payload": {"agent_type": "hr"}}
+
+
+def test_webhook_is_disabled_without_a_secret(monkeypatch, kernel):
+    monkeypatch.setattr(kernel, "DIRECTUS_WEBHOOK_SECRET", "")
+
+    response = TestClient(kernel.app).post("/api/directus/webhook", json=EVENT)
+
+    assert response.status_code == 404
+
+
+def test_webhook_requires_the_configured_secret(monkeypatch, kernel):
+    monkeypatch.setattr(kernel, "DIRECTUS_WEBHOOK_SECRET", "geheim")
+    monkeypatch.setattr(kernel, "directus_config_cache", None)
+    client = TestClient(kernel.app)
+
+    assert client.post("/api/directus/webhook", json=EVENT).status_code == 401
+    assert client.post(
+        "/api/directus/webhook", json=EVENT, headers={"X-Webhook-Secret": "fout"}
+    ).status_code == 401
+
+    response = client.post("/api/directus/webhook", json=EVENT, headers={"X-Webhook-Secret": "geheim"})
+    assert response.status_code == 200
+    assert response.json()["status"] == "accepted"
+    assert response.json()["agent_type"] == "hr"
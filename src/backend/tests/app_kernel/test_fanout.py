@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+AGENTS = [
+    {"agent": "hr", "name": "HR Agent", "expertise": "hr"},
+    {"agent": "marketing", "name": "Marketing Agent", "expertise": "marketing"},
+    {"agent": "product", "name": "Product Agent", "expertise": "product"},
+    {"agent": "procurement", "name": "Procurement Agent", "expertise": "procurement"},
+]
+
+
+def stub_agents(monkeypatch, kernel, delays, failing=()):
+    """Replace generate_ai_response with a stub that sleeps delays[agent] and records concurrency."""
+    state = {"running": 0, "peak": 0}
+
+    async def generate_ai_response(agent_type, user_query):
+        state["running"] += 1
+        state["peak"] = max(state["peak"], state["running"])
+        try:
+            await asyncio.sleep(delays.get(agent_type, 0))
+            if agent_type in failing:
+                raise RuntimeError("boom")
+            return f"{agent_type}: {user_query}"
+        finally:
+            state["running"] -= 1
+
+    monkeypatch.setattr(kernel, "generate_ai_response", generate_ai_response)
+    return state
+
+
+@pytest.mark.asyncio
+async def test_fanout_keeps_input_order_and_caps_concurrency(monkeypatch, kernel):
+    monkeypatch.setattr(kernel, "AGENT_FANOUT_CONCURRENCY", 2)
+    # The first agent finishes last
+    state = stub_agents(monkeypatch, kernel, {"hr": 0.05, "marketing": 0.01, "product": 0.0, "procurement": 0.02})
+
+    responses = await kernel.run_agent_fanout(AGENTS, "Scenario")
+
+    assert [r["agent_expertise"] for r in responses] == ["hr", "marketing", "product", "procurement"]
+    assert [r["response"] for r in responses] == [f"{a['expertise']}: Scenario" for a in AGENTS]
+    assert state["peak"] == 2
+
+
+@pytest.mark.asyncio
+async def test_shared_semaphore_overrides_the_per_request_cap(monkeypatch, kernel):
+    state = stub_agents(monkeypatch, kernel, {agent["expertise"]: 0.01 for agent in AGENTS})
+
+    await kernel.run_agent_fanout(AGENTS, "Scenario", semaphore=asyncio.Semaphore(1))
+
+    assert state["peak"] == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_and_failing_agents_only_degrade_their_own_entry(monkeypatch, kernel):
+    monkeypatch.setattr(kernel, "AGENT_RESPONSE_TIMEOUT_SECONDS", 0.05)
+    stub_agents(monkeypatch, kernel, {"marketing": 1.0}, failing={"product"})
+
+    started = asyncio.get_running_loop().time()
+    responses = await kernel.run_agent_fanout(AGENTS, "Scenario")
+
+    assert asyncio.get_running_loop().time() - started < 0.5
+    by_expertise = {r["agent_expertise"]: r["response"] for r in responses}
+    assert by_expertise["hr"] == "hr: Scenario"
+    assert by_expertise["procurement"] == "procurement: Scenario"
+    assert by_expertise["marketing"] == kernel.agent_fallback_response("marketing", "Scenario")
+    assert by_expertise["product"] == kernel.agent_fallback_response("product", "Scenario")
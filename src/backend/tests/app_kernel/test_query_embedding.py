@@ -0,0 +1,26 @@
+from types import SimpleNamespace
+
+import pytest
+
+from llm.rate_limiter import RateLimiterRegistry
+
+
+@pytest.mark.asyncio
+async def test_query_embeddings_go_through_the_rate_limiter(monkeypatch, kernel):
+    requests = []
+
+    class FakeEmbeddings:
+        async def create(self, model, input):
+            requests.append((model, input))
+            return SimpleNamespace(data=[SimpleNamespace(embedding=[1.0, 0.0])], usage=SimpleNamespace(total_tokens=3))
+
+    monkeypatch.setattr(kernel, "EMBEDDING_DEPLOYMENT", "embeddings")
+    monkeypatch.setattr(kernel, "rate_limiter", RateLimiterRegistry())
+    monkeypatch.setattr(kernel, "_query_embeddings", type(kernel._query_embeddings)())
+    monkeypatch.setattr(kernel.client_registry, "get_client", lambda **kwargs: SimpleNamespace(embeddings=FakeEmbeddings()))
+
+    assert await kernel.get_query_embedding("Nieuwe  medewerker") == [1.0, 0.0]
+    assert await kernel.get_query_embedding("nieuwe medewerker") == [1.0, 0.0]
+
+    assert len(requests) == 1
+    assert kernel.rate_limiter.stats()["embeddings"]["acquired"] == 1
@@ -0,0 +1,135 @@
+from types import SimpleNamespace
+
+import pytest
+
+from llm.model_cascade import ModelCascade
+from llm.prompt_cache_stats import PromptCacheStats
+from llm.rate_limiter import RateLimiterRegistry
+
+
+def chunk(content=None, usage=None):
+    choices = [SimpleNamespace(delta=SimpleNamespace(content=content))] if content is not None else []
+    return SimpleNamespace(choices=choices, usage=usage)
+
+
+class FakeStream:
+    """Async iterable of completion chunks that records whether it was closed."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.closed = False
+
+    async def __aiter__(self):
+        for item in self.chunks:
+            yield item
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_completion(monkeypatch, kernel):
+    """Make create_chat_completion return a FakeStream of the given chunks; returns the stream."""
+    monkeypatch.setattr(kernel, "RESPONSE_CACHE_ENABLED", False)
+
+    def install(chunks):
+        stream = FakeStream(chunks)
+
+        async def create_chat_completion(request_args, **kwargs):
+            return stream
+
+        monkeypatch.setattr(kernel, "create_chat_completion", create_chat_completion)
+        return stream
+
+    return install
+
+
+@pytest.mark.asyncio
+async def test_stream_is_closed_when_the_consumer_stops_early(kernel, fake_completion):
+    stream = fake_completion([chunk(), chunk("Een"), chunk(" twee"), chunk(" drie")])
+
+    response = kernel.stream_ai_response("hr", "Scenario")
+    assert await response.__anext__() == "Een"
+    await response.aclose()
+
+    assert stream.closed
+
+
+@pytest.mark.asyncio
+async def test_stream_is_closed_after_the_last_chunk(kernel, fake_completion):
+    stream = fake_completion([chunk("Een"), chunk(" twee")])
+
+    assert [delta async for delta in kernel.stream_ai_response("hr", "Scenario")] == ["Een", " twee"]
+    assert stream.closed
+
+
+def usage(prompt_tokens, cached_tokens, completion_tokens=5):
+    return SimpleNamespace(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        total_tokens=prompt_tokens + completion_tokens,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=cached_tokens),
+    )
+
+
+@pytest.fixture
+def fresh_stats(monkeypatch, kernel):
+    monkeypatch.setattr(kernel, "prompt_cache_stats", PromptCacheStats())
+    return kernel.prompt_cache_stats
+
+
+@pytest.mark.asyncio
+async def test_streamed_response_records_cached_prompt_tokens(kernel, fake_completion, fresh_stats):
+    fake_completion([chunk("Een"), chunk(" twee"), chunk(usage=usage(2048, 1024))])
+
+    assert "".join([delta async for delta in kernel.stream_ai_response("hr", "Scenario")]) == "Een twee"
+
+    key = f"hr:{kernel.agent_prompt_layout('hr')}"
+    assert fresh_stats.stats()["keys"][key]["cached_tokens"] == 1024
+    assert fresh_stats.stats()["keys"][key]["prompt_tokens"] == 2048
+
+
+@pytest.mark.asyncio
+async def test_hedged_completion_records_usage_of_the_stream(monkeypatch, kernel, fake_completion, fresh_stats):
+    monkeypatch.setattr(kernel, "HEDGING_ENABLED", True)
+    fake_completion([chunk("Antwoord"), chunk(usage=usage(1500, 1280))])
+    reported = []
+
+    request_args = kernel.prepare_agent_completion("hr", "Scenario")
+    text = await kernel.complete_agent_request("hr", request_args, on_usage=reported.append)
+
+    assert text == "Antwoord"
+    assert reported[0].prompt_tokens == 1500
+    key = f"hr:{kernel.agent_prompt_layout('hr')}"
+    assert fresh_stats.stats()["keys"][key]["cached_tokens"] == 1280
+
+
+@pytest.mark.asyncio
+async def test_streamed_requests_ask_for_usage(monkeypatch, kernel):
+    requests = []
+
+    class FakeCompletions:
+        async def create(self, **kwargs):
+            requests.append(kwargs)
+            return FakeStream([])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions()))
+    monkeypatch.setattr(kernel.client_registry, "get_client", lambda **kwargs: client)
+    monkeypatch.setattr(kernel, "rate_limiter", RateLimiterRegistry())
+
+    await kernel.create_chat_completion({"model": "gpt-4o", "messages": [{"role": "user", "content": "x"}]}, stream=True)
+
+    assert requests[0]["stream"] is True
+    assert requests[0]["stream_options"] == {"include_usage": True}
+
+
+def test_cascade_records_reported_tokens_and_estimates_without_usage(monkeypatch, kernel):
+    monkeypatch.setattr(kernel, "model_cascade", ModelCascade())
+    request_args = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "x" * 400}]}
+
+    kernel.record_cascade_call("small", request_args, 0.1, usage(1200, 0, completion_tokens=80), "antwoord")
+    tiers = kernel.model_cascade.stats()["tiers"]
+    assert (tiers["small"]["prompt_tokens"], tiers["small"]["completion_tokens"]) == (1200, 80)
+
+    kernel.record_cascade_call("large", request_args, 0.1, None, "antwoord")
+    assert kernel.model_cascade.stats()["tiers"]["large"]["prompt_tokens"] == kernel.completion_token_estimate(request_args)
@@ -0,0 +1,61 @@
+"""CosmosMemoryContexts on a FakeContainer, isolated from the process-wide resolver, caches and RU stats."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from tests.context.fake_cosmos import FakeContainer  # noqa: E402
+
+from context import cosmos_memory_kernel  # noqa: E402
+from context.partition_resolver import PartitionKeyResolver  # noqa: E402
+from context.read_cache import MemoryReadCaches  # noqa: E402
+from context.request_charges import RequestChargeStats  # noqa: E402
+from models.messages_kernel import AgentType, Plan, Step  # noqa: E402
+
+
+@pytest.fixture
+def memory_context(monkeypatch):
+    """Factory of memory contexts; every call swaps in the given resolver and a fresh read cache.
+
+    Args (of the factory):
+        session_id, user_id: The context's session and user
+        container: Container to share with another context (default: a new FakeContainer)
+        resolver: Partition key resolver (default: keep the current one)
+        read_cache: Whether the process-wide read caches are enabled
+    """
+    monkeypatch.setattr(cosmos_memory_kernel, "partition_key_resolver", PartitionKeyResolver(lookup_documents=False))
+    monkeypatch.setattr(cosmos_memory_kernel, "request_charges", RequestChargeStats())
+
+    def make(session_id="s1", user_id="u1", container=None, resolver=None, read_cache=False):
+        if resolver is not None:
+            monkeypatch.setattr(cosmos_memory_kernel, "partition_key_resolver", resolver)
+        monkeypatch.setattr(cosmos_memory_kernel, "memory_read_caches", MemoryReadCaches(enabled=read_cache))
+        context = cosmos_memory_kernel.CosmosMemoryContext(session_id, user_id)
+        context._container = container if container is not None else FakeContainer()
+        return context
+
+    return make
+
+
+@pytest.fixture
+def context(memory_context):
+    """Context of session s1 for user u1 without the read caches; override to enable them."""
+    return memory_context()
+
+
+@pytest.fixture
+def seed():
+    """Write plan p1 of session s1 with one HR step per action, then reset the call counts."""
+
+    async def write(context, actions=("Stap",)):
+        plan = Plan(id="p1", session_id="s1", user_id="u1", initial_goal="Doel")
+        await context.add_plan(plan)
+        for action in actions:
+            await context.add_step(Step(plan_id="p1", session_id="s1", user_id="u1", action=action, agent=AgentType.HR))
+        context._container.calls.clear()
+        return plan
+
+    return write
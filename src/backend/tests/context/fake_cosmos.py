@@ -0,0 +1,86 @@
+"""In-memory stand-in for an azure.cosmos.aio ContainerProxy partitioned on /session_id.
+
+Import it before the context modules: it also sets the variables AppConfig requires.
+"""
+
+import copy
+import os
+import re
+import time
+from collections import Counter
+
+from azure.cosmos.exceptions import CosmosResourceNotFoundError
+from azure.cosmos.partition_key import NonePartitionKeyValue
+
+for name in (
+    "AZURE_OPENAI_ENDPOINT",
+    "AZURE_AI_SUBSCRIPTION_ID",
+    "AZURE_AI_RESOURCE_GROUP",
+    "AZURE_AI_PROJECT_NAME",
+    "AZURE_AI_AGENT_ENDPOINT",
+):
+    os.environ.setdefault(name, "https://mock")
+
+_FILTER = re.compile(r"c\.(\w+)\s*=\s*@(\w+)")
+
+
+async def _iterate(items):
+    for item in items:
+        yield item
+
+
+class FakeContainer:
+    """Stores documents by (partition key, id) and counts the operations the SDK would send.
+
+    Queries support the equality filters the memory context uses (c.field=@param);
+    a query without partition_key counts as cross-partition. response_hook gets a
+    simulated x-ms-request-charge: 1 RU per point read, QUERY_RU per partition queried.
+    """
+
+    QUERY_RU = 2.8
+
+    def __init__(self):
+        self.documents = {}
+        self.calls = Counter()
+
+    @staticmethod
+    def _partition(document):
+        return document.get("session_id", NonePartitionKeyValue)
+
+    async def create_item(self, body):
+        self.calls["create_item"] += 1
+        self.documents[(self._partition(body), body["id"])] = {**copy.deepcopy(body), "_ts": int(time.time())}
+        return body
+
+    async def upsert_item(self, body):
+        self.calls["upsert_item"] += 1
+        self.documents[(self._partition(body), body["id"])] = {**copy.deepcopy(body), "_ts": int(time.time())}
+        return body
+
+    async def read_item(self, item, partition_key, response_hook=None, **kwargs):
+        self.calls["read_item"] += 1
+        if response_hook is not None:
+            response_hook({"x-ms-request-charge": "1.0"}, None)
+        document = self.documents.get((partition_key, item))
+        if document is None:
+            raise CosmosResourceNotFoundError(message="Not found")
+        return copy.deepcopy(document)
+
+    async def delete_item(self, item, partition_key):
+        self.calls["delete_item"] += 1
+        self.documents.pop((partition_key, item), None)
+
+    def query_items(self, query, parameters, partition_key=None, response_hook=None, **kwargs):
+        self.calls["query_single_partition" if partition_key is not None else "query_cross_partition"] += 1
+        if response_hook is not None:
+            partitions = 1 if partition_key is not None else max(1, len({key for key, _ in self.documents}))
+            response_hook({"x-ms-request-charge": str(self.QUERY_RU * partitions)}, None)
+        values = {parameter["name"].lstrip("@"): parameter["value"] for parameter in parameters}
+        filters = [(field, values[name]) for field, name in _FILTER.findall(query) if name in values]
+        matches = [
+            copy.deepcopy(document)
+            for (document_partition, _), document in self.documents.items()
+            if (partition_key is None or document_partition == partition_key)
+            and all(document.get(field) == value for field, value in filters)
+        ]
+        return _iterate(matches)
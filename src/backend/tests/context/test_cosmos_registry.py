@@ -0,0 +1,67 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from tests.context import fake_cosmos  # noqa: E402,F401
+
+from context import cosmos_memory_kernel  # noqa: E402
+from context.cosmos_registry import CosmosContainerRegistry  # noqa: E402
+
+
+def fake_config(endpoint="https://cosmos"):
+    database = MagicMock()
+    database.create_container_if_not_exists = AsyncMock(return_value="container")
+    return SimpleNamespace(
+        COSMOSDB_ENDPOINT=endpoint,
+        COSMOSDB_DATABASE="db",
+        COSMOSDB_CONTAINER="memory",
+        get_cosmos_database_client=MagicMock(return_value=database),
+        _cosmos_client=None,
+    ), database
+
+
+@pytest.mark.asyncio
+async def test_container_check_runs_once_for_concurrent_contexts():
+    app_config, database = fake_config()
+    registry = CosmosContainerRegistry(app_config)
+
+    assert await registry.start() is True
+    handles = await asyncio.gather(*(registry.get_container() for _ in range(20)))
+
+    assert set(handles) == {"container"}
+    database.create_container_if_not_exists.assert_awaited_once()
+    assert registry.stats()["container_checks"] == 1
+    assert registry.stats()["hits"] == 20
+
+
+@pytest.mark.asyncio
+async def test_failed_check_is_retried_and_missing_endpoint_skips_warm_up():
+    app_config, database = fake_config()
+    database.create_container_if_not_exists.side_effect = [ConnectionError("down"), "container"]
+    registry = CosmosContainerRegistry(app_config)
+
+    assert await registry.start() is False
+    assert await registry.get_container() == "container"
+    assert registry.stats()["failures"] == 1
+
+    assert await CosmosContainerRegistry(fake_config(endpoint=None)[0]).start() is False
+
+
+@pytest.mark.asyncio
+async def test_memory_contexts_borrow_the_shared_container(monkeypatch):
+    app_config, database = fake_config()
+    registry = CosmosContainerRegistry(app_config)
+    monkeypatch.setattr(cosmos_memory_kernel, "cosmos_registry", registry)
+
+    for session_id in ("a", "b", "c"):
+        context = cosmos_memory_kernel.CosmosMemoryContext(session_id, "user")
+        await context.ensure_initialized()
+        assert context._container == "container"
+
+    database.create_container_if_not_exists.assert_awaited_once()
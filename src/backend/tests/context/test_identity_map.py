@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from context.identity_map import current_identity_map, identity_scope
+from middleware.identity_map import IdentityMapMiddleware
+from models.messages_kernel import AgentType, Step, StepStatus
+
+
+def reads(context):
+    return sum(context._container.calls.values())
+
+
+@pytest.mark.asyncio
+async def test_reads_within_a_scope_return_the_same_objects(context, seed):
+    await seed(context)
+
+    with identity_scope():
+        plan = await context.get_plan_by_session("s1")
+        assert await context.get_plan_by_session("s1") is plan
+        # The same document through another read is the same object
+        assert await context.get_plan_by_plan_id("p1") is plan
+        steps = await context.get_steps_by_plan("p1", session_id="s1")
+        assert await context.get_steps_for_plan("p1", session_id="s1") is steps
+        assert reads(context) == 3
+
+    # Outside a scope every read goes to the store
+    assert await context.get_plan_by_session("s1") is not plan
+    assert reads(context) == 4
+
+
+@pytest.mark.asyncio
+async def test_writes_refresh_the_objects_of_the_scope(context, seed):
+    await seed(context)
+
+    with identity_scope():
+        steps = await context.get_steps_by_plan("p1", session_id="s1")
+        step = steps[0]
+        changed = step.model_copy(update={"status": StepStatus.completed})
+        await context.update_step(changed)
+        assert step.status == StepStatus.completed
+
+        # An added step changes query results, which are read again
+        await context.add_step(Step(plan_id="p1", session_id="s1", user_id="u1", action="Nieuw", agent=AgentType.HR))
+        steps = await context.get_steps_by_plan("p1", session_id="s1")
+        assert len(steps) == 2
+        assert step in steps and any(s is step for s in steps)
+
+
+@pytest.mark.asyncio
+async def test_scopes_do_not_share_objects(context, seed):
+    await seed(context)
+    release = asyncio.Event()
+
+    async def after_the_request():
+        await release.wait()
+        return current_identity_map()
+
+    async def request():
+        with identity_scope():
+            plan = await context.get_plan_by_session("s1")
+            # A task started by the request that outlives it copies the context
+            return plan, asyncio.create_task(after_the_request())
+
+    (first, leftover), (second, _) = await asyncio.gather(request(), request())
+    assert first is not second
+
+    release.set()
+    assert await leftover is None
+
+
+def test_middleware_opens_one_scope_per_request():
+    app = FastAPI()
+    app.add_middleware(IdentityMapMiddleware)
+    seen = []
+
+    @app.get("/scope")
+    async def scope():
+        seen.append(current_identity_map())
+        return {}
+
+    with TestClient(app) as client:
+        client.get("/scope")
+        client.get("/scope")
+    assert None not in seen
+    assert seen[0] is not seen[1]
+    assert all(identity_map.closed for identity_map in seen)
@@ -0,0 +1,65 @@
+import pytest
+
+from tests.context.fake_cosmos import FakeContainer
+
+from context import cosmos_memory_kernel
+from context.partition_resolver import PartitionKeyResolver
+from models.messages_kernel import Plan, Session
+
+
+def test_resolver_is_bounded_lru():
+    resolver = PartitionKeyResolver(max_entries=2, lookup_documents=False)
+    resolver.remember("a", "s1")
+    resolver.remember("b", "s1")
+    assert resolver.resolve("a") == "s1"
+    resolver.remember("c", "s2")
+
+    assert resolver.resolve("b") is None
+    assert resolver.resolve("c") == "s2"
+    assert resolver.stats()["size"] == 2
+
+
+@pytest.mark.asyncio
+async def test_written_documents_are_point_read(memory_context):
+    container = FakeContainer()
+    context = memory_context(container=container)
+    plan = Plan(id="p1", session_id="s1", user_id="u1", initial_goal="Doel")
+    await context.add_plan(plan)
+    await context.add_session(Session(id="s1", user_id="u1", current_status="active"))
+
+    assert (await context.get_plan_by_plan_id("p1")).initial_goal == "Doel"
+    assert (await context.get_session("s1")).current_status == "active"
+    assert container.calls["read_item"] == 2
+    assert container.calls["query_cross_partition"] == 0
+
+    # Another user's plan is not returned, as with the user-filtered query
+    other = memory_context(user_id="u2", container=container)
+    assert await other.get_plan_by_plan_id("p1") is None
+    assert await other.get_plan("p1") is None
+    assert (await context.get_plan("p1")).id == "p1"
+
+
+@pytest.mark.asyncio
+async def test_unknown_ids_fall_back_to_a_query_once(memory_context):
+    container = FakeContainer()
+    await container.create_item({"id": "p1", "data_type": "plan", "session_id": "s1", "user_id": "u1", "initial_goal": "Doel"})
+    context = memory_context(container=container)
+
+    assert (await context.get_plan_by_plan_id("p1")).id == "p1"
+    assert (await context.get_plan_by_plan_id("p1")).id == "p1"
+    assert await context.get_plan_by_plan_id("missing") is None
+    assert container.calls["query_cross_partition"] == 2
+    assert container.calls["read_item"] == 1
+
+
+@pytest.mark.asyncio
+async def test_lookup_documents_resolve_ids_written_by_other_processes(memory_context):
+    container = FakeContainer()
+    writer = memory_context(container=container, resolver=PartitionKeyResolver(lookup_documents=True))
+    await writer.add_plan(Plan(id="p1", session_id="s1", user_id="u1", initial_goal="Doel"))
+
+    # A fresh resolver, as in another worker process
+    reader = memory_context(container=container, resolver=PartitionKeyResolver(lookup_documents=True))
+    assert (await reader.get_plan_by_plan_id("p1")).id == "p1"
+    assert container.calls["query_cross_partition"] == 0
+    assert cosmos_memory_kernel.partition_key_resolver.stats()["lookup_hits"] == 1
@@ -0,0 +1,58 @@
+import pytest
+
+from tests.context.fake_cosmos import FakeContainer
+
+from context import cosmos_memory_kernel
+from models.messages_kernel import AgentMessage
+
+
+@pytest.fixture
+def seeded(context, seed):
+    """Plan p1 with a step and a message, plus another session's plan so cross-partition queries touch two partitions."""
+
+    async def write():
+        plan = await seed(context)
+        await context.add_agent_message(
+            AgentMessage(session_id="s1", user_id="u1", plan_id="p1", content="Hoi", source="hr")
+        )
+        await context._container.create_item(
+            {"id": "p2", "data_type": "plan", "session_id": "s2", "user_id": "u1", "initial_goal": "Ander"}
+        )
+        context._container.calls.clear()
+        return plan
+
+    return write
+
+
+@pytest.mark.asyncio
+async def test_session_filtered_reads_are_single_partition_queries(context, seeded):
+    await seeded()
+
+    assert (await context.get_plan_by_session("s1")).id == "p1"
+    assert len(await context.get_agent_messages_by_session("s1")) == 1
+    assert len(await context.get_data_by_type("step")) == 1
+    assert len(await context.get_data_by_type_and_session_id("agent_message", "s1")) == 1
+    assert await context.get_messages() == []
+    assert await context.get_memory_records("notes") == []
+    assert len(await context.get_steps_for_plan("p1", session_id="s1")) == 1
+
+    calls = context._container.calls
+    assert calls["query_cross_partition"] == 0
+    assert calls["query_single_partition"] == 7
+
+
+@pytest.mark.asyncio
+async def test_steps_query_uses_the_resolved_plan_partition_and_records_request_units(context, seeded, memory_context):
+    await seeded()
+    cold = memory_context("other", container=context._container)
+
+    # The resolver learned the plan's partition when it was written
+    assert len(await cold.get_steps_by_plan("p1")) == 1
+    cosmos_memory_kernel.partition_key_resolver.forget("p1")
+    assert len(await cold.get_steps_by_plan("p1")) == 1
+
+    assert context._container.calls["query_single_partition"] == 1
+    assert context._container.calls["query_cross_partition"] == 1
+    charges = cosmos_memory_kernel.request_charges.stats()
+    assert charges["query_single_partition"]["avg_request_units"] == FakeContainer.QUERY_RU
+    assert charges["query_cross_partition"]["avg_request_units"] == FakeContainer.QUERY_RU * 2
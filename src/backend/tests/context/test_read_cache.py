@@ -0,0 +1,81 @@
+import time
+
+import pytest
+
+from context import cosmos_memory_kernel
+from context.read_cache import ReadThroughCache
+from models.messages_kernel import AgentType, PlanStatus, Step, StepStatus
+
+
+@pytest.fixture
+def context(memory_context):
+    return memory_context(read_cache=True)
+
+
+def queries(context):
+    calls = context._container.calls
+    return calls["query_single_partition"] + calls["query_cross_partition"] + calls["read_item"]
+
+
+def test_cache_is_bounded_and_expires():
+    cache = ReadThroughCache("test", max_entries=2, ttl_seconds=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["expirations"] == 1
+    assert stats["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_repeated_plan_and_step_reads_hit_the_cache(context, seed):
+    await seed(context, ("Eerste", "Tweede"))
+
+    for _ in range(3):
+        plan = await context.get_plan_by_session("s1")
+        assert plan.id == "p1"
+        assert len(await context.get_steps_by_plan("p1", session_id="s1")) == 2
+        assert (await context.get_plan_by_plan_id("p1")).id == "p1"
+
+    assert queries(context) == 2
+    stats = cosmos_memory_kernel.memory_read_caches.stats()
+    assert stats["steps"]["hits"] == 2
+    assert stats["plans"]["hits"] == 5
+
+    # Other users do not see the cached plan
+    other = cosmos_memory_kernel.CosmosMemoryContext("s1", "u2")
+    other._container = context._container
+    assert await other.get_plan_by_plan_id("p1") is None
+    assert await other.get_plan("p1") is None
+
+
+@pytest.mark.asyncio
+async def test_writes_go_through_to_cached_reads(context, seed):
+    await seed(context, ("Eerste", "Tweede"))
+    steps = await context.get_steps_by_plan("p1", session_id="s1")
+    plan = await context.get_plan_by_session("s1")
+
+    # Changing a returned object does not change the cache
+    steps[0].action = "Lokaal"
+    plan.summary = "Lokaal"
+    assert (await context.get_steps_by_plan("p1"))[0].action == "Eerste"
+
+    steps[0].status = StepStatus.completed
+    await context.update_step(steps[0])
+    plan.overall_status = PlanStatus.completed
+    await context.update_plan(plan)
+    await context.add_step(Step(plan_id="p1", session_id="s1", user_id="u1", action="Derde", agent=AgentType.HR))
+
+    cached_steps = await context.get_steps_by_plan("p1")
+    assert [step.status for step in cached_steps] == [StepStatus.completed, StepStatus.planned, StepStatus.planned]
+    assert (await context.get_plan_by_session("s1")).overall_status == PlanStatus.completed
+    assert queries(context) == 2
+
+    await context.delete_all_items("step")
+    assert await context.get_steps_by_plan("p1") == []
@@ -0,0 +1,54 @@
+import os
+import sys
+
+import pytest
+
+# Ensure src/backend is on the Python path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from llm.client_registry import AzureOpenAIClientRegistry  # noqa: E402
+
+ENDPOINT = "https://mock-openai-endpoint.openai.azure.com"
+
+
+@pytest.mark.asyncio
+async def test_same_endpoint_and_deployment_share_client():
+    """Repeated lookups return the same pooled client."""
+    registry = AzureOpenAIClientRegistry(max_connections=5)
+    first = registry.get_client(ENDPOINT, "gpt-4o", api_key="mock-key")
+    second = registry.get_client(ENDPOINT + "/", "gpt-4o", api_key="mock-key")
+    assert first is second
+    await registry.aclose()
+
+
+@pytest.mark.asyncio
+async def test_deployments_share_connection_pool():
+    """Different deployments get their own client on one connection pool."""
+    registry = AzureOpenAIClientRegistry()
+    large = registry.get_client(ENDPOINT, "gpt-4o", api_key="mock-key")
+    small = registry.get_client(ENDPOINT, "gpt-4o-mini", api_key="mock-key")
+    assert large is not small
+    assert large._client is small._client
+    assert registry.stats()["clients"] == 2
+    await registry.aclose()
+
+
+@pytest.mark.asyncio
+async def test_aclose_resets_registry():
+    """Closing the registry drops clients and a new pool is created on demand."""
+    registry = AzureOpenAIClientRegistry()
+    before = registry.get_client(ENDPOINT, "gpt-4o", api_key="mock-key")
+    await registry.aclose()
+    stats = registry.stats()
+    assert stats["clients"] == 0
+    assert not stats["pool_open"]
+    after = registry.get_client(ENDPOINT, "gpt-4o", api_key="mock-key")
+    assert after is not before
+    await registry.aclose()
+
+
+def test_missing_credentials_rejected():
+    """A client without key or token provider is a configuration error."""
+    registry = AzureOpenAIClientRegistry()
+    with pytest.raises(ValueError):
+        registry.get_client(ENDPOINT, "gpt-4o")
@@ -0,0 +1,104 @@
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+# Ensure src/backend is on the Python path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from llm.deployment_router import DeploymentRouter, parse_deployment_targets  # noqa: E402
+from llm.rate_limiter import RateLimiterRegistry  # noqa: E402
+
+
+class FakeStatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"Error code: {status_code}")
+        self.status_code = status_code
+        self.response = None
+
+
+def make_router(*entries, cooldown_seconds=30):
+    targets = parse_deployment_targets(
+        json.dumps(list(entries)), "https://default", "gpt-4o", "key", None
+    )
+    limiter = RateLimiterRegistry(default_rpm=0, default_tpm=0, limits={}, max_retries=0)
+    return DeploymentRouter(targets, cooldown_seconds=cooldown_seconds, limiter=limiter)
+
+
+def test_parse_defaults_and_model_groups():
+    """Entries inherit defaults, group by model and get unique names."""
+    targets = parse_deployment_targets(
+        '[{"endpoint": "https://swe"}, {"endpoint": "https://eus", "weight": 2},'
+        ' {"endpoint": "https://eus", "deployment": "gpt-4o-mini"}]',
+        "https://default",
+        "gpt-4o",
+        "key",
+        None,
+    )
+    assert [t.name for t in targets] == ["gpt-4o", "gpt-4o@eus", "gpt-4o-mini"]
+    assert [t.model for t in targets] == ["gpt-4o", "gpt-4o", "gpt-4o-mini"]
+    assert targets[1].weight == 2 and targets[1].api_key == "key"
+
+    single = parse_deployment_targets("", "https://default", "gpt-4o", "key", None)
+    assert [(t.name, t.endpoint) for t in single] == [("gpt-4o", "https://default")]
+    assert parse_deployment_targets("", None, "gpt-4o") == []
+
+
+def test_weighted_least_outstanding_selection():
+    """The target with the lowest (outstanding + 1) / weight is picked."""
+    router = make_router(
+        {"endpoint": "https://a", "name": "a"},
+        {"endpoint": "https://b", "name": "b", "weight": 3},
+    )
+    a, b = router.targets
+    picks = []
+    for _ in range(4):
+        target = router.pick("gpt-4o")
+        target.outstanding += 1
+        picks.append(target.name)
+    # b has three times the weight, so it takes three of the first four calls
+    assert picks.count("b") == 3 and picks.count("a") == 1
+    assert router.pick("unknown-model") is None
+
+
+@pytest.mark.asyncio
+async def test_429_fails_over_and_cools_down_target():
+    """A throttled target is taken out of rotation and the call moves on."""
+    router = make_router({"endpoint": "https://a", "name": "a"}, {"endpoint": "https://b", "name": "b"})
+    calls = []
+
+    async def send(target):
+        calls.append(target.name)
+        if target.name == "a":
+            raise FakeStatusError(429)
+        await asyncio.sleep(0)
+        return "ok"
+
+    # Make sure "a" is tried first
+    router.targets[1].outstanding = 5
+    assert await router.call("gpt-4o", 10, send) == "ok"
+    router.targets[1].outstanding = 0
+    assert calls == ["a", "b"]
+
+    stats = router.stats()["targets"]
+    assert stats["a"]["healthy"] is False and stats["a"]["throttled"] == 1
+    assert stats["b"]["successes"] == 1 and stats["b"]["latency_seconds"]
+    # While "a" cools down every call goes to "b"
+    assert {router.pick("gpt-4o").name for _ in range(10)} == {"b"}
+
+
+@pytest.mark.asyncio
+async def test_non_retryable_errors_do_not_fail_over():
+    """Client errors are raised without trying other targets or cooling down."""
+    router = make_router({"endpoint": "https://a", "name": "a"}, {"endpoint": "https://b", "name": "b"})
+
+    async def send(target):
+        raise FakeStatusError(400)
+
+    with pytest.raises(FakeStatusError):
+        await router.call("gpt-4o", 10, send)
+    stats = router.stats()["targets"]
+    assert stats["a"]["requests"] + stats["b"]["requests"] == 1
+    assert stats["a"]["healthy"] and stats["b"]["healthy"]
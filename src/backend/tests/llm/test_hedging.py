@@ -0,0 +1,80 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Ensure src/backend is on the Python path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from llm.hedging import HedgedRequests  # noqa: E402
+
+
+def make_attempt(delays, started):
+    """Attempt i emits its first token after delays[i] and finishes right after."""
+
+    async def attempt(index, on_first_token):
+        started.append(index)
+        await asyncio.sleep(delays[index])
+        on_first_token()
+        return f"attempt-{index}"
+
+    return attempt
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_is_not_hedged():
+    """A primary with a first token before the delay runs alone."""
+    hedger = HedgedRequests(default_delay=0.2, budget_ratio=1.0)
+    started = []
+    assert await hedger.run("hr:gpt", make_attempt([0.01, 0.01], started)) == "attempt-0"
+    assert started == [0]
+    assert hedger.stats()["hedges_sent"] == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged_and_loser_cancelled():
+    """The hedge wins against a stalled primary, which is then cancelled."""
+    hedger = HedgedRequests(default_delay=0.05, budget_ratio=1.0)
+    cancelled = asyncio.Event()
+
+    async def attempt(index, on_first_token):
+        if index == 0:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        on_first_token()
+        return f"attempt-{index}"
+
+    assert await hedger.run("hr:gpt", attempt) == "attempt-1"
+    await asyncio.sleep(0)
+    assert cancelled.is_set()
+    stats = hedger.stats()
+    assert stats["hedges_sent"] == 1 and stats["hedge_wins"] == 1
+    assert stats["hedge_win_rate"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_budget_and_missing_secondary_prevent_hedging():
+    """Hedges stay within the budget and need a secondary deployment."""
+    hedger = HedgedRequests(default_delay=0.01, budget_ratio=0.0)
+    started = []
+    assert await hedger.run("hr:gpt", make_attempt([0.05, 0.0], started)) == "attempt-0"
+    assert started == [0]
+    assert hedger.stats()["budget_denied"] == 1
+
+    hedger = HedgedRequests(default_delay=0.01, budget_ratio=1.0)
+    assert await hedger.run("hr:gpt", make_attempt([0.05, 0.0], []), can_hedge=False) == "attempt-0"
+    assert hedger.stats()["no_secondary"] == 1
+
+
+def test_delay_adapts_to_observed_percentile():
+    """After enough samples the delay is the configured percentile of first-token times."""
+    hedger = HedgedRequests(default_delay=10, min_delay=0.5, percentile=90, min_samples=10)
+    assert hedger.delay_for("hr:gpt") == 10
+    for seconds in range(1, 11):
+        hedger.record_first_token("hr:gpt", float(seconds))
+    assert 9.0 <= hedger.delay_for("hr:gpt") <= 10.0
+    assert hedger.delay_for("marketing:gpt") == 10
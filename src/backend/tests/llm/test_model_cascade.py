@@ -0,0 +1,62 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from llm.model_cascade import (  # noqa: E402
+    ModelCascade,
+    add_confidence_instruction,
+    estimate_complexity,
+    split_confidence,
+)
+
+
+def test_estimate_complexity_grows_with_length_and_signals():
+    simple = estimate_complexity("Hoe plannen we een teamuitje?")
+    complex_ = estimate_complexity(
+        "We plannen een internationale fusie met meerdere vestigingen; hoe pakken we de migratie "
+        "van systemen, de reorganisatie van teams en de compliance met lokale wetgeving tegelijk aan? "
+        "En welke risico's moeten we afwegen tegen de kosten van vertraging?"
+    )
+    assert 0 <= simple < 0.3 < complex_ <= 1
+
+
+def test_confidence_round_trip():
+    messages = add_confidence_instruction([{"role": "system", "content": "Prompt"}, {"role": "user", "content": "Q"}])
+    assert "ZEKERHEID" in messages[0]["content"] and messages[1]["content"] == "Q"
+
+    assert split_confidence("Antwoord\n\nZEKERHEID: 0,8") == ("Antwoord", 0.8)
+    assert split_confidence("Antwoord\n**Zekerheid: 1**") == ("Antwoord", 1.0)
+    assert split_confidence("Antwoord zonder regel") == ("Antwoord zonder regel", None)
+
+
+def test_policy_for_agent_settings_and_defaults():
+    cascade = ModelCascade(small_model="", complexity_threshold=0.5, confidence_threshold=0, prices={})
+    assert cascade.policy_for({}, "gpt-4o") is None
+
+    policy = cascade.policy_for({"cascade": {"small_model": "gpt-4o-mini", "confidence_threshold": 0.6}}, "gpt-4o")
+    assert policy.small_model == "gpt-4o-mini" and policy.complexity_threshold == 0.5 and policy.uses_confidence
+
+    cascade = ModelCascade(small_model="gpt-4o-mini", prices={})
+    assert cascade.policy_for({"cascade": False}, "gpt-4o") is None
+    assert cascade.policy_for({}, "gpt-4o-mini") is None
+
+
+def test_decisions_and_tier_stats():
+    cascade = ModelCascade(
+        small_model="mini",
+        complexity_threshold=0.5,
+        confidence_threshold=0.6,
+        prices={"mini": {"prompt": 1.0, "completion": 2.0}},
+    )
+    policy = cascade.policy_for({}, "large")
+    assert cascade.choose(policy, 0.2) == "small"
+    assert cascade.choose(policy, 0.7) == "large"
+    assert cascade.accepts(policy, 0.9) and not cascade.accepts(policy, 0.3) and cascade.accepts(policy, None)
+
+    cascade.record("small", "mini", 0.5, 1_000_000, 500_000)
+    stats = cascade.stats()
+    assert stats["tiers"]["small"]["cost_usd"] == 2.0
+    assert stats["tiers"]["small"]["latency_seconds"]["p50"] == 0.5
+    assert stats["decisions"]["escalated_low_confidence"] == 1
+    assert stats["decisions"]["confidence_missing"] == 1
@@ -0,0 +1,30 @@
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from llm.prompt_cache_stats import PromptCacheStats, cached_prompt_tokens  # noqa: E402
+
+
+def test_cached_prompt_tokens_reads_objects_and_dicts():
+    usage = SimpleNamespace(prompt_tokens=2000, prompt_tokens_details=SimpleNamespace(cached_tokens=1536))
+    assert cached_prompt_tokens(usage) == 1536
+    assert cached_prompt_tokens({"prompt_tokens_details": {"cached_tokens": 0}}) == 0
+    assert cached_prompt_tokens(SimpleNamespace(prompt_tokens=10, prompt_tokens_details=None)) is None
+
+
+def test_record_aggregates_per_key():
+    stats = PromptCacheStats(recent=2)
+    stats.record("hr:prefix", SimpleNamespace(prompt_tokens=2000, prompt_tokens_details=None))
+    stats.record("hr:prefix", {"prompt_tokens": 2000, "prompt_tokens_details": {"cached_tokens": 1024}})
+    stats.record("hr:prefix", SimpleNamespace(prompt_tokens=2000, prompt_tokens_details=SimpleNamespace(cached_tokens=1536)))
+    stats.record("hr:prefix", None)
+
+    result = stats.stats()
+    counters = result["keys"]["hr:prefix"]
+    assert counters["calls"] == 3
+    assert counters["cached_tokens"] == 2560
+    assert counters["calls_with_cache_hit"] == 2
+    assert counters["cached_ratio"] == round(2560 / 6000, 4)
+    assert [call["cached_tokens"] for call in result["recent"]] == [1024, 1536]
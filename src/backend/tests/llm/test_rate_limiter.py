@@ -0,0 +1,124 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+# Ensure src/backend is on the Python path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from llm.rate_limiter import (  # noqa: E402
+    DeploymentRateLimiter,
+    RateLimiterRegistry,
+    is_rate_limit_error,
+    retry_after_seconds,
+)
+
+
+class FakeResponse:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+class FakeRateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self, headers=None):
+        super().__init__("Error code: 429 - Rate limit is exceeded")
+        self.response = FakeResponse(headers or {})
+
+
+def test_retry_after_headers_are_parsed():
+    """retry-after-ms wins over retry-after and both are read from wrapped errors."""
+    assert retry_after_seconds(FakeRateLimitError({"retry-after-ms": "250"})) == 0.25
+    assert retry_after_seconds(FakeRateLimitError({"retry-after": "3"})) == 3.0
+
+    try:
+        try:
+            raise FakeRateLimitError({"retry-after": "2"})
+        except FakeRateLimitError as inner:
+            raise RuntimeError("agent invoke failed") from inner
+    except RuntimeError as wrapped:
+        assert is_rate_limit_error(wrapped)
+        assert retry_after_seconds(wrapped) == 2.0
+
+
+def test_retry_after_dates_and_invalid_values():
+    """HTTP dates are read as GMT even without a zone; unparseable values are ignored."""
+    in_ten_seconds = time.strftime("%a, %d %b %Y %H:%M:%S", time.gmtime(time.time() + 10))
+    assert 8 <= retry_after_seconds(FakeRateLimitError({"retry-after": in_ten_seconds})) <= 10
+    assert 8 <= retry_after_seconds(FakeRateLimitError({"retry-after": in_ten_seconds + " GMT"})) <= 10
+    assert retry_after_seconds(FakeRateLimitError({"retry-after": "soon"})) is None
+
+
+@pytest.mark.asyncio
+async def test_request_budget_queues_callers():
+    """Requests beyond the bucket wait for refill instead of failing."""
+    limiter = DeploymentRateLimiter("gpt", requests_per_minute=600)  # 10 per second
+    limiter._requests.tokens = 1
+
+    started = time.monotonic()
+    await asyncio.gather(limiter.acquire(), limiter.acquire(), limiter.acquire())
+    elapsed = time.monotonic() - started
+
+    assert elapsed >= 0.15
+    stats = limiter.stats()
+    assert stats["acquired"] == 3
+    assert stats["max_queue_depth"] >= 2
+    assert stats["queue_depth"] == 0
+    assert stats["max_wait_seconds"] > 0
+
+
+@pytest.mark.asyncio
+async def test_call_retries_429_and_honors_retry_after():
+    """A 429 pauses the deployment for retry-after and the call succeeds on retry."""
+    registry = RateLimiterRegistry(default_rpm=0, default_tpm=0, limits={}, max_retries=3)
+    attempts = 0
+
+    async def upstream():
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            raise FakeRateLimitError({"retry-after-ms": "100"})
+        return "ok"
+
+    started = time.monotonic()
+    assert await registry.call("gpt", 10, upstream) == "ok"
+    assert time.monotonic() - started >= 0.1
+    assert attempts == 2
+    stats = registry.stats()["gpt"]
+    assert stats["throttled"] == 1
+    assert stats["retries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_call_gives_up_after_max_retries_and_skips_other_errors():
+    """Errors are re-raised once retries run out; non-retryable errors fail fast."""
+    registry = RateLimiterRegistry(default_rpm=0, default_tpm=0, limits={}, max_retries=1)
+    attempts = 0
+
+    async def always_throttled():
+        nonlocal attempts
+        attempts += 1
+        raise FakeRateLimitError({"retry-after-ms": "10"})
+
+    with pytest.raises(FakeRateLimitError):
+        await registry.call("gpt", 10, always_throttled)
+    assert attempts == 2
+
+    async def bad_request():
+        raise ValueError("invalid prompt")
+
+    with pytest.raises(ValueError):
+        await registry.call("gpt", 10, bad_request)
+    assert registry.stats()["gpt"]["retries"] == 1
+
+
+def test_per_deployment_limits_override_defaults():
+    """AZURE_OPENAI_RATE_LIMITS style overrides apply per deployment."""
+    registry = RateLimiterRegistry(
+        default_rpm=60, default_tpm=1000, limits={"gpt-4o": {"rpm": 300, "tpm": 50000}}
+    )
+    assert registry.get("gpt-4o").stats()["tokens_per_minute"] == 50000
+    assert registry.get("other").stats()["requests_per_minute"] == 60
@@ -0,0 +1,76 @@
+import os
+import sys
+import time
+
+# Ensure src/backend is on the Python path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from llm.response_cache import ResponseCache  # noqa: E402
+
+HR_CONFIG = {"prompt": "HR '{query}'", "temperature": 0.7, "max_tokens": 1500}
+
+
+def test_key_normalizes_query_and_tracks_config():
+    """Whitespace/case changes share a key, config changes do not."""
+    cache = ResponseCache(disk_path="")
+    key = cache.make_key("hr", HR_CONFIG, "Nieuwe  HR strategie ")
+    assert key == cache.make_key("hr", HR_CONFIG, "nieuwe hr strategie")
+    assert key != cache.make_key("hr", {**HR_CONFIG, "temperature": 0.2}, "nieuwe hr strategie")
+    assert key != cache.make_key("hr", HR_CONFIG, "nieuwe hr strategie", model="gpt-4o-mini")
+
+
+def test_hit_miss_counters():
+    """Lookups are counted as hits and misses."""
+    cache = ResponseCache(disk_path="")
+    key = cache.make_key("hr", HR_CONFIG, "scenario")
+    assert cache.get(key) is None
+    cache.set(key, "hr", "antwoord")
+    assert cache.get(key) == "antwoord"
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    """The least recently used entry goes first when a cap is exceeded."""
+    cache = ResponseCache(max_entries=2, disk_path="")
+    cache.set("hr:a", "hr", "a")
+    cache.set("hr:b", "hr", "b")
+    cache.get("hr:a")
+    cache.set("hr:c", "hr", "c")
+    assert cache.get("hr:b") is None
+    assert cache.get("hr:a") == "a"
+
+    small = ResponseCache(max_bytes=10, disk_path="")
+    small.set("hr:a", "hr", "12345")
+    small.set("hr:b", "hr", "678901")
+    assert small.get("hr:a") is None
+    assert small.stats()["bytes"] == 6
+
+
+def test_ttl_expiry():
+    """Expired entries are treated as misses."""
+    cache = ResponseCache(ttl_seconds=0.01, disk_path="")
+    cache.set("hr:a", "hr", "a")
+    time.sleep(0.02)
+    assert cache.get("hr:a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_invalidate_agent_only_drops_that_agent(tmp_path):
+    """Config updates drop one agent's entries from memory and disk."""
+    cache = ResponseCache(disk_path=str(tmp_path))
+    cache.set("hr:a", "hr", "a")
+    cache.set("marketing:a", "marketing", "b")
+    cache.invalidate_agent("hr")
+    assert cache.get("hr:a") is None
+    assert cache.get("marketing:a") == "b"
+
+
+def test_disk_tier_survives_new_instance(tmp_path):
+    """A fresh cache instance finds entries written by a previous one."""
+    ResponseCache(disk_path=str(tmp_path)).set("hr:a", "hr", "persisted")
+    cache = ResponseCache(disk_path=str(tmp_path))
+    assert cache.get("hr:a") == "persisted"
+    assert cache.stats()["disk_hits"] == 1
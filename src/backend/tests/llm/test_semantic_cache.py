@@ -0,0 +1,78 @@
+import os
+import sys
+
+import numpy as np
+
+# Ensure src/backend is on the Python path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from llm.semantic_cache import SemanticResponseCache  # noqa: E402
+
+
+def vector(*values):
+    return np.array(values, dtype=np.float32)
+
+
+def test_near_duplicate_hits_above_threshold():
+    """A paraphrase embedding close to a cached one returns the cached answer."""
+    cache = SemanticResponseCache(default_threshold=0.9, thresholds={})
+    cache.add("hr", "cfg", vector(1.0, 0.0, 0.0), "antwoord")
+    answer, score = cache.lookup("hr", "cfg", vector(0.99, 0.05, 0.0))
+    assert answer == "antwoord"
+    assert score > 0.9
+    assert cache.lookup("hr", "cfg", vector(0.0, 1.0, 0.0)) is None
+
+
+def test_per_agent_threshold_and_config_isolation():
+    """Thresholds are per agent type and other configs never match."""
+    cache = SemanticResponseCache(default_threshold=0.9, thresholds={"hr": 0.999})
+    cache.add("hr", "cfg", vector(1.0, 0.0), "hr")
+    cache.add("marketing", "cfg", vector(1.0, 0.0), "marketing")
+    query = vector(0.99, 0.1)
+    assert cache.lookup("hr", "cfg", query) is None
+    assert cache.lookup("marketing", "cfg", query)[0] == "marketing"
+    assert cache.lookup("marketing", "other-cfg", query) is None
+
+
+def test_lru_eviction_when_full():
+    """The least recently used row is replaced once the index is full."""
+    cache = SemanticResponseCache(capacity_per_agent=2, default_threshold=0.99, thresholds={})
+    cache.add("hr", "cfg", vector(1.0, 0.0, 0.0), "a")
+    cache.add("hr", "cfg", vector(0.0, 1.0, 0.0), "b")
+    assert cache.lookup("hr", "cfg", vector(1.0, 0.0, 0.0))[0] == "a"
+    cache.add("hr", "cfg", vector(0.0, 0.0, 1.0), "c")
+    assert cache.lookup("hr", "cfg", vector(0.0, 1.0, 0.0)) is None
+    assert cache.lookup("hr", "cfg", vector(1.0, 0.0, 0.0))[0] == "a"
+    assert cache.stats()["agents"]["hr"]["evictions"] == 1
+
+
+def test_config_ids_are_released_with_their_last_entry():
+    """Entries of replaced configs are evicted together with their config id."""
+    cache = SemanticResponseCache(capacity_per_agent=2, default_threshold=0.99, thresholds={})
+    for version in range(10):
+        cache.add("hr", f"cfg-{version}", vector(1.0, float(version)), str(version))
+    stats = cache.stats()["agents"]["hr"]
+    assert stats["entries"] == 2
+    assert stats["configs"] == 2
+    assert cache.lookup("hr", "cfg-9", vector(1.0, 9.0))[0] == "9"
+    assert cache.lookup("hr", "cfg-0", vector(1.0, 0.0)) is None
+
+
+def test_stats_report_hit_rate_and_similarity_distribution():
+    """Stats expose hit rate, histogram and percentiles per agent type."""
+    cache = SemanticResponseCache(default_threshold=0.9, thresholds={})
+    cache.add("hr", "cfg", vector(1.0, 0.0), "a")
+    cache.lookup("hr", "cfg", vector(1.0, 0.0))
+    cache.lookup("hr", "cfg", vector(0.0, 1.0))
+    stats = cache.stats()["agents"]["hr"]
+    assert stats["hit_rate"] == 0.5
+    assert stats["similarity_histogram"] == {"0.00": 1, "0.95": 1}
+    assert set(stats["similarity_percentiles"]) == {"p50", "p90", "p99"}
+
+
+def test_invalidate_agent():
+    """Invalidating an agent drops its index."""
+    cache = SemanticResponseCache(default_threshold=0.9, thresholds={})
+    cache.add("hr", "cfg", vector(1.0, 0.0), "a")
+    cache.invalidate_agent("hr")
+    assert cache.lookup("hr", "cfg", vector(1.0, 0.0)) is None
@@ -0,0 +1,94 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Ensure src/backend is on the Python path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from llm.single_flight import SingleFlight  # noqa: E402
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_calls_share_one_upstream_call():
+    """Callers with the same key get the result of a single call."""
+    group = SingleFlight("test")
+    calls = 0
+
+    async def upstream():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "result"
+
+    key = SingleFlight.make_key("hr", {"prompt": "x"})
+    results = await asyncio.gather(*(group.do(key, upstream) for _ in range(5)))
+    assert results == ["result"] * 5
+    assert calls == 1
+    assert group.stats()["coalesced"] == 4
+    assert group.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_exceptions_are_shared_and_not_cached():
+    """A failing call fails all waiters, and the next caller starts fresh."""
+    group = SingleFlight("test")
+    attempts = 0
+
+    async def failing():
+        nonlocal attempts
+        attempts += 1
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(
+        group.do("k", failing), group.do("k", failing), return_exceptions=True
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+    with pytest.raises(RuntimeError):
+        await group.do("k", failing)
+    assert attempts == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelling_one_waiter_keeps_shared_call_running():
+    """Cancelling a waiter does not cancel the call while others remain."""
+    group = SingleFlight("test")
+    release = asyncio.Event()
+
+    async def upstream():
+        await release.wait()
+        return "done"
+
+    first = asyncio.create_task(group.do("k", upstream))
+    second = asyncio.create_task(group.do("k", upstream))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    release.set()
+    assert await second == "done"
+    assert first.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_last_waiter_cancel_cancels_call():
+    """When every waiter is gone the shared call is cancelled."""
+    group = SingleFlight("test")
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def upstream():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    waiter = asyncio.create_task(group.do("k", upstream))
+    await started.wait()
+    waiter.cancel()
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+    assert group.stats()["abandoned"] == 1
+    assert group.stats()["in_flight"] == 0
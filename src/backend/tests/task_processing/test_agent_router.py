@@ -0,0 +1,73 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from task_processing.agent_router import AgentRouter, keyword_scores, tokenize  # noqa: E402
+
+AGENTS = [
+    {"name": "HR Specialist", "expertise": "hr"},
+    {"name": "Procurement Agent", "expertise": "procurement"},
+    {"name": "Tech Support Agent", "expertise": "tech_support"},
+]
+
+CONFIGS = {
+    "hr": {"focus": ["talent management"], "capabilities": ["org_design"], "routing_keywords": ["werving"]},
+    "procurement": {"focus": ["vendor management"], "capabilities": ["cost_optimization"], "routing_keywords": ["leverancier", "kosten"]},
+    "tech_support": {"focus": ["security"], "capabilities": ["infrastructure_design"], "routing_keywords": ["cloud"]},
+}
+
+
+def test_tokenize_splits_capabilities():
+    assert tokenize("cost_optimization, Vendor-management") == ["cost", "optimization", "vendor", "management"]
+
+
+def test_keyword_scores_match_prefixes_and_weigh_shared_terms_less():
+    profiles = {expertise: tokenize(" ".join(c["focus"] + c["routing_keywords"])) for expertise, c in CONFIGS.items()}
+    scores = keyword_scores("Nieuwe leveranciers zoeken voor kostenbesparing", profiles)
+    assert scores["procurement"] > 0
+    assert scores["hr"] == 0 and scores["tech_support"] == 0
+
+    shared = keyword_scores("management", profiles)
+    unique = keyword_scores("werving", profiles)
+    assert 0 < shared["hr"] < unique["hr"]
+
+
+@pytest.mark.asyncio
+async def test_select_skips_irrelevant_agents_with_reasons():
+    router = AgentRouter(top_k=1, threshold=0.3)
+    selection = await router.select("Kosten van onze leveranciers en de cloud omlaag", AGENTS, CONFIGS)
+
+    assert [agent["expertise"] for agent in selection.selected] == ["procurement"]
+    reasons = {skipped["agent_expertise"]: skipped["reason"] for skipped in selection.skipped}
+    assert "drempel" in reasons["hr"]
+    assert "top 1" in reasons["tech_support"]
+    assert router.stats()["calls_saved"] == 2
+
+
+@pytest.mark.asyncio
+async def test_select_calls_everyone_without_a_match_and_falls_back_from_classifier():
+    async def failing_classifier(query, profiles):
+        raise RuntimeError("classifier down")
+
+    router = AgentRouter(top_k=2, threshold=0.3, classifier=failing_classifier)
+    selection = await router.select("Iets heel anders", AGENTS, CONFIGS)
+
+    assert selection.selected == AGENTS
+    assert selection.method == "keywords:no_match"
+    assert router.stats()["classifier_failures"] == 1
+
+
+@pytest.mark.asyncio
+async def test_select_uses_classifier_scores():
+    async def classifier(query, profiles):
+        return {"hr": 0.9, "procurement": 0.1, "tech_support": 0.6}
+
+    router = AgentRouter(top_k=3, threshold=0.5, classifier=classifier)
+    selection = await router.select("Scenario", AGENTS, CONFIGS)
+
+    assert selection.method == "classifier"
+    assert [agent["expertise"] for agent in selection.selected] == ["hr", "tech_support"]
+    assert selection.report()["calls_saved"] == 1
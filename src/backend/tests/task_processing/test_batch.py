@@ -0,0 +1,108 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Ensure src/backend is on the Python path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from task_processing.batch import (  # noqa: E402
+    BatchParseError,
+    DuplexStreamingResponse,
+    iter_json_items,
+    run_bounded,
+)
+
+
+async def chunked(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+async def collect(iterator):
+    return [item async for item in iterator]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("size", [1, 3, 1024])
+async def test_json_array_and_jsonl_parse_across_chunk_boundaries(size):
+    """Items split over arbitrary chunk boundaries (including multi-byte UTF-8) parse."""
+    array = '[{"session_id": "a", "description": "één"}, {"session_id": "b", "description": "x"}]'
+    jsonl = '{"session_id": "a", "description": "één"}\n\n{"session_id": "b", "description": "x"}\n'
+
+    for body in (array, jsonl):
+        items = await collect(iter_json_items(chunked(body.encode("utf-8"), size)))
+        assert [item["session_id"] for item in items] == ["a", "b"]
+        assert items[0]["description"] == "één"
+
+
+@pytest.mark.asyncio
+async def test_malformed_body_raises_after_valid_items():
+    """Valid items before the error are still yielded."""
+    body = b'{"session_id": "a"}\n{"session_id": \n{"x": 1}\n'
+    received = []
+    with pytest.raises(BatchParseError):
+        async for item in iter_json_items(chunked(body, 4)):
+            received.append(item)
+    assert received == [{"session_id": "a"}]
+
+    with pytest.raises(BatchParseError):
+        await collect(iter_json_items(chunked(b'[{"a": 1}', 4)))
+
+
+@pytest.mark.asyncio
+async def test_run_bounded_limits_concurrency_and_yields_in_completion_order():
+    """At most max_in_flight workers run and fast items are not held back by slow ones."""
+    running = 0
+    peak = 0
+
+    async def items():
+        for delay in (0.05, 0.01, 0.01, 0.01):
+            yield delay
+
+    async def worker(index, delay):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(delay)
+        running -= 1
+        return delay
+
+    results = await collect(run_bounded(items(), worker, max_in_flight=2))
+    assert peak == 2
+    assert sorted(index for index, _ in results) == [0, 1, 2, 3]
+    assert results[0][0] == 1
+    assert results[-1][0] == 0
+
+
+@pytest.mark.asyncio
+async def test_duplex_response_stops_the_body_when_the_client_disconnects():
+    body_read = asyncio.Event()
+    stopped = asyncio.Event()
+    sent = []
+
+    async def body():
+        try:
+            while True:
+                yield "regel\n"
+                body_read.set()
+                await asyncio.sleep(0.01)
+        finally:
+            stopped.set()
+
+    async def receive():
+        # Only called once the body has been read
+        assert body_read.is_set()
+        await asyncio.sleep(0.03)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    response = DuplexStreamingResponse(body(), body_read, media_type="application/x-ndjson")
+    await asyncio.wait_for(response({"type": "http"}, receive, send), timeout=1)
+
+    assert stopped.is_set()
+    assert sent[0]["type"] == "http.response.start"
+    assert sent[1]["body"] == b"regel\n"
@@ -0,0 +1,195 @@
+import asyncio
+import os
+import sqlite3
+import sys
+import time
+
+import pytest
+
+# Ensure src/backend is on the Python path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from task_processing.job_queue import (  # noqa: E402
+    InMemoryJobStore,
+    Job,
+    JobManager,
+    JobStatus,
+    SQLiteJobStore,
+)
+
+
+@pytest.mark.asyncio
+async def test_submitted_job_runs_and_long_poll_returns_result():
+    """submit returns immediately; wait blocks until the worker finishes the job."""
+    release = asyncio.Event()
+
+    async def handler(payload):
+        await release.wait()
+        return {"echo": payload["value"]}
+
+    manager = JobManager(InMemoryJobStore(), handler, workers=2)
+    await manager.start()
+    try:
+        job = await manager.submit({"value": 42})
+        assert (await manager.get(job.id)).status in (JobStatus.QUEUED, JobStatus.RUNNING)
+
+        pending = await manager.wait(job.id, timeout=0.05)
+        assert not pending.finished
+
+        release.set()
+        finished = await manager.wait(job.id, timeout=2)
+        assert finished.status == JobStatus.COMPLETED
+        assert finished.result == {"echo": 42}
+        assert await manager.wait("unknown", timeout=0.01) is None
+        # Waiters that timed out or were signalled leave nothing behind
+        assert manager._finished_events == {}
+    finally:
+        await manager.stop()
+
+
+@pytest.mark.asyncio
+async def test_handler_errors_mark_job_failed():
+    """A failing handler produces a failed job with the error message."""
+
+    async def handler(payload):
+        raise RuntimeError("boom")
+
+    manager = JobManager(InMemoryJobStore(), handler, workers=1)
+    await manager.start()
+    try:
+        job = await manager.submit({})
+        finished = await manager.wait(job.id, timeout=2)
+        assert finished.status == JobStatus.FAILED
+        assert finished.error == "boom"
+    finally:
+        await manager.stop()
+
+
+def test_sqlite_store_survives_restart_and_requeues_expired_leases(tmp_path):
+    """Jobs persist across store instances; only running jobs with an expired lease go back to the queue."""
+    path = str(tmp_path / "jobs.db")
+    store = SQLiteJobStore(path)
+    store.put(Job(id="a", payload={"n": 1}))
+    store.put(Job(id="b", payload={"n": 2}))
+    claimed = store.claim_next("worker-1", lease_seconds=30)
+    assert claimed.id == "a" and claimed.status == JobStatus.RUNNING
+    assert claimed.owner == "worker-1"
+    store.close()
+
+    reopened = SQLiteJobStore(path)
+    assert reopened.counts() == {JobStatus.QUEUED: 1, JobStatus.RUNNING: 1}
+    # worker-1 may still be alive: its job is not taken away while the lease holds
+    assert reopened.requeue_expired(now=time.time()) == 0
+    assert reopened.requeue_expired(now=time.time() + 60) == 1
+    assert not reopened.renew_lease("a", "worker-1", lease_seconds=30)
+    first = reopened.claim_next("worker-2", lease_seconds=30)
+    assert first.id == "a" and first.attempts == 2
+    assert reopened.renew_lease("a", "worker-2", lease_seconds=30)
+
+    first.status = JobStatus.COMPLETED
+    first.result = {"ok": True}
+    first.finished_at = 1.0
+    reopened.update(first)
+    assert reopened.get("a").result == {"ok": True}
+    assert reopened.purge_finished(older_than=2.0) == 1
+    assert reopened.get("a") is None
+    reopened.close()
+
+
+def test_sqlite_store_adds_lease_columns_to_existing_databases(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, payload TEXT NOT NULL, result TEXT, "
+        "error TEXT, attempts INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL, started_at REAL, finished_at REAL)"
+    )
+    conn.execute("INSERT INTO jobs VALUES ('old', 'running', '{}', NULL, NULL, 1, 0, 0, NULL)")
+    conn.commit()
+    conn.close()
+
+    store = SQLiteJobStore(path)
+    # Running rows without a lease were left by a process that predates leases
+    assert store.requeue_expired(now=time.time()) == 1
+    assert store.claim_next("worker", lease_seconds=30).id == "old"
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_starting_a_second_manager_does_not_requeue_live_jobs(tmp_path):
+    """Workers sharing a SQLite file keep each other's running jobs; the heartbeat renews the lease."""
+    path = str(tmp_path / "jobs.db")
+    release = asyncio.Event()
+    runs = []
+
+    async def handler(payload):
+        runs.append(payload)
+        await release.wait()
+        return {}
+
+    first = JobManager(SQLiteJobStore(path), handler, workers=1, poll_interval=0.01, lease_seconds=0.15)
+    second = JobManager(SQLiteJobStore(path), handler, workers=1, poll_interval=0.01, lease_seconds=0.15)
+    await first.start()
+    try:
+        job = await first.submit({"n": 1})
+        while not runs:
+            await asyncio.sleep(0.01)
+        await second.start()
+        # Longer than the lease: only the heartbeat keeps the job with the first worker
+        await asyncio.sleep(0.4)
+        assert len(runs) == 1
+
+        release.set()
+        finished = await first.wait(job.id, timeout=2)
+        assert finished.status == JobStatus.COMPLETED
+        assert finished.owner is None
+    finally:
+        await first.stop()
+        await second.stop()
+
+
+@pytest.mark.asyncio
+async def test_stopping_hands_running_jobs_back_to_the_memory_queue():
+    """A cancelled job is queued again, so the next worker on the same store runs it."""
+    store = InMemoryJobStore()
+    started = asyncio.Event()
+
+    async def hang(payload):
+        started.set()
+        await asyncio.Event().wait()
+
+    first = JobManager(store, hang, workers=1)
+    await first.start()
+    job = await first.submit({"n": 1})
+    await started.wait()
+    await first.stop()
+    assert store.get(job.id).status == JobStatus.QUEUED
+
+    async def finish(payload):
+        return {"n": payload["n"]}
+
+    second = JobManager(store, finish, workers=1)
+    await second.start()
+    try:
+        finished = await second.wait(job.id, timeout=2)
+        assert finished.status == JobStatus.COMPLETED
+        assert finished.attempts == 2
+    finally:
+        await second.stop()
+
+
+@pytest.mark.parametrize("make_store", [lambda path: InMemoryJobStore(), SQLiteJobStore])
+def test_release_requires_the_current_lease(make_store, tmp_path):
+    """A worker whose lease expired cannot overwrite the job of the worker that re-ran it."""
+    store = make_store(str(tmp_path / "jobs.db"))
+    store.put(Job(id="a", payload={}))
+    stale = store.claim_next("worker-1", lease_seconds=30)
+    assert store.requeue_expired(now=time.time() + 60) == 1
+    current = store.claim_next("worker-2", lease_seconds=30)
+
+    stale.status, stale.result = JobStatus.COMPLETED, {"from": "worker-1"}
+    assert not store.release(stale, "worker-1")
+    current.status, current.result = JobStatus.COMPLETED, {"from": "worker-2"}
+    assert store.release(current, "worker-2")
+    assert store.get("a").result == {"from": "worker-2"}
+    # Released once: the lease is gone
+    assert not store.release(current, "worker-2")